@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+
+# Sidebar animations for the Analytics pages. Rendering only ever reads
+# memory or the on-disk copy; a missing file is fetched by a background
+# thread with a short timeout, and the page shows no animation until it
+# arrives. Check posts that are offline simply never get one.
+ANIMATIONS = {
+    "medium": "https://lottie.host/7a14797c-3147-4fee-be69-e72094ebf86c/nBFMhiTF5v.json",
+    "complex": "https://lottie.host/5eb57e97-07d1-4e6f-8b96-e34ee35bce8f/jNCim6jNHw.json",
+    "entry": "https://lottie.host/bcd26d44-2777-48b8-94e4-2a4c0b073290/EgXETD9kRu.json",
+}
+ASSET_DIR = os.environ.get("SECURECHECK_ASSET_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "lottie"))
+FETCH_ENABLED = os.environ.get("SECURECHECK_LOTTIE_FETCH", "1") == "1"
+FETCH_TIMEOUT = float(os.environ.get("SECURECHECK_LOTTIE_TIMEOUT", "3"))
+# After a failed download, wait this long before trying again.
+RETRY_AFTER = 600
+
+_loaded = {}
+_fetching = set()
+_failed_at = {}
+_lock = threading.Lock()
+
+
+def _path(name):
+    return os.path.join(ASSET_DIR, name + ".json")
+
+
+def _read(name):
+    try:
+        with open(_path(name)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _fetch(name):
+    # Imported here: only a missing animation needs an HTTP client.
+    import requests
+
+    try:
+        response = requests.get(ANIMATIONS[name], timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+        animation = response.json()
+        os.makedirs(ASSET_DIR, exist_ok=True)
+        tmp = _path(name) + ".tmp"
+        with open(tmp, "w") as handle:
+            json.dump(animation, handle)
+        os.replace(tmp, _path(name))
+        with _lock:
+            _loaded[name] = animation
+    except (requests.RequestException, ValueError, OSError):
+        with _lock:
+            _failed_at[name] = time.monotonic()
+    finally:
+        with _lock:
+            _fetching.discard(name)
+
+
+def load(name):
+    # The animation as a dict, or None if it is not available yet.
+    with _lock:
+        if name in _loaded:
+            return _loaded[name]
+    animation = _read(name)
+    with _lock:
+        if animation is not None:
+            _loaded[name] = animation
+            return animation
+        recently_failed = time.monotonic() - _failed_at.get(name, -RETRY_AFTER) < RETRY_AFTER
+        if not FETCH_ENABLED or name in _fetching or recently_failed:
+            return None
+        _fetching.add(name)
+    threading.Thread(target=_fetch, args=(name,), name=f"lottie-{name}", daemon=True).start()
+    return None
@@ -0,0 +1,699 @@
+import argparse
+import datetime
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import requests
+
+import changes
+import charts
+import database
+import datagen
+import dialect
+import entries
+import entry_api
+import ingest
+import ledger
+import migrate
+import prediction
+import records
+import reports
+import rollups
+import snapshot
+import sync
+import writer
+
+CHUNKSIZE = 100000
+# Regressions smaller than this are treated as timer noise by compare.
+NOISE_MS = 1.0
+# Concurrent submitters in the insert benchmark.
+SESSIONS = 16
+# One dashboard session in the startup benchmark: (step, widget type,
+# label, new value). The first step is the session's first run.
+STARTUP_STEPS = [
+    ("first paint", None, None, None),
+    ("next page", "button", "Next ➡️", None),
+    ("filter change", "radio", "Driver Gender", "Male"),
+    ("open Analytics", "selectbox", "Select Page", "Analytics & Reports"),
+    ("run report", "button", "▶️ Run Query", None),
+    ("open New Entry", "selectbox", "📊 Select Analysis Type", "📝 New Entry + Prediction"),
+    ("open Plate Search", "selectbox", "Select Page", "🔎 Plate Search"),
+    ("plate search", "text_input", "Vehicle Number", "A"),
+]
+# Runs STARTUP_STEPS in a fresh interpreter, as the first session after
+# `streamlit run` would, and prints [step, ms, exceptions] per step.
+STARTUP_SESSION = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+timings = []
+for name, kind, label, value in json.loads(sys.argv[2]):
+    if kind:
+        widget = next(widget for widget in getattr(at, kind) if widget.label == label)
+        widget.click() if kind == "button" else widget.set_value(value)
+    started = time.perf_counter()
+    at.run()
+    timings.append([name, (time.perf_counter() - started) * 1000, len(at.exception)])
+print(json.dumps(timings))
+"""
+
+
+def _latencies_ms(run, repeat, warmup=0):
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def _median_ms(run, repeat):
+    return float(np.median(_latencies_ms(run, repeat)))
+
+
+def _peak_rss_mb():
+    # High-water mark of this process so far; ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def prepare_database():
+    # The target database must be empty, so every run holds exactly the
+    # generated stops.
+    if not migrate.migrate():
+        raise RuntimeError(f"could not migrate {database.DB_URL}")
+    if database.fetch_data("SELECT COUNT(*) AS stops FROM police_stops")["stops"][0]:
+        raise RuntimeError(f"police_stops in {database.DB_URL} is not empty")
+    rollups.rebuild()
+
+
+def load_dataset(rows, seed, start=0, vehicles=None):
+    db = database.connect()
+    try:
+        for df in datagen.generate(rows, seed, CHUNKSIZE, start, vehicles):
+            ingest.load_chunk(db, df)
+    finally:
+        db.close()
+
+
+def _handler_reads(cursor):
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return sum(int(value) for _, value in cursor.fetchall())
+
+
+def rows_scanned(sql, params):
+    # Rows the storage engine handed to MySQL for one run of the query,
+    # less what the two SHOW STATUS calls read themselves. SQLite keeps no
+    # such counter, so it reports None.
+    if database.dialect_name() != "mysql":
+        return None
+    db = database.connect()
+    try:
+        cursor = db.cursor()
+        baseline = _handler_reads(cursor)
+        overhead = _handler_reads(cursor) - baseline
+        before = _handler_reads(cursor)
+        cursor.execute(sql, params or ())
+        cursor.fetchall()
+        return max(_handler_reads(cursor) - before - overhead, 0)
+    finally:
+        db.close()
+
+
+def _sql_operations():
+    everything_filters = (datetime.date(2020, 1, 1), datetime.date(2030, 12, 30), "All", ["India", "USA", "Canada"], "All", False)
+    narrow_filters = (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31), "Female", ["India"], True, True)
+    everything = records.build_filters(*everything_filters)
+    narrow = records.build_filters(*narrow_filters)
+    first_page = records.page_query(*everything)
+    _, key = records.split_page(database.fetch_data(*first_page), 50)
+
+    operations = []
+    for title, report in reports.all_reports():
+        operations.append(("report: " + title, report["sql"], []))
+        if report.get("rollup_sql"):
+            operations.append(("report from rollups: " + title, report["rollup_sql"], []))
+    operations += [
+        ("records: total count", "SELECT COUNT(*) AS total FROM police_stops", []),
+        ("records: summary, no filter", *records.summary_query(*everything_filters)),
+        ("records: first page, no filter", *first_page),
+        ("records: summary, filtered", *records.summary_query(*narrow_filters)),
+        ("records: first page, filtered", *records.page_query(*narrow)),
+    ]
+    if key is not None:
+        operations.append(("records: next page, no filter", *records.page_query(*everything, key)))
+    return operations
+
+
+def _bench_stop(number):
+    return {
+        "country": "India", "vehicle_number": f"BENCH{number:05d}", "stop_date": datetime.date(2026, 1, 1),
+        "stop_time": f"{number // 3600 % 24:02d}:{number // 60 % 60:02d}:{number % 60:02d}",
+        "driver_gender": "Male", "driver_age": 30, "driver_race": "Asian", "violation": "Speeding",
+        "search_conducted": 0, "search_type": "No Search", "stop_outcome": "Warning", "is_arrested": 0,
+        "drugs_related_stop": 0, "stop_duration": "0-15 Min",
+    }
+
+
+def _python_operations(repeat, warmup):
+    # The write path and the prediction lookup, as the New Entry tab runs them.
+    stops = [_bench_stop(number) for number in range(repeat + warmup)]
+    pending_inserts = iter(stops)
+    pending_deletes = iter(stops)
+
+    def insert():
+        db = database.connect()
+        try:
+            ledger.insert_stop(db, next(pending_inserts))
+        finally:
+            db.close()
+
+    def delete():
+        stop = next(pending_deletes)
+        db = database.connect()
+        try:
+            ledger.delete_stops(db, "vehicle_number = %s and stop_time = %s", (stop["vehicle_number"], stop["stop_time"]))
+        finally:
+            db.close()
+
+    model = prediction.OutcomeModel.load()
+    return [
+        ("entry: insert stop", insert),
+        ("entry: delete stop", delete),
+        ("prediction: load model", prediction.OutcomeModel.load),
+        ("prediction: lookup", lambda: model.predict(stops[0])),
+    ]
+
+
+def _summary(times):
+    return {
+        "p50_ms": round(float(np.percentile(times, 50)), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def measure(repeat, warmup):
+    results = {}
+    for name, sql, params in _sql_operations():
+        result = _summary(_latencies_ms(lambda: database.fetch_data(sql, params), repeat, warmup))
+        result["rows_scanned"] = rows_scanned(sql, params)
+        # Whether any step reads all of police_stops without an index.
+        result["full_scan"] = migrate.indexes_used(sql, params) is None
+        results[name] = result
+    for name, run in _python_operations(repeat, warmup):
+        results[name] = _summary(_latencies_ms(run, repeat, warmup))
+    return results
+
+
+def run_suite(scales, seed=0, repeat=10, warmup=1, url=None):
+    # Grows one database through each scale in turn and measures every
+    # dashboard query at each step.
+    scales = sorted(scales)
+    vehicles = max(scales[-1] // datagen.STOPS_PER_VEHICLE, 1)
+    original_url = database.DB_URL
+    report = {
+        "commit": _git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "seed": seed,
+        "repeat": repeat,
+        "scales": [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            database.configure(url or "sqlite:///" + os.path.join(workdir, "bench.db"))
+            report["backend"] = database.dialect_name()
+            prepare_database()
+            loaded = 0
+            for rows in scales:
+                print(f"⏳ Loading stops {loaded + 1}-{rows}")
+                started = time.perf_counter()
+                load_dataset(rows, seed, loaded, vehicles)
+                load_seconds = time.perf_counter() - started
+                loaded = rows
+                print(f"⏳ Measuring at {rows} stops")
+                report["scales"].append({
+                    "rows": rows,
+                    "load_seconds": round(load_seconds, 2),
+                    "operations": measure(repeat, warmup),
+                })
+        finally:
+            database.configure(original_url)
+    return report
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(base, new, threshold=0.1):
+    # p50 of every operation measured at the same scale in both runs.
+    # Returns the comparison table and the operations that got slower by
+    # more than `threshold` (and by more than NOISE_MS).
+    base_scales = {scale["rows"]: scale["operations"] for scale in base["scales"]}
+    rows = []
+    for scale in new["scales"]:
+        before = base_scales.get(scale["rows"], {})
+        for name, result in scale["operations"].items():
+            if name not in before:
+                continue
+            old_ms, new_ms = before[name]["p50_ms"], result["p50_ms"]
+            rows.append({
+                "rows": scale["rows"],
+                "operation": name,
+                "base_p50_ms": old_ms,
+                "new_p50_ms": new_ms,
+                "change": (new_ms - old_ms) / old_ms if old_ms else 0.0,
+                "regression": new_ms > old_ms * (1 + threshold) and new_ms - old_ms > NOISE_MS,
+            })
+    table = pd.DataFrame(rows, columns=["rows", "operation", "base_p50_ms", "new_p50_ms", "change", "regression"])
+    return table, table[table["regression"]]
+
+
+def _open_and_select(directory):
+    con = snapshot.open_view(directory)
+    try:
+        con.execute("SELECT 1").fetchall()
+    finally:
+        con.close()
+
+
+def time_snapshot(directory, repeat):
+    snapshot.export(directory, full=True)
+    con = snapshot.open_view(directory)
+    try:
+        timings = {"connect + SELECT 1": _median_ms(lambda: _open_and_select(directory), repeat)}
+        for title, report in reports.all_reports():
+            sql = dialect.translate(report["sql"], "duckdb")
+            timings[title] = _median_ms(lambda: con.execute(sql).df(), repeat)
+    finally:
+        con.close()
+    return timings
+
+
+def time_sql_backend(repeat):
+    timings = {"connect + SELECT 1": _median_ms(lambda: database.fetch_data("SELECT 1"), repeat)}
+    rollup_timings = {}
+    for title, report in reports.all_reports():
+        timings[title] = _median_ms(lambda: database.fetch_data(report["sql"]), repeat)
+        if report.get("rollup_sql"):
+            rollup_timings[title] = _median_ms(lambda: database.fetch_data(report["rollup_sql"]), repeat)
+    return timings, rollup_timings
+
+
+def compare_backends(rows, seed=0, repeat=5, mysql_url=None):
+    # Median milliseconds per report, by backend. The DuckDB column reads a
+    # Parquet snapshot exported from the SQLite database.
+    results = {}
+    original_url = database.DB_URL
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            backends = [("sqlite", "sqlite:///" + os.path.join(workdir, "bench.db"))]
+            if mysql_url:
+                backends.append(("mysql", mysql_url))
+            for name, url in backends:
+                print(f"⏳ Loading {rows} stops into {name}")
+                database.configure(url)
+                prepare_database()
+                load_dataset(rows, seed)
+                results[name], results[name + " rollups"] = time_sql_backend(repeat)
+                if name == "sqlite":
+                    print("⏳ Exporting the Parquet snapshot for duckdb")
+                    results["duckdb snapshot"] = time_snapshot(os.path.join(workdir, "snapshot"), repeat)
+        finally:
+            database.configure(original_url)
+    return results
+
+
+def _generated_stops(rows, seed, predict=False):
+    # With predict, outcomes are left for the batch path to fill in.
+    stops = []
+    for df in datagen.generate(rows, seed):
+        if predict:
+            df = df.assign(stop_outcome=None)
+        stops += df.to_dict("records")
+    return stops
+
+
+def _post_batches(url, stops, batch):
+    session = requests.Session()
+    for start in range(0, len(stops), batch):
+        body = json.dumps(stops[start:start + batch], default=str)
+        response = session.post(url, data=body, headers={"Content-Type": "application/json"}, timeout=60)
+        response.raise_for_status()
+
+
+def _in_sessions(stops, insert, sessions=SESSIONS):
+    threads = [threading.Thread(target=lambda share=stops[i::sessions]: [insert(stop) for stop in share])
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def time_inserts(rows, batch_sizes, seed=0, url=None):
+    # Sustained stops per second through each write path, each inserting
+    # `rows` fresh stops into the same growing database.
+    results = {}
+    original_url = database.DB_URL
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            database.configure(url or "sqlite:///" + os.path.join(workdir, "bench.db"))
+            prepare_database()
+            model = prediction.OutcomeModel()
+
+            def run(name, insert, seed_offset, predict=True):
+                stops = _generated_stops(rows, seed + seed_offset, predict)
+                print(f"⏳ {name}")
+                started = time.perf_counter()
+                insert(stops)
+                seconds = time.perf_counter() - started
+                results[name] = {"rows": rows, "seconds": round(seconds, 3), "stops_per_second": round(rows / seconds, 1)}
+
+            def one_by_one(stops):
+                for stop in stops:
+                    db = database.connect()
+                    try:
+                        ledger.insert_stop(db, stop)
+                    finally:
+                        db.close()
+            run("insert_stop, one per transaction", one_by_one, 1, predict=False)
+
+            for number, batch in enumerate(batch_sizes, start=2):
+                def batched(stops, batch=batch):
+                    for start in range(0, len(stops), batch):
+                        db = database.connect()
+                        try:
+                            entries.submit(db, model, stops[start:start + batch])
+                        finally:
+                            db.close()
+                run(f"entries.submit, {batch} per batch", batched, number)
+
+            # Officers submitting single entries at the same time, waiting
+            # for each to be durable before the next.
+            def direct(stop):
+                db = database.connect()
+                try:
+                    ledger.insert_stop(db, stop)
+                finally:
+                    db.close()
+            number = len(batch_sizes) + 2
+            run(f"insert_stop, {SESSIONS} sessions", lambda stops: _in_sessions(stops, direct), number, predict=False)
+            group_writer = writer.GroupCommitWriter()
+            try:
+                run(f"group commit writer, {SESSIONS} sessions",
+                    lambda stops: _in_sessions(stops, lambda stop: group_writer.submit([stop]).result()), number + 1, predict=False)
+            finally:
+                group_writer.close()
+
+            server = entry_api.serve("127.0.0.1", 0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                endpoint = f"http://127.0.0.1:{server.server_address[1]}/stops"
+                for number, batch in enumerate(batch_sizes, start=len(batch_sizes) + 4):
+                    run(f"HTTP /stops, {batch} per request", lambda stops, batch=batch: _post_batches(endpoint, stops, batch), number)
+            finally:
+                server.shutdown()
+                server.server_close()
+        finally:
+            database.configure(original_url)
+    return results
+
+
+def time_live(rows, seed=0, added=20, repeat=5):
+    # Milliseconds to bring the Data Records summary and every live report
+    # up to date after `added` new stops: running the query again against
+    # applying the change feed.
+    results = {}
+    original_url = database.DB_URL
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            database.configure("sqlite:///" + os.path.join(workdir, "bench.db"))
+            prepare_database()
+            print(f"⏳ Loading {rows} stops")
+            load_dataset(rows, seed)
+            queries = [("Data Records summary", *records.summary_query(datetime.date(2020, 1, 1), datetime.date(2030, 12, 30)), ())]
+            queries += [(title, report["sql"], None, report["live"]) for title, report in reports.all_reports() if report.get("live")]
+            for title, sql, params, keys in queries:
+                live = changes.LiveResult(sql, params, keys)
+                full, delta = [], []
+                for number in range(repeat):
+                    stops = _generated_stops(added, seed + 100 + number, predict=True)
+                    db = database.connect()
+                    try:
+                        ledger.insert_stops(db, stops)
+                    finally:
+                        db.close()
+                    full.append(_median_ms(lambda: database.fetch_data(sql, params), 1))
+                    delta.append(_median_ms(live.refresh, 1))
+                results[title] = {"query ms": round(float(np.median(full)), 1), "live delta ms": round(float(np.median(delta)), 1)}
+        finally:
+            database.configure(original_url)
+    return results
+
+
+def _start_central(url):
+    # entry_api.py on its own database in a child process, as the central
+    # ledger would run; returns (process, base URL).
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "entry_api.py", "--host", "127.0.0.1", "--port", str(port)],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, "SECURECHECK_DB_URL": url},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(base + "/health", timeout=1)
+            return process, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("the central entry API did not start")
+
+
+def time_sync(rows, batch_sizes, kbps=256, latency_ms=150, seed=0):
+    # Stops per second pushed from a check post's ledger to a central one
+    # over a simulated slow link, for each batch size, gzip on and off.
+    # Both ledgers are temporary SQLite files; every run pushes `rows` new
+    # stops, with a tenth of them already in the central ledger.
+    results = {}
+    original_url = database.DB_URL
+    with tempfile.TemporaryDirectory() as workdir:
+        central_url = "sqlite:///" + os.path.join(workdir, "central.db")
+        post_url = "sqlite:///" + os.path.join(workdir, "post.db")
+        try:
+            for url in (central_url, post_url):
+                database.configure(url)
+                prepare_database()
+            process, base = _start_central(central_url)
+            try:
+                link = sync.Link(base, kbps=kbps, latency_ms=latency_ms)
+                runs = [(batch, True) for batch in batch_sizes] + [(batch_sizes[len(batch_sizes) // 2], False)]
+                for number, (batch, compress) in enumerate(runs, start=1):
+                    stops = _generated_stops(rows, seed + number)
+                    database.configure(central_url)
+                    db = database.connect()
+                    try:
+                        ledger.insert_stops(db, stops[:rows // 10])
+                    finally:
+                        db.close()
+                    database.configure(post_url)
+                    db = database.connect()
+                    try:
+                        ledger.insert_stops(db, stops)
+                    finally:
+                        db.close()
+                    name = f"{batch} per batch, {'gzip' if compress else 'uncompressed'}"
+                    print(f"⏳ {name}")
+                    stats = sync.push(link, "bench-post", batch, compress)
+                    results[name] = {"stops": stats["stops"], "inserted": stats["inserted"], "duplicates": stats["duplicates"],
+                                     "kB sent": round(stats["bytes"] / 1024, 1),
+                                     "compression": round(stats["raw_bytes"] / stats["bytes"], 1),
+                                     "seconds": round(stats["seconds"], 2),
+                                     "stops_per_second": round(stats["stops"] / stats["seconds"], 1)}
+            finally:
+                process.terminate()
+                process.wait()
+        finally:
+            database.configure(original_url)
+    return results
+
+
+def _session_timings(script, url):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "SECURECHECK_DB_URL": url, "SECURECHECK_TELEMETRY_LOG": "off",
+           "PYTHONPATH": os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")]))}
+    output = subprocess.run([sys.executable, "-c", STARTUP_SESSION, script, json.dumps(STARTUP_STEPS)],
+                            cwd=here, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_startup(url=None, repeat=3, before=None):
+    # Milliseconds for a new session's first run of dashboard.py (time to
+    # first paint, imports included) and for each interaction after it,
+    # median of `repeat` fresh processes. With `before`, the dashboard.py
+    # of that git revision is timed too, against the same modules.
+    here = os.path.dirname(os.path.abspath(__file__))
+    url = url or database.DB_URL
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        scripts = {"now": os.path.join(here, "dashboard.py")}
+        if before:
+            scripts[before] = os.path.join(workdir, "dashboard.py")
+            with open(scripts[before], "w") as handle:
+                handle.write(subprocess.run(["git", "show", f"{before}:dashboard.py"], cwd=here,
+                                            capture_output=True, text=True, check=True).stdout)
+        # One untimed session warms the OS file cache; the scripts then take
+        # turns, so neither is favoured by running second.
+        _session_timings(scripts["now"], url)
+        runs = {name: [] for name in scripts}
+        for number in range(repeat):
+            for name, script in scripts.items():
+                print(f"⏳ {name}: session {number + 1} of {repeat}")
+                runs[name].append(_session_timings(script, url))
+        for name, sessions in runs.items():
+            errors = sum(step[2] for session in sessions for step in session)
+            if errors:
+                raise RuntimeError(f"{name}: {errors} exceptions in the dashboard")
+            results[f"{name} ms"] = {step: round(float(np.median([session[number][1] for session in sessions])), 1)
+                                     for number, (step, *_) in enumerate(STARTUP_STEPS)}
+    return results
+
+
+def measure_charts():
+    # Rows, bars and figure JSON bytes of every report chart in the
+    # configured database, plotted raw and through charts.bar.
+    results = {}
+    for title, report in reports.all_reports():
+        df = database.fetch_data(reports.report_sql(report))
+        started = time.perf_counter()
+        raw = len(px.bar(df, **report["chart"]).to_json())
+        raw_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        fig, notes, size = charts.bar(df, report["chart"])
+        binned_ms = (time.perf_counter() - started) * 1000
+        results[title] = {"rows": len(df), "raw_bytes": raw, "raw_ms": round(raw_ms, 1),
+                          "bars": sum(len(trace.x) for trace in fig.data if trace.x is not None),
+                          "binned_bytes": size, "binned_ms": round(binned_ms, 1), "merged": "; ".join(notes)}
+    return results
+
+
+def _scale(text):
+    return int(float(text))
+
+
+def _print_suite(report):
+    for scale in report["scales"]:
+        print(f"\n📊 {scale['rows']} stops (loaded in {scale['load_seconds']}s)")
+        table = pd.DataFrame(scale["operations"]).T
+        with pd.option_context("display.width", 200, "display.max_colwidth", 70, "display.max_rows", None):
+            print(table.to_string(na_rep="-"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SecureCheck dashboard queries on generated data.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    suite = commands.add_parser("suite", help="time every report, Data Records query, prediction and insert at each scale")
+    suite.add_argument("--scales", default="1e5,1e6", help="comma-separated dataset sizes, e.g. 1e6,1e7,1e8 (default 1e5,1e6)")
+    suite.add_argument("--seed", type=int, default=0, help="random seed for the generated stops (default 0)")
+    suite.add_argument("--repeat", type=int, default=10, help="timed runs per operation (default 10)")
+    suite.add_argument("--warmup", type=int, default=1, help="untimed runs before each operation (default 1)")
+    suite.add_argument("--url", help="SQLAlchemy URL of an empty database to fill (default: a temporary SQLite file)")
+    suite.add_argument("--json", help="write the results to this file, for benchmark.py compare")
+
+    compare = commands.add_parser("compare", help="compare two suite results and fail on regressions")
+    compare.add_argument("base", help="JSON written by an earlier suite run")
+    compare.add_argument("new", help="JSON written by the run to check")
+    compare.add_argument("--threshold", type=float, default=0.1, help="allowed p50 slowdown as a fraction (default 0.1)")
+
+    backends = commands.add_parser("backends", help="compare report latency across database backends")
+    backends.add_argument("--rows", type=_scale, default=100000, help="generated stops loaded into every backend (default 100000)")
+    backends.add_argument("--seed", type=int, default=0, help="random seed for the generated stops (default 0)")
+    backends.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported (default 5)")
+    backends.add_argument("--mysql-url", help="SQLAlchemy URL of an empty MySQL database to include, e.g. "
+                                              "mysql+mysqlconnector://root:@localhost/securecheck_bench")
+    backends.add_argument("--json", help="also write the results to this file")
+    inserts = commands.add_parser("inserts", help="measure sustained insert throughput, single and batched")
+    inserts.add_argument("--rows", type=_scale, default=5000, help="stops inserted by each write path (default 5000)")
+    inserts.add_argument("--batches", default="100,1000", help="comma-separated batch sizes (default 100,1000)")
+    inserts.add_argument("--seed", type=int, default=0, help="random seed for the generated stops (default 0)")
+    inserts.add_argument("--url", help="SQLAlchemy URL of an empty database to fill (default: a temporary SQLite file)")
+    live = commands.add_parser("live", help="compare re-running live queries with applying change feed deltas")
+    live.add_argument("--rows", type=_scale, default=200000, help="generated stops to load (default 200000)")
+    live.add_argument("--added", type=int, default=20, help="stops inserted between refreshes (default 20)")
+    live.add_argument("--seed", type=int, default=0, help="random seed for the generated stops (default 0)")
+    commands.add_parser("charts", help="measure report chart payloads in the configured database, raw and binned")
+    sync_parser = commands.add_parser("sync", help="measure check post to central ledger sync over a simulated slow link")
+    sync_parser.add_argument("--rows", type=_scale, default=5000, help="new stops pushed in each run (default 5000)")
+    sync_parser.add_argument("--batches", default="100,1000,5000", help="comma-separated changes per request (default 100,1000,5000)")
+    sync_parser.add_argument("--kbps", type=float, default=256, help="simulated link speed in kilobits per second (default 256)")
+    sync_parser.add_argument("--latency-ms", type=float, default=150, help="simulated round trip per request (default 150)")
+    sync_parser.add_argument("--seed", type=int, default=0, help="random seed for the generated stops (default 0)")
+    startup = commands.add_parser("startup", help="time a new dashboard session's first paint and reruns")
+    startup.add_argument("--url", help="SQLAlchemy URL of the database to open (default: the configured one)")
+    startup.add_argument("--repeat", type=int, default=3, help="fresh processes per script; the median is reported (default 3)")
+    startup.add_argument("--before", help="also time dashboard.py at this git revision, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        print(pd.DataFrame(time_startup(args.url, args.repeat, args.before)).to_string())
+    elif args.command == "sync":
+        results = time_sync(args.rows, [int(text) for text in args.batches.split(",")], args.kbps, args.latency_ms, args.seed)
+        print(f"📡 {args.kbps:g} kbit/s, {args.latency_ms:g} ms per request")
+        print(pd.DataFrame(results).T.to_string())
+    elif args.command == "live":
+        print(pd.DataFrame(time_live(args.rows, args.seed, args.added)).T.to_string())
+    elif args.command == "charts":
+        table = pd.DataFrame(measure_charts()).T
+        with pd.option_context("display.width", 250, "display.max_colwidth", 60):
+            print(table.to_string())
+        print(f"✅ Largest binned chart: {table['binned_bytes'].max()} bytes (limit {charts.MAX_JSON_BYTES})")
+    elif args.command == "inserts":
+        results = time_inserts(args.rows, [int(text) for text in args.batches.split(",")], args.seed, args.url)
+        print(pd.DataFrame(results).T.to_string())
+    elif args.command == "suite":
+        report = run_suite([_scale(text) for text in args.scales.split(",")], args.seed, args.repeat, args.warmup, args.url)
+        _print_suite(report)
+        if args.json:
+            with open(args.json, "w") as handle:
+                json.dump(report, handle, indent=1)
+    elif args.command == "compare":
+        with open(args.base) as handle:
+            base = json.load(handle)
+        with open(args.new) as handle:
+            new = json.load(handle)
+        table, regressions = compare_reports(base, new, args.threshold)
+        with pd.option_context("display.width", 200, "display.max_colwidth", 70, "display.max_rows", None):
+            print(table.to_string(index=False, formatters={"change": "{:+.0%}".format}))
+        print(f"{'❌' if len(regressions) else '✅'} {len(regressions)} regressions between {base.get('commit')} and {new.get('commit')}")
+        sys.exit(1 if len(regressions) else 0)
+    else:
+        results = compare_backends(args.rows, args.seed, args.repeat, args.mysql_url)
+        table = pd.DataFrame(results).round(2)
+        with pd.option_context("display.width", 200, "display.max_colwidth", 60):
+            print(table.to_string(na_rep="-"))
+        if args.json:
+            with open(args.json, "w") as handle:
+                json.dump({"rows": args.rows, "seed": args.seed, "repeat": args.repeat, "median_ms": results}, handle, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import database
+import dialect
+import exports
+import result_cache
+import telemetry
+
+# Change feed of police_stops. Every ledger insert and delete also writes
+# the stops it touched to the stop_changes outbox, in the same
+# transaction, numbered from a single counter row in change_seq. The
+# counter row stays locked until the writer commits, so sequence numbers
+# have no gaps and appear in commit order: a reader that has seen
+# everything up to seq N only ever needs seq > N. Bulk loads write one
+# reload marker ("R") instead of their rows, and readers recompute.
+ENABLED = os.environ.get("SECURECHECK_CHANGE_FEED", "1") == "1"
+TABLE = "stop_changes"
+SEQ_TABLE = "change_seq"
+# police_stops columns carried by each change, as in ledger.COLUMNS.
+STOP_COLUMNS = (
+    "country", "vehicle_number", "stop_date", "stop_time", "driver_gender",
+    "driver_age", "driver_race", "violation", "search_conducted", "search_type",
+    "stop_outcome", "is_arrested", "drugs_related_stop", "stop_duration",
+)
+FIELDS = ("seq", "op", "stop_id", *STOP_COLUMNS, "changed_at")
+INSERT, DELETE, RELOAD = "I", "D", "R"
+# More changes than this in one poll are cheaper to answer with a full read.
+MAX_DELTA_ROWS = int(os.environ.get("SECURECHECK_LIVE_MAX_DELTA_ROWS", "5000"))
+# How often the dashboard's live mode polls the feed.
+POLL_SECONDS = float(os.environ.get("SECURECHECK_LIVE_POLL_SECONDS", "5"))
+KEEP_HOURS = float(os.environ.get("SECURECHECK_CHANGE_KEEP_HOURS", "24"))
+
+INSERT_SQL = f"""INSERT INTO {TABLE} ({", ".join(FIELDS)})
+    VALUES ({", ".join(["%s"] * len(FIELDS))})"""
+
+
+def table_statements(seq_type):
+    # Migration 3, for the backend's primary key spelling.
+    return [
+        f"""CREATE TABLE {TABLE} (
+            seq {seq_type},
+            op CHAR(1) NOT NULL,
+            stop_id BIGINT,
+            country VARCHAR(20),
+            vehicle_number VARCHAR(20),
+            stop_date DATE,
+            stop_time TIME,
+            driver_gender VARCHAR(10),
+            driver_age SMALLINT,
+            driver_race VARCHAR(20),
+            violation VARCHAR(20),
+            search_conducted TINYINT(1),
+            search_type VARCHAR(50),
+            stop_outcome VARCHAR(10),
+            is_arrested TINYINT(1),
+            drugs_related_stop TINYINT(1),
+            stop_duration VARCHAR(10),
+            changed_at DATETIME NOT NULL
+        )""",
+        f"CREATE INDEX idx_change_time ON {TABLE} (changed_at)",
+        f"CREATE TABLE {SEQ_TABLE} (id INT NOT NULL PRIMARY KEY, seq BIGINT NOT NULL)",
+        f"INSERT INTO {SEQ_TABLE} (id, seq) VALUES (1, 0)",
+    ]
+
+
+def _claim(cursor, count):
+    # The first of `count` new sequence numbers. Run it as late in the
+    # transaction as possible: other writers wait on the counter row.
+    cursor.execute(f"UPDATE {SEQ_TABLE} SET seq = seq + %s WHERE id = 1", (count,))
+    cursor.execute(f"SELECT seq FROM {SEQ_TABLE} WHERE id = 1")
+    return int(cursor.fetchone()[0]) - count + 1
+
+
+def record_insert(cursor, columns, rows, ids):
+    # rows are in `columns` order, as ledger.insert_stops writes them.
+    if not ENABLED or not rows:
+        return
+    first = _claim(cursor, len(rows))
+    now = datetime.datetime.now()
+    changes = []
+    for offset, (stop_id, row) in enumerate(zip(ids, rows)):
+        stop = dict(zip(columns, row))
+        changes.append([first + offset, INSERT, stop_id, *[stop.get(column) for column in STOP_COLUMNS], now])
+    cursor.executemany(INSERT_SQL, changes)
+
+
+def record_delete(cursor, where, params):
+    # Must run before the DELETE itself, inside the same transaction.
+    if not ENABLED:
+        return
+    # The count and the copy must see the same rows. On MySQL the row
+    # locks keep other writers from adding matching stops in between.
+    # SQLite only takes its write lock with the first write, and reads
+    # before it need not be in the same transaction, so the counter row is
+    # written first.
+    if database.dialect_name() == "mysql":
+        cursor.execute(f"SELECT id FROM police_stops WHERE {where} FOR UPDATE", params)
+    else:
+        cursor.execute(f"UPDATE {SEQ_TABLE} SET seq = seq WHERE id = 1")
+        cursor.execute(f"SELECT id FROM police_stops WHERE {where}", params)
+    count = len(cursor.fetchall())
+    if not count:
+        return
+    first = _claim(cursor, count)
+    cursor.execute(f"""INSERT INTO {TABLE} ({", ".join(FIELDS)})
+        SELECT %s + ROW_NUMBER() OVER (ORDER BY id) - 1, '{DELETE}', id, {", ".join(STOP_COLUMNS)}, %s
+        FROM police_stops WHERE {where}""", [first, datetime.datetime.now()] + list(params))
+
+
+def record_reload(cursor):
+    # Bulk loads: readers must recompute instead of applying rows.
+    if ENABLED:
+        cursor.execute(INSERT_SQL, [_claim(cursor, 1), RELOAD, None, *[None] * len(STOP_COLUMNS), datetime.datetime.now()])
+
+
+def fetch_at_seq(sql, params=None):
+    # (result, seq): a query's result and the last change it includes,
+    # both read from one snapshot of the database.
+    db = database.connect()
+    try:
+        cursor = db.cursor()
+        if database.dialect_name() == "sqlite":
+            # pysqlite only opens a transaction for writes.
+            cursor.execute("BEGIN")
+        cursor.execute(f"SELECT seq FROM {SEQ_TABLE} WHERE id = 1")
+        seq = int(cursor.fetchone()[0])
+        with telemetry.span("query.execute", sql=sql):
+            cursor.execute(sql, params or ())
+            rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+        db.rollback()
+    finally:
+        db.close()
+    return pd.DataFrame(rows, columns=columns), seq
+
+
+def latest_seq():
+    return int(database.fetch_data(f"SELECT seq FROM {SEQ_TABLE} WHERE id = 1")["seq"].iloc[0])
+
+
+_seen = 0
+_seen_lock = threading.Lock()
+
+
+def _saw(seq):
+    # Changes written by other processes (the ingest API, another
+    # dashboard) also make this process's cached results stale.
+    global _seen
+    with _seen_lock:
+        if seq <= _seen:
+            return
+        _seen = seq
+    result_cache.bump_version()
+
+
+def catch_up():
+    # One primary key read: makes this process's cached results stale if
+    # any process has written since the last call.
+    if ENABLED:
+        _saw(latest_seq())
+
+
+class ChangeCursor:
+    def __init__(self, seq):
+        self.seq = seq
+
+    def poll(self, limit=MAX_DELTA_ROWS):
+        # (inserted, deleted) change rows since the last poll, or None when
+        # the reader has to start over: after a bulk load, after more than
+        # `limit` changes, or when the changes it needs have been pruned.
+        rows = database.fetch_data(f"SELECT {', '.join(FIELDS)} FROM {TABLE} WHERE seq > %s ORDER BY seq LIMIT %s",
+                                   (self.seq, limit + 1))
+        if rows.empty:
+            return rows, rows
+        _saw(int(rows["seq"].iloc[-1]))
+        if int(rows["seq"].iloc[0]) != self.seq + 1 or len(rows) > limit or (rows["op"] == RELOAD).any():
+            return None
+        self.seq = int(rows["seq"].iloc[-1])
+        return rows[rows["op"] == INSERT], rows[rows["op"] == DELETE]
+
+
+def _as_stops(rows):
+    # Change rows as police_stops rows, with dates and times as the text
+    # SQLite compares.
+    stops = exports.normalize(rows[["stop_id", *STOP_COLUMNS]].rename(columns={"stop_id": "id"}))
+    stops["stop_date"] = stops["stop_date"].astype("string")
+    return stops
+
+
+def _run(sql, params, rows):
+    # The dashboard query evaluated over just these stops.
+    con = sqlite3.connect(":memory:")
+    try:
+        _as_stops(rows).to_sql("police_stops", con, index=False)
+        params = [value.isoformat() if isinstance(value, datetime.date) else value for value in params or ()]
+        return pd.read_sql_query(dialect.to_sqlite(sql), con, params=params)
+    finally:
+        con.close()
+
+
+def _numbers(df, columns):
+    df = df.copy()
+    for column in columns:
+        # mysql.connector returns SUM() as Decimal.
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0)
+    return df
+
+
+def apply(result, sql, params, inserted, deleted, keys):
+    # result of a COUNT/SUM query grouped by `keys` (none for one row),
+    # updated for the inserted and deleted stops. Existing rows keep their
+    # place; new groups go last and emptied ones are dropped.
+    keys = list(keys)
+    values = [column for column in result.columns if column not in keys]
+    result = _numbers(result, values)
+    for rows, sign in ((inserted, 1), (deleted, -1)):
+        if rows.empty:
+            continue
+        change = _numbers(_run(sql, params, rows), values)
+        if not keys:
+            result.loc[result.index[0], values] = result[values].iloc[0] + sign * change[values].iloc[0]
+            continue
+        current = result.set_index(keys)[values]
+        merged = current.add(sign * change.set_index(keys)[values], fill_value=0)
+        merged = merged.reindex(current.index.append(merged.index.difference(current.index)))
+        result = merged[(merged != 0).any(axis=1)].reset_index()
+    for column in values:
+        if (result[column] % 1 == 0).all():
+            result[column] = result[column].astype("int64")
+    return result
+
+
+class LiveResult:
+    # A query result kept current from the change feed. With `keys` (the
+    # GROUP BY columns of a result that only counts or sums, () for a
+    # single row) each poll adds the changes to it; otherwise the query
+    # is run again, from fetch_sql (e.g. a report's rollup form) if
+    # given, whenever anything changed.
+    def __init__(self, sql, params=None, keys=None, fetch_sql=None):
+        self.query = (sql, tuple(params or ()), fetch_sql)
+        self.sql = sql
+        self.params = list(params or ())
+        self.keys = keys
+        self.fetch_sql = fetch_sql or sql
+        self.full_reads = 0
+        self.deltas = 0
+        self._load()
+
+    def _load(self):
+        with telemetry.span("live.load"):
+            self.result, seq = fetch_at_seq(self.fetch_sql, self.params)
+        self.cursor = ChangeCursor(seq)
+        self.full_reads += 1
+        self.updated_at = datetime.datetime.now()
+
+    def refresh(self):
+        # True when the result changed.
+        with telemetry.span("live.poll") as fields:
+            polled = self.cursor.poll()
+            if polled is None:
+                fields["action"] = "reload"
+                self._load()
+                return True
+            inserted, deleted = polled
+            fields["changes"] = len(inserted) + len(deleted)
+            if inserted.empty and deleted.empty:
+                return False
+            if self.keys is None:
+                self._load()
+                return True
+            self.result = apply(self.result, self.sql, self.params, inserted, deleted, self.keys)
+        self.deltas += 1
+        self.updated_at = datetime.datetime.now()
+        return True
+
+    def status(self):
+        return (f"🔴 Live: up to change {self.cursor.seq}, updated {self.updated_at:%H:%M:%S} "
+                f"({self.deltas} delta updates, {self.full_reads} full reads)")
+
+
+def prune(hours=KEEP_HOURS):
+    # Drops changes older than `hours`; readers that had not seen them
+    # start over. At a check post, changes the central ledger has not
+    # acknowledged yet (sync_pushed) are kept however old they are.
+    db = database.connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute(f"""DELETE FROM {TABLE} WHERE changed_at < %s
+            AND seq <= COALESCE((SELECT MIN(seq) FROM sync_pushed), seq)""",
+                       (datetime.datetime.now() - datetime.timedelta(hours=hours),))
+        deleted = cursor.rowcount
+        db.commit()
+    finally:
+        db.close()
+    return deleted
+
+
+def tail(interval=1.0):
+    cursor = ChangeCursor(latest_seq())
+    print(f"⏳ Following changes after {cursor.seq}")
+    while True:
+        rows = database.fetch_data(f"SELECT {', '.join(FIELDS)} FROM {TABLE} WHERE seq > %s ORDER BY seq LIMIT 1000",
+                                   (cursor.seq,))
+        for change in rows.itertuples(index=False):
+            print(f"{change.seq} {change.op} {change.changed_at} id={change.stop_id} "
+                  f"{change.vehicle_number} {change.stop_date} {change.stop_time} {change.violation}")
+        if not rows.empty:
+            cursor.seq = int(rows["seq"].iloc[-1])
+        else:
+            time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow or prune the stop_changes feed.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("tail", help="print changes as they are committed")
+    prune_parser = commands.add_parser("prune", help="delete old changes")
+    prune_parser.add_argument("--hours", type=float, default=KEEP_HOURS, help=f"keep this many hours of changes (default {KEEP_HOURS:g})")
+    args = parser.parse_args()
+
+    if args.command == "prune":
+        print(f"✅ Pruned {prune(args.hours)} changes older than {args.hours:g} hours")
+    else:
+        try:
+            tail()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
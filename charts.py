@@ -0,0 +1,139 @@
+import math
+import os
+
+import pandas as pd
+import plotly.express as px
+
+# Report results are binned here before they reach px.bar, so a chart
+# never sends more than MAX_POINTS bars in MAX_FACETS panels to the
+# browser however many years the ledger holds. Facets that are years are
+# merged into spans of years, then months become quarters and hours
+# 3-hour blocks, then categories keep their TOP_N largest values with the
+# rest summed as "Other". If the figure's JSON is still larger
+# than MAX_JSON_BYTES the point budget is halved and the chart rebuilt.
+MAX_POINTS = int(os.environ.get("SECURECHECK_CHART_MAX_POINTS", "600"))
+MAX_FACETS = int(os.environ.get("SECURECHECK_CHART_MAX_FACETS", "6"))
+TOP_N = int(os.environ.get("SECURECHECK_CHART_TOP_N", "10"))
+MAX_JSON_BYTES = int(os.environ.get("SECURECHECK_CHART_MAX_JSON_BYTES", "60000"))
+MIN_POINTS = 50
+OTHER = "Other"
+
+# Time columns and their next coarser grain: (new column, mapping, note).
+GRAINS = {
+    "month": ("quarter", lambda months: (months - 1) // 3 + 1, "months grouped into quarters"),
+    "hour": ("hour", lambda hours: hours // 3 * 3, "hours grouped into 3-hour blocks"),
+}
+TIME_COLUMNS = ("year", *GRAINS)
+# Averages and percentages are averaged when rows are merged, everything
+# else is summed.
+MEAN_WORDS = ("rate", "avg", "percent")
+
+
+def _how(column):
+    return "mean" if any(word in column for word in MEAN_WORDS) else "sum"
+
+
+def _columns(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _roles(df, chart):
+    # (dimension columns, value columns) of a px.bar call.
+    values = _columns(chart.get("x") if chart.get("orientation") == "h" else chart.get("y"))
+    dims = []
+    for key in ("y" if chart.get("orientation") == "h" else "x", "color", "facet_col"):
+        for column in _columns(chart.get(key)):
+            if column in df and column not in values and column not in dims:
+                # A numeric color such as arrests is a continuous scale, not
+                # a category.
+                if column in TIME_COLUMNS or not pd.api.types.is_numeric_dtype(df[column]) or key != "color":
+                    dims.append(column)
+    return dims, [column for column in values if column in df]
+
+
+def _regroup(df, dims):
+    numeric = [column for column in df.columns if column not in dims and pd.api.types.is_numeric_dtype(df[column])]
+    return df.groupby(dims, sort=True, as_index=False, observed=True).agg({column: _how(column) for column in numeric})
+
+
+def _rename(chart, old, new):
+    chart = dict(chart)
+    for key in ("x", "y", "color", "facet_col"):
+        if chart.get(key) == old:
+            chart[key] = new
+    if "labels" in chart and old in chart["labels"]:
+        chart["labels"] = {new if label == old else label: text for label, text in chart["labels"].items()}
+    return chart
+
+
+def _year_spans(years, limit):
+    years = years.astype(int)
+    span = math.ceil(years.nunique() / limit)
+    first = years.min()
+    starts = first + (years - first) // span * span
+    ends = (starts + span - 1).clip(upper=years.max())
+    return starts.astype(str).where(starts == ends, starts.astype(str) + "–" + ends.astype(str))
+
+
+def _top(df, column, limit, value):
+    totals = df.groupby(column, observed=True)[value].sum().abs() if value else df[column].value_counts()
+    keep = set(totals.nlargest(limit - 1).index)
+    return df[column].where(df[column].isin(keep), OTHER)
+
+
+def downsample(df, chart, max_points=MAX_POINTS, max_facets=MAX_FACETS, top_n=TOP_N):
+    # (binned rows, px.bar arguments, notes on what was merged).
+    chart = dict(chart)
+    notes = []
+    dims, values = _roles(df, chart)
+    if df.empty or not dims:
+        return df, chart, notes
+    value = values[0] if values else None
+    # Each value column is its own bar.
+    max_rows = max(1, max_points // max(1, len(values)))
+
+    if chart.get("facet_col") == "year" and df["year"].nunique() > max_facets:
+        years = df["year"].nunique()
+        df = df.assign(year=_year_spans(df["year"], max_facets))
+        df = _regroup(df, dims)
+        notes.append(f"{years} years shown as {df['year'].nunique()} spans of years")
+    for column, (coarser, mapping, note) in GRAINS.items():
+        if len(df) <= max_rows:
+            break
+        if column in dims and pd.api.types.is_numeric_dtype(df[column]):
+            df = df.assign(**{column: mapping(df[column])}).rename(columns={column: coarser})
+            dims = [coarser if dim == column else dim for dim in dims]
+            chart = _rename(chart, column, coarser)
+            df = _regroup(df, dims)
+            notes.append(note)
+    for column in dims:
+        # Facets are always capped; other categories only when there are
+        # too many bars, so short ranked lists keep every row.
+        facet = column == chart.get("facet_col")
+        limit = max_facets if facet else top_n
+        if column in TIME_COLUMNS or df[column].nunique() <= limit or (not facet and len(df) <= max_rows):
+            continue
+        count = df[column].nunique()
+        df = df.assign(**{column: _top(df, column, limit, value)})
+        df = _regroup(df, dims)
+        notes.append(f"{count - limit + 1} smaller {column} values grouped as {OTHER}")
+    if len(df) > max_rows:
+        notes.append(f"showing the {max_rows} largest of {len(df)} rows")
+        df = df.loc[df[value].abs().nlargest(max_rows).index] if value else df.head(max_rows)
+        df = df.sort_values(dims)
+    return df.reset_index(drop=True), chart, notes
+
+
+def bar(df, chart, max_bytes=MAX_JSON_BYTES):
+    # (figure, notes, JSON bytes): px.bar on the binned rows, within
+    # max_bytes unless even MIN_POINTS bars do not fit.
+    points = MAX_POINTS
+    while True:
+        binned, arguments, notes = downsample(df, chart, points)
+        fig = px.bar(binned, **arguments)
+        size = len(fig.to_json())
+        if size <= max_bytes or points <= MIN_POINTS:
+            return fig, notes, size
+        points = max(MIN_POINTS, points // 2)
@@ -0,0 +1,252 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+import mysql.connector
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+
+import dialect
+import telemetry
+
+# A sqlite:///path URL runs the whole dashboard on an embedded database
+# file, with no server to install or connect to.
+DB_URL = os.environ.get("SECURECHECK_DB_URL", "mysql+mysqlconnector://root:@localhost/Securecheck_ledger")
+POOL_SIZE = int(os.environ.get("SECURECHECK_POOL_SIZE", "5"))
+POOL_OVERFLOW = int(os.environ.get("SECURECHECK_POOL_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.environ.get("SECURECHECK_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.environ.get("SECURECHECK_POOL_RECYCLE", "1800"))
+
+# Errors that mean the server dropped the connection rather than the query
+# being wrong; the statement is retried once on a fresh connection.
+DISCONNECT_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+
+
+class DatabaseBusy(sqlite3.OperationalError):
+    # SQLite's "database is locked": another writer held the database
+    # longer than POOL_TIMEOUT. SQLite raises OperationalError for syntax
+    # errors and missing tables too; only this one is about the database.
+    pass
+
+
+# Anything that means no usable connection could be had from the pool.
+CONNECTION_ERRORS = (SQLAlchemyError, DatabaseBusy) + DISCONNECT_ERRORS
+# The statement reached the database but its values were refused (a
+# value out of range or too long, a failed constraint).
+DATA_ERRORS = (mysql.connector.errors.DataError, mysql.connector.errors.IntegrityError,
+               sqlite3.DataError, sqlite3.IntegrityError)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "connects": 0,
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidations": 0,
+    "wait_total_ms": 0.0,
+    "wait_max_ms": 0.0,
+}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def dialect_name():
+    return make_url(DB_URL).get_backend_name()
+
+
+def configure(url):
+    # Points the module at another database, e.g. for benchmark.py.
+    global DB_URL, _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        DB_URL = url
+        _engine = None
+
+
+def _sqlite_time(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _setup_sqlite(dbapi_connection, connection_record):
+    # WAL lets the dashboard keep reading while a bulk load is writing.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+def _engine_options():
+    if dialect_name() != "sqlite":
+        return {}
+    # Stored the way MySQL prints them, so dates and times compare and sort
+    # as text.
+    sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+    sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+    sqlite3.register_adapter(datetime.time, datetime.time.isoformat)
+    sqlite3.register_adapter(datetime.timedelta, _sqlite_time)
+    # Pooled connections move between Streamlit's script threads; the
+    # timeout is how long a writer waits for another one to finish.
+    return {"connect_args": {"check_same_thread": False, "timeout": POOL_TIMEOUT}}
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    DB_URL,
+                    pool_size=POOL_SIZE,
+                    max_overflow=POOL_OVERFLOW,
+                    pool_timeout=POOL_TIMEOUT,
+                    pool_recycle=POOL_RECYCLE,
+                    pool_pre_ping=True,
+                    **_engine_options()
+                )
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", _setup_sqlite)
+                event.listen(engine, "connect", lambda *args: _count("connects"))
+                event.listen(engine, "checkout", lambda *args: _count("checkouts"))
+                event.listen(engine, "checkin", lambda *args: _count("checkins"))
+                event.listen(engine, "invalidate", lambda *args: _count("invalidations"))
+                _engine = engine
+    return _engine
+
+
+def _busy(err):
+    # Python 3.11+ names the SQLite result code; older versions only
+    # have the message.
+    name = getattr(err, "sqlite_errorname", None)
+    if name is not None:
+        return name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED"))
+    return "locked" in str(err)
+
+
+def duplicate_key(err):
+    # One of DATA_ERRORS raised because a unique index already holds the
+    # row's key, rather than for a bad value.
+    if isinstance(err, mysql.connector.errors.IntegrityError):
+        return err.errno == 1062
+    name = getattr(err, "sqlite_errorname", None)
+    if name is not None:
+        return name == "SQLITE_CONSTRAINT_UNIQUE"
+    return "UNIQUE constraint failed" in str(err)
+
+
+def _sqlite_call(method, *args):
+    try:
+        return method(*args)
+    except sqlite3.OperationalError as err:
+        if _busy(err) and not isinstance(err, DatabaseBusy):
+            raise DatabaseBusy(*err.args) from err
+        raise
+
+
+class TranslatingCursor:
+    # Rewrites each statement into the backend's dialect before running it.
+
+    def __init__(self, cursor, name):
+        self._cursor = cursor
+        self._dialect = name
+
+    def execute(self, sql, params=()):
+        return _sqlite_call(self._cursor.execute, dialect.translate(sql, self._dialect), params)
+
+    def executemany(self, sql, rows):
+        return _sqlite_call(self._cursor.executemany, dialect.translate(sql, self._dialect), rows)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TranslatingConnection:
+    def __init__(self, connection, name):
+        self._connection = connection
+        self._dialect = name
+
+    def cursor(self, *args, **kwargs):
+        return TranslatingCursor(self._connection.cursor(*args, **kwargs), self._dialect)
+
+    def commit(self):
+        return _sqlite_call(self._connection.commit)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def connect():
+    started = time.perf_counter()
+    engine = get_engine()
+    with telemetry.span("db.connect"):
+        conn = engine.raw_connection()
+    waited = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats["wait_total_ms"] += waited
+        _stats["wait_max_ms"] = max(_stats["wait_max_ms"], waited)
+    if engine.dialect.name != "mysql":
+        return TranslatingConnection(conn, engine.dialect.name)
+    return conn
+
+
+def connect_direct(**options):
+    # An unpooled mysql.connector connection for bulk tools that need
+    # client options the shared pool does not set (e.g. local infile).
+    # Embedded databases have no client options, so they use the pool.
+    if dialect_name() != "mysql":
+        return connect()
+    url = make_url(DB_URL)
+    return mysql.connector.connect(
+        host=url.host or "localhost",
+        port=url.port or 3306,
+        user=url.username or "root",
+        password=url.password or "",
+        database=url.database,
+        **options
+    )
+
+
+def fetch_data(query, params=None):
+    for attempt in (1, 2):
+        db = connect()
+        try:
+            cursor = db.cursor()
+            with telemetry.span("query.execute", sql=query):
+                cursor.execute(query, params or ())
+            with telemetry.span("query.fetchall") as fields:
+                data = cursor.fetchall()
+                fields["rows"] = len(data)
+            with telemetry.span("query.dataframe"):
+                columns = [desc[0] for desc in cursor.description]
+                return pd.DataFrame(data, columns=columns)
+        except DISCONNECT_ERRORS:
+            db.invalidate()
+            if attempt == 2:
+                raise
+        finally:
+            db.close()
+
+
+def pool_stats():
+    pool = get_engine().pool
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["pool_size"] = pool.size()
+    stats["checked_out"] = pool.checkedout()
+    stats["idle"] = pool.checkedin()
+    stats["overflow"] = pool.overflow()
+    stats["wait_avg_ms"] = stats["wait_total_ms"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    return stats
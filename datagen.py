@@ -0,0 +1,134 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import ledger
+
+# Synthetic police_stops rows in the cleaned shape police.ipynb produces.
+# Value sets are the ones the notebook's data uses; the weights and the
+# correlations below are tuned so every report has a clear, stable answer.
+START = "2020-01-01"
+END = "2025-12-31"
+
+COUNTRIES = {"India": 0.45, "USA": 0.35, "Canada": 0.20}
+GENDERS = {"Male": 0.68, "Female": 0.32}
+RACES = {"White": 0.35, "Asian": 0.25, "Black": 0.18, "Hispanic": 0.14, "Other": 0.08}
+VIOLATIONS = {"Speeding": 0.42, "Seatbelt": 0.16, "Signal": 0.14, "Other": 0.18, "DUI": 0.10}
+DURATIONS = ("0-15 Min", "16-30 Min", "30+ Min")
+# Stops per hour of day: a morning and an evening peak, few after midnight.
+HOUR_WEIGHTS = np.array([2, 1, 1, 1, 1, 2, 4, 7, 9, 8, 6, 6, 6, 6, 6, 7, 8, 9, 8, 6, 5, 4, 3, 3], dtype=float)
+
+# Per violation: chance of a search, and of an arrest before drugs are
+# taken into account.
+SEARCH_RATE = {"Speeding": 0.20, "Seatbelt": 0.12, "Signal": 0.15, "Other": 0.25, "DUI": 0.60}
+ARREST_RATE = {"Speeding": 0.04, "Seatbelt": 0.02, "Signal": 0.03, "Other": 0.06, "DUI": 0.30}
+DRUG_RATE_SEARCHED = 0.25
+DRUG_RATE_NOT_SEARCHED = 0.02
+DRUG_ARREST_BOOST = 0.35
+TICKET_SHARE = 0.55
+SEARCH_TYPES = {"Vehicle Search": 0.7, "Frisk": 0.3}
+
+# Most vehicles are stopped once or twice; a small pool of repeat
+# offenders collects a share of all stops.
+STOPS_PER_VEHICLE = 3
+REPEAT_SHARE = 0.08
+REPEAT_POOL = 0.001
+PLATE_STATES = ("TN", "KA", "MH", "DL", "UP", "RJ", "WB", "KL")
+PLATE_COUNT = len(PLATE_STATES) * 90 * 26 * 26 * 9000
+PLATE_MIXER = 1000003
+
+_DATES = pd.date_range(START, END).date
+_TIMES = np.array([f"{minute // 60:02d}:{minute % 60:02d}:00" for minute in range(24 * 60)], dtype=object)
+
+
+def _choice(rng, weights, size):
+    values = list(weights)
+    p = np.array([weights[value] for value in values])
+    return np.array(values)[rng.choice(len(values), size, p=p / p.sum())]
+
+
+def plates(numbers):
+    # Vehicle number k always maps to the same plate, e.g. 'TN45AB1234'.
+    # Multiplying by a prime modulo the number of plates spreads
+    # neighbouring numbers across states and series without collisions.
+    numbers = np.asarray(numbers, dtype=np.int64) * PLATE_MIXER % PLATE_COUNT
+    states = np.array(PLATE_STATES)[numbers % len(PLATE_STATES)]
+    rest = numbers // len(PLATE_STATES)
+    districts = (10 + rest % 90).astype(str)
+    rest //= 90
+    first = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))[rest % 26]
+    second = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))[rest // 26 % 26]
+    serials = (1000 + rest // 676 % 9000).astype(str)
+    return np.char.add(np.char.add(np.char.add(np.char.add(states, districts), first), second), serials)
+
+
+def _chunk(rng, n, fleet):
+    violation = _choice(rng, VIOLATIONS, n)
+    searched = rng.random(n) < pd.Series(violation).map(SEARCH_RATE).to_numpy()
+    drugs = rng.random(n) < np.where(searched, DRUG_RATE_SEARCHED, DRUG_RATE_NOT_SEARCHED)
+    arrested = rng.random(n) < pd.Series(violation).map(ARREST_RATE).to_numpy() + drugs * DRUG_ARREST_BOOST
+    outcome = np.where(arrested, "Arrest", np.where(rng.random(n) < TICKET_SHARE, "Ticket", "Warning"))
+
+    # Searches and arrests keep the vehicle longer.
+    length = rng.exponential(12, n) + searched * 10 + arrested * 15
+    duration = np.array(DURATIONS)[np.digitize(length, [15, 30])]
+
+    repeat = rng.random(n) < REPEAT_SHARE
+    vehicle = np.where(repeat, rng.integers(0, max(int(fleet * REPEAT_POOL), 1), n), rng.integers(0, fleet, n))
+
+    # Formatting timestamps row by row dominates at scale, so the days and
+    # minutes are drawn as indexes into precomputed labels.
+    hours = rng.choice(24, n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    day = rng.integers(0, len(_DATES), n)
+    minute = hours * 60 + rng.integers(0, 60, n)
+
+    df = pd.DataFrame({
+        "country": _choice(rng, COUNTRIES, n),
+        "vehicle_number": plates(vehicle),
+        "stop_date": _DATES[day],
+        "stop_time": _TIMES[minute],
+        "driver_gender": _choice(rng, GENDERS, n),
+        "driver_age": np.clip(rng.normal(38, 14, n).round(), 18, 80).astype(int),
+        "driver_race": _choice(rng, RACES, n),
+        "violation": violation,
+        "search_conducted": searched,
+        "search_type": np.where(searched, _choice(rng, SEARCH_TYPES, n), "No Search"),
+        "stop_outcome": outcome,
+        "is_arrested": arrested,
+        "drugs_related_stop": drugs,
+        "stop_duration": duration,
+    })
+    for column in ("search_conducted", "is_arrested", "drugs_related_stop"):
+        df[column] = df[column].astype("Int8")
+    df["driver_age"] = df["driver_age"].astype("Int16")
+    return df[list(ledger.COLUMNS)]
+
+
+def generate(rows, seed=0, chunksize=100000, start=0, vehicles=None):
+    # Yields DataFrames for rows start..rows. Each chunk has its own random
+    # stream keyed by its offset, so a dataset grown in steps (with start a
+    # multiple of chunksize and a fixed number of vehicles) matches one
+    # generated at once.
+    fleet = vehicles or max(rows // STOPS_PER_VEHICLE, 1)
+    for offset in range(start, rows, chunksize):
+        rng = np.random.default_rng([seed, offset])
+        yield _chunk(rng, min(chunksize, rows - offset), fleet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic traffic stops to a CSV file that ingest.py can load.")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=100000, help="number of stops (default 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for number, df in enumerate(generate(args.rows, args.seed)):
+        df.to_csv(args.path, mode="w" if number == 0 else "a", header=number == 0, index=False)
+    print(f"✅ {args.rows} stops written to {args.path} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import re
+
+# The queries in this repo are written for MySQL. The embedded backends get
+# them rewritten here, statement by statement, so reports, paging and the
+# write path keep a single copy of their SQL.
+
+_DATE_PARTS = {"YEAR": "%Y", "MONTH": "%m", "HOUR": "%H"}
+_DATE_PART_CALL = re.compile(r"\b(YEAR|MONTH|HOUR)\(([^()]*)\)", re.IGNORECASE)
+_UPSERT = re.compile(r"\bON DUPLICATE KEY UPDATE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+
+def _sqlite_date_part(match):
+    part = _DATE_PARTS[match.group(1).upper()]
+    return f"CAST(strftime('{part}', {match.group(2)}) AS INTEGER)"
+
+
+def _sqlite_upsert(match):
+    return "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", match.group(1))
+
+
+def to_sqlite(sql):
+    sql = sql.replace("%s", "?")
+    sql = _DATE_PART_CALL.sub(_sqlite_date_part, sql)
+    sql = sql.replace("<=>", "IS")
+    return _UPSERT.sub(_sqlite_upsert, sql)
+
+
+def to_duckdb(sql):
+    # DuckDB has YEAR(), MONTH() and HOUR(); only the placeholders differ.
+    return sql.replace("%s", "?")
+
+
+TRANSLATORS = {
+    "sqlite": to_sqlite,
+    "duckdb": to_duckdb,
+}
+
+
+def translate(sql, dialect):
+    translator = TRANSLATORS.get(dialect)
+    return translator(sql) if translator else sql
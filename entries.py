@@ -0,0 +1,143 @@
+import datetime
+
+import pandas as pd
+
+import ledger
+import telemetry
+
+# Batch entry from check-post terminals: the dashboard's batch tab and
+# entry_api.py both validate a list of stops here, predict the missing
+# outcomes in bulk and insert the whole batch in one transaction.
+MAX_BATCH = 5000
+CHOICES = {
+    "country": ("Canada", "India", "USA"),
+    "driver_gender": ("Male", "Female"),
+    "driver_race": ("Asian", "White", "Black", "Hispanic", "Other"),
+    "violation": ("Speeding", "Other", "DUI", "Seatbelt", "Signal"),
+    "search_type": ("Vehicle Search", "No Search", "Frisk", "Unknown"),
+    "stop_outcome": ("Warning", "Ticket", "Arrest"),
+    "stop_duration": ("0-15 Min", "16-30 Min", "30+ Min"),
+}
+FLAGS = ("search_conducted", "drugs_related_stop")
+MIN_AGE, MAX_AGE = 18, 100
+REQUIRED = ("vehicle_number", "country", "stop_date", "stop_time", "driver_gender", "driver_age",
+            "driver_race", "violation", "search_conducted", "search_type", "drugs_related_stop", "stop_duration")
+TRUE_TEXT = {"1", "true", "yes", "y"}
+FALSE_TEXT = {"0", "false", "no", "n"}
+
+
+class BatchRejected(ValueError):
+    # Raised with one message per problem; nothing is inserted.
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and pd.isna(value)) or (isinstance(value, str) and not value.strip())
+
+
+def _date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip())
+
+
+def _time(value):
+    if isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S")
+    text = str(value).strip()
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            return datetime.datetime.strptime(text, fmt).strftime("%H:%M:%S")
+        except ValueError:
+            pass
+    raise ValueError(f"not a time: {text!r}")
+
+
+def _flag(value):
+    text = str(value).strip().lower()
+    if text in TRUE_TEXT:
+        return 1
+    if text in FALSE_TEXT:
+        return 0
+    raise ValueError(f"not a yes/no value: {value!r}")
+
+
+def validate(record):
+    # A stop ready for ledger.insert_stops, with stop_outcome left None when
+    # the record has none; raises ValueError naming the first bad field.
+    for column in REQUIRED:
+        if _missing(record.get(column)):
+            raise ValueError(f"{column} is required")
+    stop = {
+        "vehicle_number": ledger.normalize_plate(record["vehicle_number"]),
+        "stop_date": _date(record["stop_date"]),
+        "stop_time": _time(record["stop_time"]),
+    }
+    age = float(record["driver_age"])
+    if not age.is_integer() or not MIN_AGE <= age <= MAX_AGE:
+        raise ValueError(f"driver_age must be a whole number from {MIN_AGE} to {MAX_AGE}")
+    stop["driver_age"] = int(age)
+    for column in FLAGS:
+        stop[column] = _flag(record[column])
+    for column, allowed in CHOICES.items():
+        value = record.get(column)
+        if _missing(value):
+            stop[column] = None
+            continue
+        value = str(value).strip()
+        if value not in allowed:
+            raise ValueError(f"{column} must be one of {', '.join(allowed)}")
+        stop[column] = value
+    return stop
+
+
+def prepare(records):
+    # Valid stops and a list of "row N: problem" messages.
+    stops, errors = [], []
+    seen = set()
+    for number, record in enumerate(records, start=1):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("expected an object with one field per column")
+            stop = validate(record)
+        except (TypeError, ValueError) as err:
+            errors.append(f"row {number}: {err}")
+            continue
+        key = tuple(stop[column] for column in ledger.NATURAL_KEY)
+        if key in seen:
+            errors.append(f"row {number}: the same vehicle, date and time appear earlier in the batch")
+            continue
+        seen.add(key)
+        stops.append(stop)
+    return stops, errors
+
+
+def predict(model, stops):
+    # Fills in stop_outcome where it is missing; is_arrested always
+    # follows the outcome, as in the single-entry form.
+    unknown = [stop for stop in stops if stop["stop_outcome"] is None]
+    for stop, outcome in zip(unknown, model.predict_many(unknown)):
+        stop["stop_outcome"] = outcome
+    for stop in stops:
+        stop["is_arrested"] = 1 if stop["stop_outcome"] == "Arrest" else 0
+    return stops
+
+
+def submit(db, model, records):
+    # Returns the new ids in input order, or raises BatchRejected.
+    if not records:
+        raise BatchRejected(["the batch is empty"])
+    if len(records) > MAX_BATCH:
+        raise BatchRejected([f"at most {MAX_BATCH} stops per batch"])
+    with telemetry.span("entry.batch") as fields:
+        stops, errors = prepare(records)
+        if errors:
+            raise BatchRejected(errors)
+        predict(model, stops)
+        fields["rows"] = len(stops)
+        ids = ledger.insert_stops(db, stops)
+    return ids, stops
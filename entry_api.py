@@ -0,0 +1,178 @@
+import argparse
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import changes
+import database
+import entries
+import ledger
+import prediction
+import sync
+import telemetry
+
+# JSON ingest endpoint for check-post terminals.
+#   POST /stops   body: a list of stops, or {"stops": [...]}
+#                 201 {"ids": [...]} or 400 {"errors": [...]}
+#   POST /sync    body: a check post's batch from sync.py, gzip-encoded
+#                 200 {"seq": ..., "inserted": ..., "duplicates": ...}, or
+#                 409 {"seq": ...} when earlier changes are missing, or
+#                 400 {"errors": [...]} naming invalid stops
+#   GET  /health  200 {"status": "ok"}
+# When SECURECHECK_API_TOKEN is set, requests need
+# "Authorization: Bearer <token>".
+API_TOKEN = os.environ.get("SECURECHECK_API_TOKEN")
+MAX_BODY = 8 * 1024 * 1024
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def outcome_model():
+    # Loaded on the first batch, then brought up to date from the change
+    # feed before each one.
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = prediction.OutcomeModel.load()
+            if not changes.ENABLED:
+                ledger.on_insert(_model.observe)
+    _model.follow()
+    return _model
+
+
+class EntryHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        if not API_TOKEN:
+            return True
+        return hmac.compare_digest(self.headers.get("Authorization", ""), "Bearer " + API_TOKEN)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/health":
+            self._reply(404, {"errors": ["not found"]})
+            return
+        self._reply(200, {"status": "ok"})
+
+    def _read_body(self):
+        # The request body, or None once an error has been sent.
+        if not self._authorized():
+            self._reply(401, {"errors": ["missing or wrong API token"]})
+            return None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._reply(413, {"errors": [f"body is larger than {MAX_BODY} bytes"]})
+            return None
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/sync":
+            self._sync()
+            return
+        if path != "/stops":
+            self._reply(404, {"errors": ["not found"]})
+            return
+        data = self._read_body()
+        if data is None:
+            return
+        try:
+            body = json.loads(data or b"null")
+        except ValueError as err:
+            self._reply(400, {"errors": [f"invalid JSON: {err}"]})
+            return
+        records = body.get("stops") if isinstance(body, dict) else body
+        if not isinstance(records, list):
+            self._reply(400, {"errors": ["expected a list of stops"]})
+            return
+
+        with telemetry.span("api.stops"):
+            try:
+                model = outcome_model()
+                db = database.connect()
+                try:
+                    ids, stops = entries.submit(db, model, records)
+                finally:
+                    db.close()
+            except entries.BatchRejected as err:
+                self._reply(400, {"errors": err.errors})
+                return
+            except database.DATA_ERRORS as err:
+                self._reply(400, {"errors": [f"rejected by the database: {err}"]})
+                return
+            except database.CONNECTION_ERRORS as err:
+                self._reply(503, {"errors": [f"database unavailable: {err}"]})
+                return
+        self._reply(201, {"ids": ids, "outcomes": [stop["stop_outcome"] for stop in stops]})
+
+    def _sync(self):
+        data = self._read_body()
+        if data is None:
+            return
+        try:
+            batch = sync.decode(data, self.headers.get("Content-Encoding") == "gzip")
+        except ValueError as err:
+            self._reply(400, {"errors": [f"invalid batch: {err}"]})
+            return
+        with telemetry.span("api.sync"):
+            try:
+                db = database.connect()
+                try:
+                    seq, inserted, duplicates = sync.receive(db, batch)
+                finally:
+                    db.close()
+            except sync.OutOfOrder as err:
+                self._reply(409, {"errors": [str(err)], "seq": err.seq})
+                return
+            except entries.BatchRejected as err:
+                self._reply(400, {"errors": err.errors})
+                return
+            except (TypeError, ValueError) as err:
+                self._reply(400, {"errors": [f"invalid batch: {err}"]})
+                return
+            except database.DATA_ERRORS as err:
+                self._reply(400, {"errors": [f"rejected by the database: {err}"]})
+                return
+            except database.CONNECTION_ERRORS as err:
+                self._reply(503, {"errors": [f"database unavailable: {err}"]})
+                return
+        self._reply(200, {"seq": seq, "inserted": inserted, "duplicates": duplicates})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="0.0.0.0", port=8502):
+    server = ThreadingHTTPServer((host, port), EntryHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accept batches of new stops from check-post terminals as JSON over HTTP.")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on (default 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=8502, help="port to listen on (default 8502)")
+    args = parser.parse_args()
+
+    telemetry.start()
+    server = serve(args.host, args.port)
+    print(f"✅ Accepting stops on http://{args.host}:{args.port}/stops")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import gzip
+import io
+import tempfile
+
+import pandas as pd
+
+import database
+import records
+import telemetry
+
+# Data Records downloads. Rows are streamed from the database in chunks
+# and written straight to a temporary file, so memory use depends on the
+# chunk size rather than on how many rows match the filters.
+CHUNKSIZE = 20000
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+FLAG_COLUMNS = ("search_conducted", "is_arrested", "drugs_related_stop")
+
+
+def stream_rows(sql, params=None, chunksize=CHUNKSIZE):
+    # Yields DataFrames of at most chunksize rows from one unbuffered
+    # cursor; MySQL sends rows as they are read instead of all at once.
+    db = database.connect()
+    finished = False
+    try:
+        if database.dialect_name() == "mysql":
+            cursor = db.cursor(buffered=False)
+        else:
+            cursor = db.cursor()
+        cursor.execute(sql, params or ())
+        columns = [desc[0] for desc in cursor.description]
+        # The first chunk is yielded even when empty, so an export with no
+        # matching stops still has its header or schema.
+        rows = cursor.fetchmany(chunksize)
+        yield pd.DataFrame(rows, columns=columns)
+        while rows:
+            rows = cursor.fetchmany(chunksize)
+            if rows:
+                yield pd.DataFrame(rows, columns=columns)
+        finished = True
+    finally:
+        if not finished:
+            # Unread rows would be left on the connection.
+            db.invalidate()
+        db.close()
+
+
+def _time_text(series):
+    # mysql.connector returns TIME as timedelta; SQLite already has text.
+    if pd.api.types.is_timedelta64_dtype(series):
+        seconds = series.dt.total_seconds()
+        return (pd.Timestamp(0) + pd.to_timedelta(seconds, unit="s")).dt.strftime("%H:%M:%S").where(series.notna())
+    return series.astype("string")
+
+
+def normalize(df):
+    # The same types in every chunk, so Parquet row groups share a schema.
+    df = df.copy()
+    if "stop_date" in df:
+        df["stop_date"] = pd.to_datetime(df["stop_date"]).dt.date
+    if "stop_time" in df:
+        df["stop_time"] = _time_text(df["stop_time"])
+    if "stop_ts" in df:
+        df["stop_ts"] = pd.to_datetime(df["stop_ts"])
+    for column in FLAG_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("Int8")
+    if "driver_age" in df:
+        df["driver_age"] = df["driver_age"].astype("Int16")
+    return df
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {
+        "id": pa.int64(),
+        "stop_date": pa.date32(),
+        "driver_age": pa.int16(),
+        "stop_ts": pa.timestamp("us"),
+        **{column: pa.int8() for column in FLAG_COLUMNS},
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in columns])
+
+
+def write_csv(chunks, handle):
+    rows = 0
+    for number, df in enumerate(chunks):
+        normalize(df).to_csv(handle, header=number == 0, index=False)
+        rows += len(df)
+    return rows
+
+
+def write_parquet(chunks, handle):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for df in chunks:
+            if writer is None:
+                schema = _arrow_schema(df.columns)
+                writer = pq.ParquetWriter(handle, schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(normalize(df), schema=schema, preserve_index=False))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_filtered(where, params, fmt="CSV", chunksize=CHUNKSIZE):
+    # A file object positioned at the start, holding every filtered stop in
+    # the Data Records order. It is deleted once closed.
+    sql, params = records.export_query(where, params)
+    chunks = stream_rows(sql, params, chunksize)
+    output = tempfile.TemporaryFile()
+    with telemetry.span("export", format=fmt) as fields:
+        if fmt == "Parquet":
+            fields["rows"] = write_parquet(chunks, output)
+        elif fmt == "CSV (gzip)":
+            with gzip.GzipFile(fileobj=output, mode="wb") as compressed:
+                with io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+                    fields["rows"] = write_csv(chunks, text)
+        else:
+            text = io.TextIOWrapper(output, encoding="utf-8", newline="")
+            fields["rows"] = write_csv(chunks, text)
+            # Flushes and hands the file back without closing it.
+            text.detach()
+        fields["bytes"] = output.tell()
+    output.seek(0)
+    return output
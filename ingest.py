@@ -0,0 +1,318 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import mysql.connector
+import pandas as pd
+
+import changes
+import database
+import ledger
+import profiles
+import rollups
+
+STAGE_TABLE = "police_stops_stage"
+MANIFEST = ".ingest_manifest.json"
+# Deadlock, lock wait timeout, and a stop another writer loaded first
+# (the replay skips it as already in the ledger).
+RETRYABLE_ERRORS = (1213, 1205, 1062)
+
+STAGE_DDL = f"""CREATE TEMPORARY TABLE IF NOT EXISTS {STAGE_TABLE} (
+    country VARCHAR(50),
+    vehicle_number VARCHAR(20),
+    stop_date DATE,
+    stop_time TIME,
+    driver_gender VARCHAR(10),
+    driver_age SMALLINT,
+    driver_race VARCHAR(20),
+    violation VARCHAR(50),
+    search_conducted TINYINT(1),
+    search_type VARCHAR(50),
+    stop_outcome VARCHAR(50),
+    is_arrested TINYINT(1),
+    drugs_related_stop TINYINT(1),
+    stop_duration VARCHAR(20)
+)"""
+
+COLUMN_LIST = ", ".join(ledger.COLUMNS)
+FLAG_COLUMNS = ("search_conducted", "is_arrested", "drugs_related_stop")
+
+
+def clean_chunk(df):
+    # Same steps as police.ipynb, applied one chunk at a time.
+    df = df.drop(columns=["driver_age_raw", "violation_raw"], errors="ignore")
+    df.columns = df.columns.str.strip()
+    df["stop_date"] = pd.to_datetime(df["stop_date"], format="%Y-%m-%d", errors="coerce").dt.date
+    # The CSVs write '0:05:00'; zero-padded text is what the embedded
+    # backend stores, and it sorts the same way as MySQL TIME values.
+    df["stop_time"] = pd.to_datetime(df["stop_time"], format="%H:%M:%S", errors="coerce").dt.strftime("%H:%M:%S")
+    df["driver_gender"] = df["driver_gender"].replace({"M": "Male", "F": "Female"})
+    # A chunk where search_type is entirely empty is read as float64.
+    df["search_type"] = df["search_type"].astype(object)
+    df.loc[df["search_conducted"] == False, "search_type"] = "No Search"
+    df = df.fillna({"search_type": "Unknown"})
+    df = df.rename(columns={"country_name": "country"})
+    # Stored the way ledger.normalize_plate writes them.
+    df["vehicle_number"] = df["vehicle_number"].astype("string").str.replace(r"\s+", "", regex=True).str.upper()
+    df = df[list(ledger.COLUMNS)]
+
+    for column in FLAG_COLUMNS:
+        df[column] = df[column].astype("boolean").astype("Int8")
+    df["driver_age"] = pd.to_numeric(df["driver_age"], errors="coerce").astype("Int16")
+    return df.drop_duplicates(subset=list(ledger.NATURAL_KEY))
+
+
+def rows_of(df):
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _stage_rows(cursor, df, method):
+    if method == "load-data":
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as handle:
+            df.to_csv(handle, header=False, index=False, na_rep="\\N")
+        try:
+            cursor.execute(f"""LOAD DATA LOCAL INFILE %s INTO TABLE {STAGE_TABLE}
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '\\n'
+                ({COLUMN_LIST})""", (handle.name,))
+        finally:
+            os.unlink(handle.name)
+    else:
+        # mysql.connector rewrites executemany INSERTs into one multi-row
+        # INSERT per call.
+        placeholders = ", ".join(["%s"] * len(ledger.COLUMNS))
+        cursor.executemany(f"INSERT INTO {STAGE_TABLE} ({COLUMN_LIST}) VALUES ({placeholders})", rows_of(df))
+
+
+def load_chunk(db, df, method="insert"):
+    # The chunk's rollup and profile increments are only kept together
+    # with its stops: a failure part way rolls all of them back.
+    cursor = db.cursor()
+    try:
+        cursor.execute(STAGE_DDL)
+        cursor.execute(f"DELETE FROM {STAGE_TABLE}")
+        _stage_rows(cursor, df, method)
+
+        # Stops already in the ledger are dropped from the stage, so re-running
+        # a file only appends what is missing.
+        match = " AND ".join(f"p.{column} <=> {STAGE_TABLE}.{column}" for column in ledger.NATURAL_KEY)
+        cursor.execute(f"DELETE FROM {STAGE_TABLE} WHERE EXISTS (SELECT 1 FROM police_stops p WHERE {match})")
+
+        rollups.record_insert_from(cursor, STAGE_TABLE)
+        profiles.record_insert_from(cursor, STAGE_TABLE)
+        cursor.execute(f"INSERT INTO police_stops ({COLUMN_LIST}) SELECT {COLUMN_LIST} FROM {STAGE_TABLE}")
+        inserted = cursor.rowcount
+        if inserted:
+            changes.record_reload(cursor)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return inserted
+
+
+def load_chunk_with_retry(db, df, method="insert", attempts=3):
+    # Parallel writers upsert the same rollup rows, so InnoDB may pick one
+    # of them as a deadlock victim; the chunk is simply replayed.
+    for attempt in range(1, attempts + 1):
+        try:
+            return load_chunk(db, df, method)
+        except mysql.connector.errors.DatabaseError as err:
+            if err.errno not in RETRYABLE_ERRORS or attempt == attempts:
+                raise
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, "*.csv"))))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return [os.path.abspath(path) for path in dict.fromkeys(paths)]
+
+
+class Manifest:
+    # Per-file progress, saved after every committed chunk. A file whose
+    # size or mtime changed since it was recorded starts over.
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = {}
+        if os.path.exists(path):
+            with open(path) as handle:
+                self._files = json.load(handle)
+
+    def _entry(self, path):
+        stat = os.stat(path)
+        entry = self._files.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime, "chunks": None, "loaded": [], "read": 0, "inserted": 0}
+            self._files[path] = entry
+        return entry
+
+    def is_done(self, path):
+        with self._lock:
+            entry = self._entry(path)
+            return entry["chunks"] is not None and len(entry["loaded"]) == entry["chunks"]
+
+    def loaded_chunks(self, path):
+        with self._lock:
+            return set(self._entry(path)["loaded"])
+
+    def chunk_loaded(self, path, number, read, inserted):
+        with self._lock:
+            entry = self._entry(path)
+            entry["loaded"].append(number)
+            entry["read"] += read
+            entry["inserted"] += inserted
+            self._save()
+            return entry["chunks"] is not None and len(entry["loaded"]) == entry["chunks"]
+
+    def file_read(self, path, chunks):
+        with self._lock:
+            entry = self._entry(path)
+            entry["chunks"] = chunks
+            self._save()
+            return len(entry["loaded"]) == chunks
+
+    def totals(self, path):
+        with self._lock:
+            entry = self._entry(path)
+            return entry["read"], entry["inserted"]
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as handle:
+            json.dump(self._files, handle, indent=1)
+        os.replace(tmp, self.path)
+
+
+_queue = None
+
+
+def _init_cleaner(queue):
+    global _queue
+    _queue = queue
+
+
+def _clean_file(path, chunksize, skip):
+    # Runs in a pool process. Cleaned chunks go onto the shared bounded
+    # queue, so a slow database holds back the readers too.
+    chunks = 0
+    for number, chunk in enumerate(pd.read_csv(path, chunksize=chunksize), start=1):
+        chunks = number
+        if number not in skip:
+            _queue.put(("chunk", path, number, len(chunk), clean_chunk(chunk)))
+    _queue.put(("end", path, chunks))
+
+
+def _write_chunks(queue, manifest, method, errors):
+    try:
+        db = database.connect_direct(allow_local_infile=method == "load-data")
+    except (mysql.connector.Error,) + database.CONNECTION_ERRORS as err:
+        # Keep draining the queue so the cleaners never block on it.
+        db = None
+        errors.append((None, err))
+        print(f"❌ DB Connection Error: {err}")
+    try:
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            if db is None:
+                continue
+            path, number = item[1], item[2]
+            try:
+                if item[0] == "end":
+                    done = manifest.file_read(path, chunks=number)
+                else:
+                    read, df = item[3], item[4]
+                    started = time.perf_counter()
+                    inserted = load_chunk_with_retry(db, df, method)
+                    elapsed = time.perf_counter() - started
+                    print(f"   {os.path.basename(path)} chunk {number}: {read} rows read, {inserted} inserted, {read / elapsed:,.0f} rows/s")
+                    done = manifest.chunk_loaded(path, number, read, inserted)
+                if done:
+                    file_read, file_inserted = manifest.totals(path)
+                    print(f"✅ {path}: {file_read} rows read, {file_inserted} inserted")
+            except Exception as err:
+                errors.append((path, err))
+                print(f"❌ {path}: {err}")
+    finally:
+        if db is not None:
+            db.close()
+
+
+def ingest_paths(paths, chunksize=50000, method="insert", jobs=1, writers=1, manifest_path=MANIFEST):
+    if database.dialect_name() == "sqlite":
+        # SQLite allows one writer at a time; a second one only waits on
+        # the database lock.
+        writers = 1
+    manifest = Manifest(manifest_path)
+    pending = [path for path in paths if not manifest.is_done(path)]
+    for path in paths:
+        if path not in pending:
+            print(f"⏭️ {path}: already ingested")
+    read_before = sum(manifest.totals(path)[0] for path in pending)
+
+    queue = multiprocessing.Queue(maxsize=writers * 2)
+    errors = []
+    threads = [threading.Thread(target=_write_chunks, args=(queue, manifest, method, errors)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        with multiprocessing.Pool(jobs, initializer=_init_cleaner, initargs=(queue,)) as pool:
+            results = [pool.apply_async(_clean_file, (path, chunksize, manifest.loaded_chunks(path))) for path in pending]
+            for path, result in zip(pending, results):
+                try:
+                    result.get()
+                except Exception as err:
+                    errors.append((path, err))
+                    print(f"❌ {path}: {err}")
+            # Leaving the with block terminates the workers, which can drop
+            # chunks their queue feeder threads have not flushed yet.
+            pool.close()
+            pool.join()
+    finally:
+        for _ in threads:
+            queue.put(None)
+        for thread in threads:
+            thread.join()
+    read = sum(manifest.totals(path)[0] for path in pending) - read_before
+    return pending, read, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream traffic-stop CSV files into police_stops.")
+    parser.add_argument("paths", nargs="+", help="CSV files, directories of CSV files, or glob patterns")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows per chunk and per transaction (default 50000)")
+    parser.add_argument("--method", choices=["insert", "load-data"], default="insert",
+                        help="multi-row INSERT, or LOAD DATA LOCAL INFILE into the staging table")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="processes cleaning files in parallel (default: CPU count)")
+    parser.add_argument("--writers", type=int, default=2, help="database connections writing cleaned chunks (default 2)")
+    parser.add_argument("--manifest", default=MANIFEST, help=f"progress file used to resume interrupted runs (default {MANIFEST})")
+    args = parser.parse_args()
+    if args.method == "load-data" and database.dialect_name() != "mysql":
+        parser.error("--method load-data needs a MySQL database")
+
+    started = time.perf_counter()
+    pending, read, errors = ingest_paths(expand_paths(args.paths), args.chunksize, args.method, args.jobs, args.writers, args.manifest)
+    elapsed = time.perf_counter() - started
+    print(f"Total: {len(pending)} files, {read} rows read in {elapsed:.1f}s, {read / elapsed if elapsed else 0:,.0f} rows/s")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import datetime
+
+import changes
+import database
+import profiles
+import result_cache
+import rollups
+
+# Column order of police_stops, as created by police.ipynb.
+COLUMNS = (
+    "country", "vehicle_number", "stop_date", "stop_time", "driver_gender",
+    "driver_age", "driver_race", "violation", "search_conducted", "search_type",
+    "stop_outcome", "is_arrested", "drugs_related_stop", "stop_duration",
+)
+
+# A vehicle can only be stopped once at a given date and time; bulk loads
+# use this to skip stops that are already in the ledger.
+NATURAL_KEY = ("vehicle_number", "stop_date", "stop_time")
+
+INSERT_SQL = f"""INSERT INTO police_stops ({", ".join(COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(COLUMNS))})"""
+# Rows per multi-row INSERT statement in insert_stops().
+INSERT_BATCH = 500
+
+# Called after each committed insert with the new stops (as dicts), so
+# in-memory structures can follow the ledger without re-reading it.
+_insert_listeners = []
+# Called after each committed delete with the removed stops' DELETED_COLUMNS.
+_delete_listeners = []
+DELETED_COLUMNS = ("id", "vehicle_number", "is_arrested", "drugs_related_stop")
+
+
+def normalize_plate(plate):
+    # Vehicle numbers are stored without whitespace and in capitals, so a
+    # plate typed as "tn 01 ab 1234" is found as TN01AB1234.
+    return None if plate is None else "".join(str(plate).split()).upper()
+
+
+def normalize_stored_plates(db):
+    # Migration 6: rewrites vehicle numbers stored before they were
+    # normalized, recounts the vehicle profiles kept under the old
+    # spellings and makes change feed readers reload.
+    cursor = db.cursor()
+    cursor.execute("SELECT DISTINCT vehicle_number FROM police_stops WHERE vehicle_number IS NOT NULL")
+    renamed = [(normalize_plate(plate), plate) for (plate,) in cursor.fetchall() if normalize_plate(plate) != plate]
+    if renamed:
+        cursor.executemany("UPDATE police_stops SET vehicle_number = %s WHERE vehicle_number = %s", renamed)
+        profiles.rebuild(db)
+        changes.record_reload(cursor)
+    return len(renamed)
+
+
+def on_insert(callback):
+    _insert_listeners.append(callback)
+
+
+def on_delete(callback):
+    _delete_listeners.append(callback)
+
+
+def _batch_sql(count):
+    values = "(" + ", ".join(["%s"] * len(COLUMNS)) + ")"
+    return f"""INSERT INTO police_stops ({", ".join(COLUMNS)})
+    VALUES {", ".join([values] * count)}"""
+
+
+def _time_text(value):
+    # MySQL returns TIME as a timedelta, SQLite as text.
+    if value is None:
+        return None
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return datetime.datetime.strptime(str(value), "%H:%M:%S").strftime("%H:%M:%S")
+
+
+def natural_key(vehicle_number, stop_date, stop_time):
+    # NATURAL_KEY values compared the same way whether they were read
+    # back from either backend or are about to be written.
+    return vehicle_number, str(stop_date)[:10], _time_text(stop_time)
+
+
+def _inserted_ids(cursor, rows):
+    # SQLite numbers a multi-row INSERT consecutively and reports the
+    # last id. MySQL reports the first, but the others need not follow it
+    # (innodb_autoinc_lock_mode=2 next to a bulk load, or
+    # auto_increment_increment > 1), so they are read back: from the
+    # first id up, in row order, matched by NATURAL_KEY.
+    if database.dialect_name() != "mysql":
+        return list(range(cursor.lastrowid - len(rows) + 1, cursor.lastrowid + 1))
+    cursor.execute(f"SELECT id, {', '.join(NATURAL_KEY)} FROM police_stops WHERE id >= %s ORDER BY id", (cursor.lastrowid,))
+    key_at = [COLUMNS.index(column) for column in NATURAL_KEY]
+    wanted = [natural_key(*[row[i] for i in key_at]) for row in rows]
+    ids = []
+    for stop_id, *key in cursor.fetchall():
+        if len(ids) < len(wanted) and natural_key(*key) == wanted[len(ids)]:
+            ids.append(stop_id)
+    if len(ids) != len(rows):
+        raise RuntimeError(f"read back {len(ids)} of {len(rows)} new stop ids")
+    return ids
+
+
+def insert_stops(db, stops):
+    # All stops are written in one transaction, INSERT_BATCH rows per
+    # statement. Returns the new ids in the order of `stops`.
+    stops = [dict(stop, vehicle_number=normalize_plate(stop["vehicle_number"])) for stop in stops]
+    ids = []
+    cursor = db.cursor()
+    try:
+        for start in range(0, len(stops), INSERT_BATCH):
+            rows = [[stop[column] for column in COLUMNS] for stop in stops[start:start + INSERT_BATCH]]
+            cursor.execute(_batch_sql(len(rows)), [value for row in rows for value in row])
+            ids += _inserted_ids(cursor, rows)
+            rollups.record_insert(cursor, COLUMNS, rows)
+            profiles.record_insert(cursor, COLUMNS, rows)
+        # Last, so the change counter is held only until the commit.
+        changes.record_insert(cursor, COLUMNS, [[stop[column] for column in COLUMNS] for stop in stops], ids)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    result_cache.bump_version()
+    for callback in _insert_listeners:
+        callback(stops)
+    return ids
+
+
+def insert_stop(db, stop):
+    return insert_stops(db, [stop])[0]
+
+
+def delete_stops(db, where, params, bulk=False):
+    # With bulk, as for a retention archive run, change feed readers get
+    # one reload marker instead of a delete change per stop.
+    cursor = db.cursor()
+    removed = []
+    try:
+        if _delete_listeners:
+            # Read inside the transaction, so listeners see exactly the rows
+            # the DELETE removes; MySQL needs the lock for that.
+            lock = " FOR UPDATE" if database.dialect_name() == "mysql" else ""
+            cursor.execute(f"SELECT {', '.join(DELETED_COLUMNS)} FROM police_stops WHERE {where}{lock}", params)
+            removed = [dict(zip(DELETED_COLUMNS, row)) for row in cursor.fetchall()]
+        rollups.record_delete(cursor, where, params)
+        profiles.record_delete(cursor, where, params)
+        if not bulk:
+            changes.record_delete(cursor, where, params)
+        cursor.execute(f"DELETE FROM police_stops WHERE {where}", params)
+        deleted = cursor.rowcount
+        if bulk and deleted:
+            changes.record_reload(cursor)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    result_cache.bump_version()
+    for callback in _delete_listeners:
+        callback(removed)
+    return deleted
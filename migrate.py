@@ -0,0 +1,374 @@
+import argparse
+import datetime
+import sys
+
+from sqlalchemy import inspect
+
+import database
+import changes
+import ledger
+import profiles
+import records
+import retention
+import rollups
+import sync
+
+# Value sets for the columns that migration 1 turns into ENUMs. These are
+# the same choices the dashboard's entry form offers.
+ENUM_COLUMNS = {
+    "country": ("Canada", "India", "USA"),
+    "driver_gender": ("Male", "Female"),
+    "driver_race": ("Asian", "White", "Black", "Hispanic", "Other"),
+    "violation": ("Speeding", "Other", "DUI", "Seatbelt", "Signal"),
+    "stop_outcome": ("Warning", "Ticket", "Arrest"),
+    "stop_duration": ("0-15 Min", "16-30 Min", "30+ Min"),
+}
+
+
+def _enum(column):
+    return "ENUM(" + ", ".join(f"'{value}'" for value in ENUM_COLUMNS[column]) + ")"
+
+
+def check_enum_values(cursor):
+    problems = []
+    for column, values in ENUM_COLUMNS.items():
+        placeholders = ", ".join(["%s"] * len(values))
+        cursor.execute(f"SELECT DISTINCT {column} FROM police_stops WHERE {column} IS NOT NULL AND {column} NOT IN ({placeholders})", values)
+        unexpected = [row[0] for row in cursor.fetchall()]
+        if unexpected:
+            problems.append(f"{column} has values outside {values}: {unexpected}")
+    return problems
+
+
+def _checked(column):
+    # SQLite has no ENUM; a CHECK constraint keeps the same value set.
+    values = ", ".join(f"'{value}'" for value in ENUM_COLUMNS[column])
+    return f"TEXT CHECK ({column} IN ({values}))"
+
+
+def check_stop_keys(cursor):
+    # Migration 7 makes NATURAL_KEY unique, so stops entered twice before
+    # must be cleaned up first.
+    key = ", ".join(ledger.NATURAL_KEY)
+    cursor.execute(f"""SELECT {key}, COUNT(*) FROM police_stops
+        WHERE {" AND ".join(f"{column} IS NOT NULL" for column in ledger.NATURAL_KEY)}
+        GROUP BY {key} HAVING COUNT(*) > 1""")
+    repeated = cursor.fetchall()
+    if not repeated:
+        return []
+    examples = ", ".join(f"{plate} at {stop_date} {stop_time} ({copies}x)" for plate, stop_date, stop_time, copies in repeated[:5])
+    return [f"{len(repeated)} vehicle, date and time combinations are stored more than once, e.g. {examples}; "
+            "delete the extra copies and run the migration again"]
+
+
+def _rollup_statements(cursor):
+    return rollups.table_statements() + profiles.table_statements()
+
+
+STOP_INDEXES = [
+    # Newest-first listings and Data Records keyset paging. InnoDB
+    # appends the primary key, so this is (stop_date, stop_time, id).
+    "CREATE INDEX idx_stop_when ON police_stops (stop_date, stop_time)",
+    # Delete by vehicle + time, and the read-back after an insert;
+    # migration 7 replaces it with uq_vehicle_stop.
+    "CREATE INDEX idx_vehicle_stop ON police_stops (vehicle_number, stop_time, stop_date)",
+    # Outcome prediction lookup, covered by the index.
+    "CREATE INDEX idx_violation_drugs ON police_stops (violation, drugs_related_stop, stop_outcome)",
+    # The two vehicle reports that are not served from the rollups.
+    "CREATE INDEX idx_drugs_vehicle ON police_stops (drugs_related_stop, vehicle_number)",
+    "CREATE INDEX idx_search_vehicle ON police_stops (search_conducted, vehicle_number)",
+    "CREATE INDEX idx_stop_ts ON police_stops (stop_ts)",
+]
+
+MIGRATIONS = [
+    {
+        "version": 1,
+        "description": "surrogate id, combined stop timestamp, compact types and access-path indexes",
+        "check": check_enum_values,
+        # A database without police_stops (the embedded backend, or a
+        # server set up without police.ipynb) gets the table in its
+        # migrated shape instead.
+        "create": {
+            "mysql": [
+                f"""CREATE TABLE police_stops (
+                    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                    country {_enum("country")},
+                    vehicle_number VARCHAR(20),
+                    stop_date DATE,
+                    stop_time TIME,
+                    driver_gender {_enum("driver_gender")},
+                    driver_age TINYINT UNSIGNED,
+                    driver_race {_enum("driver_race")},
+                    violation {_enum("violation")},
+                    search_conducted TINYINT(1),
+                    search_type VARCHAR(50),
+                    stop_outcome {_enum("stop_outcome")},
+                    is_arrested TINYINT(1),
+                    drugs_related_stop TINYINT(1),
+                    stop_duration {_enum("stop_duration")},
+                    stop_ts DATETIME GENERATED ALWAYS AS (TIMESTAMP(stop_date, stop_time)) STORED
+                )""",
+                *STOP_INDEXES,
+            ],
+            "sqlite": [
+                f"""CREATE TABLE police_stops (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    country {_checked("country")},
+                    vehicle_number VARCHAR(20),
+                    stop_date DATE,
+                    stop_time TIME,
+                    driver_gender {_checked("driver_gender")},
+                    driver_age SMALLINT CHECK (driver_age BETWEEN 0 AND 255),
+                    driver_race {_checked("driver_race")},
+                    violation {_checked("violation")},
+                    search_conducted TINYINT(1),
+                    search_type VARCHAR(50),
+                    stop_outcome {_checked("stop_outcome")},
+                    is_arrested TINYINT(1),
+                    drugs_related_stop TINYINT(1),
+                    stop_duration {_checked("stop_duration")},
+                    stop_ts DATETIME GENERATED ALWAYS AS (stop_date || ' ' || stop_time) STORED
+                )""",
+                *STOP_INDEXES,
+            ],
+        },
+        "statements": [
+            f"""ALTER TABLE police_stops
+                ADD COLUMN id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST,
+                MODIFY country {_enum("country")},
+                MODIFY vehicle_number VARCHAR(20),
+                MODIFY stop_date DATE,
+                MODIFY stop_time TIME,
+                MODIFY driver_gender {_enum("driver_gender")},
+                MODIFY driver_age TINYINT UNSIGNED,
+                MODIFY driver_race {_enum("driver_race")},
+                MODIFY violation {_enum("violation")},
+                MODIFY search_conducted TINYINT(1),
+                MODIFY search_type VARCHAR(50),
+                MODIFY stop_outcome {_enum("stop_outcome")},
+                MODIFY is_arrested TINYINT(1),
+                MODIFY drugs_related_stop TINYINT(1),
+                MODIFY stop_duration {_enum("stop_duration")},
+                ADD COLUMN stop_ts DATETIME GENERATED ALWAYS AS (TIMESTAMP(stop_date, stop_time)) STORED""",
+            *STOP_INDEXES,
+        ],
+    },
+    {
+        "version": 2,
+        "description": "range partitions on stop_date by year",
+        "check": retention.check_stop_dates,
+        # SQLite has no partitioning; its stops are kept small by the
+        # retention job alone.
+        "statements": {"mysql": retention.partition_statements},
+    },
+    {
+        "version": 3,
+        "description": "stop_changes outbox for the live change feed",
+        "statements": {
+            "mysql": changes.table_statements("BIGINT UNSIGNED NOT NULL PRIMARY KEY"),
+            "sqlite": changes.table_statements("INTEGER NOT NULL PRIMARY KEY"),
+        },
+    },
+    {
+        "version": 4,
+        "description": "sync progress of check posts and the central ledger",
+        "statements": {"mysql": sync.TABLE_STATEMENTS, "sqlite": sync.TABLE_STATEMENTS},
+    },
+    {
+        "version": 5,
+        "description": "report rollups and vehicle profiles, filled from police_stops",
+        "statements": {
+            "mysql": _rollup_statements,
+            "sqlite": _rollup_statements,
+        },
+        # Every insert writes to these tables, so they must be complete
+        # before the first one.
+        "backfill": rollups.fill,
+    },
+    {
+        "version": 6,
+        "description": "vehicle numbers stored without whitespace, in capitals",
+        "statements": {"mysql": [], "sqlite": []},
+        "backfill": ledger.normalize_stored_plates,
+    },
+    {
+        "version": 7,
+        "description": "one stop per vehicle, date and time",
+        "check": check_stop_keys,
+        # Same columns and order as idx_vehicle_stop, so it takes over its
+        # lookups. Concurrent syncs and loads of the same stop cannot both
+        # insert it.
+        "statements": {
+            "mysql": [
+                "CREATE UNIQUE INDEX uq_vehicle_stop ON police_stops (vehicle_number, stop_time, stop_date)",
+                "DROP INDEX idx_vehicle_stop ON police_stops",
+            ],
+            "sqlite": [
+                "CREATE UNIQUE INDEX uq_vehicle_stop ON police_stops (vehicle_number, stop_time, stop_date)",
+                "DROP INDEX idx_vehicle_stop",
+            ],
+        },
+    },
+]
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at DATETIME NOT NULL
+    )""")
+
+
+def applied_versions(cursor):
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(target=None):
+    db = database.connect()
+    try:
+        cursor = db.cursor()
+        done = applied_versions(cursor)
+        fresh = not inspect(database.get_engine()).has_table("police_stops")
+        for migration in MIGRATIONS:
+            version = migration["version"]
+            skipped = False
+            if version in done or (target is not None and version > target):
+                continue
+            if fresh and "create" in migration:
+                statements = migration["create"][database.dialect_name()]
+                problems = []
+                fresh = False
+            elif isinstance(migration["statements"], dict) and database.dialect_name() not in migration["statements"]:
+                # Recorded as applied, so a later move to MySQL is not
+                # mistaken for a pending migration on this database.
+                skipped = True
+                statements = []
+                problems = []
+            elif database.dialect_name() != "mysql" and not isinstance(migration["statements"], dict):
+                print(f"❌ Migration {version} not applied: it alters an existing MySQL table")
+                return False
+            else:
+                problems = migration["check"](cursor) if migration.get("check") else []
+                statements = migration["statements"]
+                if isinstance(statements, dict):
+                    statements = statements[database.dialect_name()]
+                if callable(statements) and not problems:
+                    statements = statements(cursor)
+            if problems:
+                print(f"❌ Migration {version} not applied:")
+                for problem in problems:
+                    print(f"   {problem}")
+                return False
+            if not skipped:
+                print(f"⏳ Applying migration {version}: {migration['description']}")
+            # MySQL commits DDL implicitly, so each migration is recorded
+            # only after all of its statements have gone through.
+            for statement in statements:
+                cursor.execute(statement)
+            if migration.get("backfill") and not skipped:
+                migration["backfill"](db)
+            cursor.execute("INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                           (version, migration["description"], datetime.datetime.now()))
+            db.commit()
+            if skipped:
+                print(f"⏭️ Migration {version} does not apply to {database.dialect_name()}")
+            else:
+                print(f"✅ Migration {version} applied")
+        return True
+    finally:
+        db.close()
+
+
+def status():
+    db = database.connect()
+    try:
+        done = applied_versions(db.cursor())
+    finally:
+        db.close()
+    for migration in MIGRATIONS:
+        mark = "✅" if migration["version"] in done else "⏳"
+        print(f"{mark} {migration['version']}: {migration['description']}")
+
+
+def access_paths():
+    where, params = records.build_filters(datetime.date(2020, 1, 1), datetime.date(2030, 12, 30), "All", ["India", "USA", "Canada"], "All", False)
+    key = (datetime.date(2025, 1, 1), datetime.timedelta(hours=12), 1)
+    today = datetime.date.today()
+    recent, recent_params = records.build_filters(today - datetime.timedelta(days=30), today, "All", ["India", "USA", "Canada"], "All", False)
+    return [
+        ("Data Records first page", *records.page_query(where, params)),
+        ("Data Records, last 30 days", *records.page_query(recent, recent_params)),
+        ("Data Records next page", *records.page_query(where, params, key)),
+        ("Recently added records", "SELECT * FROM police_stops ORDER BY stop_date DESC,stop_time DESC LIMIT 10", []),
+        ("Delete selected entry", "SELECT * FROM police_stops WHERE vehicle_number = %s and stop_time = %s", ["TN01AB1234", "12:00:00"]),
+        ("Read back new entry", "SELECT * FROM police_stops WHERE vehicle_number = %s AND stop_date = %s AND stop_time = %s",
+         ["TN01AB1234", datetime.date(2025, 1, 1), "12:00:00"]),
+        ("Outcome prediction", """SELECT stop_outcome, COUNT(*) AS count FROM police_stops
+            WHERE violation = %s AND drugs_related_stop = %s GROUP BY stop_outcome ORDER BY count DESC LIMIT 1""", ["Speeding", 1]),
+        ("Top vehicles in drug-related stops", """SELECT vehicle_number, COUNT(*) as stops FROM police_stops
+            WHERE drugs_related_stop = TRUE GROUP BY vehicle_number ORDER BY stops DESC LIMIT 10""", []),
+        ("Most frequently searched vehicles", """SELECT vehicle_number, COUNT(*) as searches FROM police_stops
+            WHERE search_conducted = TRUE GROUP BY vehicle_number ORDER BY searches DESC LIMIT 10""", []),
+    ]
+
+
+def indexes_used(sql, params):
+    # The indexes a query reads police_stops through, or None if any step
+    # scans the whole table.
+    if database.dialect_name() == "sqlite":
+        details = database.fetch_data("EXPLAIN QUERY PLAN " + sql, params)["detail"]
+        details = details[details.str.contains(r"\bpolice_stops\b")]
+        if details.str.fullmatch(r"SCAN police_stops").any():
+            return None
+        return list(details.str.extract(r"INDEX (\w+)")[0].dropna())
+    plan = database.fetch_data("EXPLAIN " + sql, params)
+    plan = plan[plan["table"] == "police_stops"]
+    if (plan["key"].isna() | (plan["type"] == "ALL")).any():
+        return None
+    return list(plan["key"].astype(str))
+
+
+def partitions_read(sql, params):
+    # The partitions MySQL reads after pruning; empty when unpartitioned.
+    if database.dialect_name() != "mysql":
+        return []
+    plan = database.fetch_data("EXPLAIN " + sql, params)
+    plan = plan[plan["table"] == "police_stops"]
+    return sorted({name for names in plan["partitions"].dropna() for name in names.split(",")})
+
+
+def explain():
+    full_scans = 0
+    for name, sql, params in access_paths():
+        keys = indexes_used(sql, params)
+        if keys is not None:
+            print(f"✅ {name}: {', '.join(keys)}")
+        else:
+            full_scans += 1
+            print(f"❌ {name}: full table scan")
+        partitions = partitions_read(sql, params)
+        if partitions:
+            print(f"   📦 partitions: {', '.join(partitions)}")
+    return full_scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply and verify SecureCheck schema migrations.")
+    parser.add_argument("command", nargs="?", default="up", choices=["up", "status", "explain"],
+                        help="up: apply pending migrations; status: list them; explain: check dashboard queries use an index")
+    parser.add_argument("--to", type=int, help="stop after this migration version")
+    args = parser.parse_args()
+
+    if args.command == "up":
+        sys.exit(0 if migrate(args.to) else 1)
+    elif args.command == "status":
+        status()
+    else:
+        sys.exit(1 if explain() else 0)
+
+
+if __name__ == "__main__":
+    main()
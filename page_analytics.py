@@ -0,0 +1,105 @@
+import pandas as pd
+import streamlit as st
+
+import changes
+import charts
+import database
+import reports
+import result_cache
+import snapshot
+import telemetry
+import ui
+
+REPORT_SOURCES = ["🟢 Live Database", "🧊 Parquet Snapshot"]
+# Result rows sent to the report table; the chart is binned separately.
+MAX_TABLE_ROWS = 500
+
+
+def fetch_report(report, source=REPORT_SOURCES[0]):
+    try:
+        if source == REPORT_SOURCES[1]:
+            return result_cache.cached_fetch(snapshot.fetch_data, report["sql"], table="snapshot", version=snapshot.version())
+        return result_cache.cached_fetch(database.fetch_data, reports.report_sql(report))
+    except database.CONNECTION_ERRORS as err:
+        st.error(f"❌ DB Connection Error: {err}")
+        return pd.DataFrame()
+    except (snapshot.SnapshotUnavailable, ImportError) as err:
+        st.error(f"❌ Snapshot Error: {err}")
+        return pd.DataFrame()
+
+
+def show_report(title, report, source, results=None):
+    if results is None:
+        with telemetry.span("report", report=title, source=source):
+            results = fetch_report(report, source)
+    with telemetry.span("table.render", report=title):
+        st.dataframe(results.head(MAX_TABLE_ROWS))
+        if len(results) > MAX_TABLE_ROWS:
+            st.caption(f"First {MAX_TABLE_ROWS} of {len(results)} rows.")
+            # Built only when clicked, like the Data Records export.
+            st.download_button("⬇️ Download All Rows", data=lambda: results.to_csv(index=False),
+                               file_name="report.csv", mime="text/csv")
+    with telemetry.span("chart.build", report=title) as fields:
+        fig, notes, fields["bytes"] = charts.bar(results, report["chart"])
+    with telemetry.span("chart.render", report=title):
+        st.plotly_chart(fig, use_container_width=True)
+    if notes:
+        st.caption("Chart simplified: " + "; ".join(notes) + ".")
+
+
+def show_live_report(title, report):
+    live = ui.live_result("live_report", report["sql"], None, report.get("live"), reports.report_sql(report))
+    show_report(title, report, REPORT_SOURCES[0], live.result)
+    st.caption(live.status())
+
+
+def run_report(title, report, source, run_query, live_mode):
+    # In live mode the last report run stays on screen and follows the
+    # change feed; the snapshot source is only refreshed by its export.
+    if run_query:
+        st.session_state["shown_report"] = title
+    if not (run_query or (live_mode and st.session_state.get("shown_report") == title)):
+        return
+    if live_mode and source == REPORT_SOURCES[0]:
+        st.fragment(show_live_report, run_every=changes.POLL_SECONDS)(title, report)
+    else:
+        show_report(title, report, source)
+
+
+def render():
+    live_mode = ui.live_toggle()
+    st.header("📊 Advanced Insights")
+    st.sidebar.header("Analysis")
+    analysis_section = st.sidebar.selectbox("📊 Select Analysis Type", [
+        "🟡 Medium level", "🔴 Complex", "📝 New Entry + Prediction"
+    ])
+    if analysis_section != "📝 New Entry + Prediction":
+        report_source = st.sidebar.radio("🗂️ Report Source", REPORT_SOURCES)
+
+    if analysis_section == "🟡 Medium level":
+        section = st.sidebar.radio("🧭 Select Category", list(reports.MEDIUM_REPORTS))
+        ui.show_animation("medium", speed=1, width=250, height=300)
+
+        st.subheader("🟡 Medium Level Analysis")
+
+        section_reports = reports.MEDIUM_REPORTS[section]
+        query_option = st.selectbox("Choose an Analysis", list(section_reports))
+        run_query = st.button("▶️ Run Query")
+
+        run_report(query_option, section_reports[query_option], report_source, run_query, live_mode)
+
+    if analysis_section == "🔴 Complex":
+        ui.show_animation("complex", speed=2, width=300, height=600)
+
+        st.subheader("🔴 Complex Analysis")
+        query_option = st.selectbox("Choose an Analysis", list(reports.COMPLEX_REPORTS))
+        run_query = st.button("▶️ Run Query")
+
+        run_report(query_option, reports.COMPLEX_REPORTS[query_option], report_source, run_query, live_mode)
+
+    if analysis_section == "📝 New Entry + Prediction":
+        # The entry forms, the outcome model and the writer thread are
+        # loaded the first time a session opens them.
+        import page_entry
+
+        page_entry.render()
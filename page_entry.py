@@ -0,0 +1,251 @@
+import datetime
+import io
+
+import pandas as pd
+import streamlit as st
+
+import changes
+import database
+import entries
+import ledger
+import prediction
+import profiles
+import ui
+import writer
+
+MAX_PENDING_SHOWN = 5
+RECENT_SQL = "SELECT * FROM police_stops ORDER BY stop_date DESC,stop_time DESC LIMIT 10"
+
+
+@st.cache_resource
+def load_outcome_model():
+    model = prediction.OutcomeModel.load()
+    if not changes.ENABLED:
+        # Without the change feed only this process's inserts are seen;
+        # delete listeners do not get the columns the model counts by.
+        ledger.on_insert(model.observe)
+    return model
+
+
+def current_outcome_model():
+    model = load_outcome_model()
+    model.follow()
+    return model
+
+
+def predict_outcome(stop):
+    try:
+        return current_outcome_model().predict(stop)
+    except database.CONNECTION_ERRORS:
+        return prediction.DEFAULT_OUTCOME
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def read_batch(data):
+    # Parsed once per upload or paste, not on every rerun of the page.
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+
+
+def show_entry_status(entry):
+    future = entry["future"]
+    if not future.done():
+        st.info(f"⏳ Saving {entry['label']}...")
+    elif future.exception() is not None:
+        st.error(f"❌ {entry['label']} was not saved: {future.exception()}")
+    else:
+        st.success(f"💾 {entry['label']} saved with id {future.result()[0]}")
+
+
+@st.fragment(run_every=1)
+def poll_pending_entries():
+    # Polls the group-commit futures of this session's recent entries.
+    # Once all are done, a full rerun draws them without this fragment,
+    # which stops the polling.
+    pending = st.session_state["pending_entries"]
+    for entry in pending:
+        show_entry_status(entry)
+    if all(entry["future"].done() for entry in pending):
+        st.rerun()
+
+
+def show_pending_entries():
+    pending = st.session_state["pending_entries"]
+    if all(entry["future"].done() for entry in pending):
+        for entry in pending:
+            show_entry_status(entry)
+    else:
+        poll_pending_entries()
+
+
+def new_entry_tab():
+    st.title("🚓 New Police Record Entry")
+    st.header("Log New Stop & Predict Outcome")
+
+    with st.form("traffic_entry_form"):
+        st.subheader("📋 Entry Form")
+
+        vehicle_number = st.text_input("Vehicle Number")
+        country = st.selectbox("Country Name", ["Canada", "India", "USA"])
+        stop_date = st.date_input("Stop Date", datetime.date.today())
+        stop_time = st.time_input("Stop Time", value=datetime.datetime.now().time(), step=60)
+        driver_gender = st.selectbox("Driver Gender", ["Male", "Female"])
+        driver_age = st.number_input("Driver Age", min_value=18, max_value=100, value=19)
+        driver_race = st.selectbox("Driver Race", ["Asian", "White", "Black", "Hispanic", "Other"])
+        violation = st.selectbox("Violation", ["Speeding", "Other", "DUI", "Seatbelt", "Signal"])
+        search_conducted = st.selectbox("Was a Search Conducted?", ["1", "0"])
+        search_type = st.selectbox("Search Type", ["Vehicle Search", "No Search", "Frisk", "Unknown"])
+        drugs_related_stop = st.selectbox("drugs_related_stop", ["1", "0"])
+        stop_duration = st.selectbox("Stop Duration", ["16-30 Min", "0-15 Min", "30+ Min"])
+
+        submit_button = st.form_submit_button("Submit Entry")
+
+    if submit_button:
+        vehicle_number = ledger.normalize_plate(vehicle_number)
+        search_conducted_val = int(search_conducted)
+        drugs_related_stop_val = int(drugs_related_stop)
+        stop_outcome = predict_outcome({
+            "violation": violation, "drugs_related_stop": drugs_related_stop_val,
+            "country": country, "driver_age": driver_age,
+            "search_conducted": search_conducted_val, "stop_time": stop_time,
+        })
+        is_arrested_val = 1 if stop_outcome == "Arrest" else 0
+
+        try:
+            formatted_time = stop_time.strftime("%H:%M:%S")
+
+            display_time = stop_time.strftime("%I.%M %p").lstrip("0").upper()
+
+            new_stop = {
+                "country": country, "vehicle_number": vehicle_number,
+                "stop_date": stop_date, "stop_time": formatted_time,
+                "driver_gender": driver_gender, "driver_age": driver_age,
+                "driver_race": driver_race, "violation": violation,
+                "search_conducted": search_conducted_val, "search_type": search_type,
+                "stop_outcome": stop_outcome, "is_arrested": is_arrested_val,
+                "drugs_related_stop": drugs_related_stop_val, "stop_duration": stop_duration,
+            }
+            # The vehicle's earlier stops, read from its profile row
+            # before this stop can be counted in it.
+            vehicle_flags = profiles.flags(profiles.lookup(vehicle_number, fetch=ui.fetch_data)) if profiles.ENABLED else []
+
+            # Queued for the group-commit writer; the confirmation
+            # below updates once the stop is committed.
+            future = writer.shared_writer().submit([new_stop])
+            pending = st.session_state.setdefault("pending_entries", [])
+            pending.append({"label": f"{vehicle_number} at {stop_date} {formatted_time}", "future": future})
+            del pending[:-MAX_PENDING_SHOWN]
+            st.success("✅ New entry accepted and queued for the database.")
+            for flag in vehicle_flags:
+                st.warning(flag)
+
+            new_entry = pd.DataFrame([new_stop])
+
+            st.subheader("📊 Review New Police Entry")
+            st.dataframe(new_entry)
+
+            outcome_text = {
+                "Ticket": "and the driver received a ticket",
+                "Arrest": "and the driver was arrested",
+                "Warning": "and the driver was warned"
+            }.get(stop_outcome, f"and the outcome was {stop_outcome}")
+
+            search_text = "A search was conducted." if search_conducted_val else "No search was conducted."
+            drugs_text = "It was drug-related." if drugs_related_stop_val else "It was not drug-related."
+
+            st.success(f"**Violation:** {violation}")
+            st.success(f"**Stop Outcome:** {stop_outcome}")
+
+            summary = (
+                f"🚗 On **{stop_date}**, a **{driver_age}**-year-old **{driver_gender}** driver was stopped for **{violation}** "
+                f"at **{display_time}**. **{search_text}**, **{outcome_text}**. "
+                f"The stop lasted **{stop_duration}** **{drugs_text}**"
+            )
+            st.subheader("🎯 Prediction Summary")
+            st.markdown(summary)
+
+        except writer.WriterBusy:
+            st.error("❌ Too many entries are waiting to be saved. Please submit again in a moment.")
+        except Exception as e:
+            st.error(f"❌ Error inserting into DB: {e}")
+
+    if st.session_state.get("pending_entries"):
+        show_pending_entries()
+
+
+def recent_tab():
+    st.header("Recently Added Records")
+    # Every tab is drawn on every rerun, so the list comes from the result
+    # cache and a connection is only taken to delete.
+    df_recent = ui.cached_data(RECENT_SQL)
+
+    if not df_recent.empty:
+        st.dataframe(df_recent)
+
+        vehicle_to_delete = st.selectbox("Select Vehicle Number to Delete:", df_recent["vehicle_number"].unique())
+        stoptime_to_delete = st.selectbox("Select the Stop Time to Delete :", df_recent['stop_time'].unique())
+
+        if st.button("❌ Delete Selected Entry"):
+            db = ui.connect_to_database()
+            if db:
+                try:
+                    ledger.delete_stops(db, "vehicle_number = %s and stop_time = %s", (vehicle_to_delete, stoptime_to_delete))
+                    st.success(f"✅ Entry with Vehicle Number **{vehicle_to_delete}** on **{stoptime_to_delete}** deleted successfully.")
+                    df_recent = ui.cached_data(RECENT_SQL)
+                    st.subheader("📋 Updated Records After Deletion")
+                    st.dataframe(df_recent)
+                except Exception as e:
+                    st.error(f"❌ Error deleting from DB: {e}")
+                finally:
+                    db.close()
+    else:
+        st.info("No recent records found.")
+
+
+def batch_tab():
+    st.header("Log Many Stops at Once")
+    st.caption("Paste or upload a CSV with the columns " + ", ".join(entries.REQUIRED)
+               + ". Outcomes are predicted unless a stop_outcome column is given. "
+               + "Terminals can post the same rows as JSON to entry_api.py.")
+    uploaded = st.file_uploader("CSV File", type=["csv"])
+    pasted = st.text_area("...or paste CSV rows (with a header line)", height=150)
+
+    batch_df = pd.DataFrame()
+    if uploaded is not None:
+        batch_df = read_batch(uploaded.getvalue())
+    elif pasted.strip():
+        batch_df = read_batch(pasted.encode("utf-8"))
+
+    if not batch_df.empty:
+        st.dataframe(batch_df.head(20))
+        st.info(f"{len(batch_df)} rows ready")
+        if st.button("📥 Insert Batch"):
+            db = ui.connect_to_database()
+            if db:
+                try:
+                    ids, stops = entries.submit(db, current_outcome_model(), batch_df.to_dict("records"))
+                    st.success(f"✅ {len(ids)} stops inserted (ids {ids[0]}-{ids[-1]}).")
+                    st.dataframe(pd.DataFrame(stops).assign(id=ids).set_index("id"))
+                except entries.BatchRejected as err:
+                    st.error(f"❌ Nothing was inserted; fix these rows and try again ({len(err.errors)} problems):")
+                    st.code("\n".join(err.errors[:50]))
+                except database.DATA_ERRORS as err:
+                    if database.duplicate_key(err):
+                        st.error("❌ Nothing was inserted; a stop in the batch is already in the ledger (same vehicle, date and time).")
+                    else:
+                        st.error(f"❌ Nothing was inserted; the database refused the batch: {err}")
+                except database.CONNECTION_ERRORS as err:
+                    st.error(f"❌ Error inserting into DB: {err}")
+                finally:
+                    db.close()
+
+
+def render():
+    ui.show_animation("entry", speed=1, width=300, height=600)
+
+    tab1, tab2, tab3 = st.tabs(["➕ New Entry", "📄 Recently Added / Delete", "📥 Batch Entry"])
+    with tab1:
+        new_entry_tab()
+    with tab2:
+        recent_tab()
+    with tab3:
+        batch_tab()
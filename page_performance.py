@@ -0,0 +1,30 @@
+import plotly.express as px
+import streamlit as st
+
+import telemetry
+
+
+def render():
+    st.header("⏱️ Performance")
+    spans = telemetry.recent()
+    if spans.empty:
+        st.info("No timings recorded yet.")
+        return
+
+    st.subheader("Where the time goes (last hour)")
+    steps = spans.groupby("span")["ms"].describe(percentiles=[0.5, 0.95])[["count", "50%", "95%", "max"]]
+    st.dataframe(steps.rename(columns={"50%": "p50 ms", "95%": "p95 ms", "max": "max ms"}).round(1), use_container_width=True)
+
+    st.subheader("Report latency")
+    histogram = telemetry.histogram("report")
+    if not histogram.empty:
+        histogram = histogram.groupby(["report", "bucket"], sort=False, as_index=False)["count"].sum()
+        st.plotly_chart(px.bar(histogram, x="bucket", y="count", color="report", barmode="group"), use_container_width=True)
+
+    st.subheader("Slowest queries (last hour)")
+    queries = spans[spans["span"].isin(["query.execute", "snapshot.query"])]
+    # Spans without a sql field leave no sql column at all.
+    st.dataframe(queries.nlargest(20, "ms").reindex(columns=["at", "span", "ms", "sql"]), use_container_width=True)
+
+    with st.expander("Prometheus metrics"):
+        st.code(telemetry.prometheus_text(), language="text")
@@ -0,0 +1,47 @@
+import pandas as pd
+import streamlit as st
+
+import changes
+import database
+import ledger
+import plate_index
+import telemetry
+import ui
+
+
+@st.cache_resource
+def load_plate_index():
+    index = plate_index.PlateIndex.load()
+    if not changes.ENABLED:
+        # Without the change feed only this process's writes are seen.
+        ledger.on_insert(index.observe)
+        ledger.on_delete(index.forget)
+    return index
+
+
+def render():
+    st.header("🔎 Vehicle Number Search")
+    plate_query = st.text_input("Vehicle Number", placeholder="Full plate, the start of one, or a plate with one typo")
+    if plate_query.strip():
+        try:
+            with telemetry.span("plate.search") as fields:
+                index = load_plate_index()
+                index.follow()
+                matches = index.search(plate_query)
+                fields["matches"] = len(matches)
+        except database.CONNECTION_ERRORS as err:
+            st.error(f"❌ DB Connection Error: {err}")
+            matches = []
+        if not matches:
+            st.info("No vehicle with recorded stops matches that number.")
+        else:
+            matches_df = pd.DataFrame(matches)
+            matches_df["flags"] = (matches_df["arrests"].gt(0).map({True: "🚨 ", False: ""})
+                                   + matches_df["drug_stops"].gt(0).map({True: "💊", False: ""}))
+            matches_df["distance"] = matches_df["distance"].map({0: "exact", 1: "1 typo", 2: "2 typos"}).fillna("prefix")
+            st.dataframe(matches_df.rename(columns={"distance": "match"}), use_container_width=True, hide_index=True)
+
+            plate = st.selectbox("Stop History for", matches_df["vehicle_number"])
+            history_df = ui.fetch_data(plate_index.HISTORY_SQL, (plate,))
+            st.subheader(f"🚗 {plate}: {len(history_df)} stops")
+            st.dataframe(history_df, use_container_width=True, hide_index=True)
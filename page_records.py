@@ -0,0 +1,115 @@
+import pandas as pd
+import streamlit as st
+
+import changes
+import exports
+import records
+import retention
+import ui
+
+# Archived stops shown per search on the Data Records page.
+ARCHIVE_ROWS = 1000
+
+
+def render():
+    live_mode = ui.live_toggle()
+    st.sidebar.header("Filter Options")
+
+    start_date = st.sidebar.date_input("Start Date", pd.to_datetime("2020-01-01"))
+    end_date = st.sidebar.date_input("End Date", pd.to_datetime("2030-12-30"))
+
+    gender_filter = st.sidebar.radio("Driver Gender", ["All", "Male", "Female"])
+    country_filter = st.sidebar.multiselect("Country", ["India", "USA", "Canada"], default=["India", "USA", "Canada"])
+    drug_filter = st.sidebar.selectbox("Drug-Related Stop?", ["All", True, False])
+    arrest_filter = st.sidebar.checkbox("Show Only Arrests", value=False)
+
+    page_size = st.sidebar.selectbox("Rows per Page", [25, 50, 100, 250], index=1)
+
+    where, params = records.build_filters(start_date, end_date, gender_filter, country_filter, drug_filter, arrest_filter)
+
+    total_sql = "SELECT COUNT(*) AS total FROM police_stops"
+    total = ui.live_result("live_total", total_sql, keys=()).result if live_mode else ui.cached_data(total_sql)
+    total_records = int(total["total"].iloc[0]) if not total.empty else 0
+
+    st.success(f"Total records : {total_records}")
+    st.header("🗃️ View & Filter Records")
+
+    if total_records:
+        summary_sql, summary_params = records.summary_query(start_date, end_date, gender_filter, country_filter, drug_filter, arrest_filter)
+        if live_mode:
+            summary = ui.live_result("live_summary", summary_sql, summary_params, keys=()).result.iloc[0]
+        else:
+            summary = ui.cached_data(summary_sql, summary_params).iloc[0]
+
+        # Keyset cursors for the pages already visited; any filter change
+        # starts over from the newest stop.
+        filter_state = (where, tuple(params), page_size)
+        if st.session_state.get("records_filter") != filter_state:
+            st.session_state["records_filter"] = filter_state
+            st.session_state["records_cursors"] = [None]
+        cursors = st.session_state["records_cursors"]
+
+        page_df = ui.cached_data(*records.page_query(where, params, cursors[-1], page_size))
+        page_df, next_key = records.split_page(page_df, page_size)
+
+        st.dataframe(page_df, use_container_width=True)
+        st.warning(f"Filtered Records: {int(summary['total_stops'])}")
+
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        page_col.caption(f"Page {len(cursors)}")
+        if prev_col.button("⬅️ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Next ➡️", disabled=next_key is None):
+            cursors.append(next_key)
+            st.rerun()
+
+        # The file is only built when the button is clicked, streamed from
+        # the database in chunks.
+        export_format = st.selectbox("Export Format", list(exports.FORMATS))
+        extension, mime = exports.FORMATS[export_format]
+
+        def export_file():
+            return exports.export_filtered(where, params, export_format)
+
+        st.download_button("⬇️ Download Filtered Data", data=export_file, file_name=f"filtered_data.{extension}", mime=mime)
+
+        def summary_metrics():
+            # In live mode this part alone reruns on every poll, adding the
+            # feed's changes to the metrics instead of re-reading them.
+            current = summary
+            if live_mode:
+                live = ui.live_result("live_summary", summary_sql, summary_params, keys=())
+                current = live.result.iloc[0]
+
+            st.subheader("📊 Summary Metrics")
+            col1, col2, col3, col4, col5 = st.columns(5)
+
+            def metric(column, label, name):
+                value = int(current[name])
+                column.metric(label, value, delta=value - int(current["previous_" + name]))
+
+            metric(col1, "🚦 Total Stops", "total_stops")
+            metric(col2, "👨 Male Drivers", "male_drivers")
+            metric(col3, "👩 Female Drivers", "female_drivers")
+            metric(col4, "🚨 Arrests", "arrests")
+            metric(col5, "💊 Drug-Related Stops", "drug_related_stops")
+            previous_start, previous_end = records.previous_period(start_date, end_date)
+            st.caption(f"Changes are against the previous period, {previous_start} to {previous_end}.")
+            if live_mode:
+                st.caption(live.status())
+
+        st.fragment(summary_metrics, run_every=changes.POLL_SECONDS if live_mode else None)()
+    else:
+        st.warning("No data available from the database.")
+
+    # Stops older than the retention period live in compressed archive
+    # files and are only read when asked for.
+    archived_before = retention.cutoff()
+    if start_date < archived_before and retention.archive_files():
+        with st.expander(f"🗄️ Archived stops before {archived_before}"):
+            if st.button("🔍 Search Archive"):
+                archived = retention.fetch_archived(*records.page_query(where, params, None, ARCHIVE_ROWS))
+                archived, _ = records.split_page(archived, ARCHIVE_ROWS)
+                st.dataframe(archived, use_container_width=True)
+                st.caption(f"Newest {len(archived)} archived stops matching the filters (at most {ARCHIVE_ROWS}).")
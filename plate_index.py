@@ -0,0 +1,237 @@
+import argparse
+import bisect
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import changes
+import database
+import ledger
+
+# In-memory plate search. Every plate with stops is kept with its stop,
+# arrest and drug-related counts. A sorted list answers prefix searches by
+# bisection. Typos are found through buckets keyed by the first and the
+# last SEGMENT characters: one substitution, insertion or deletion leaves
+# at least one of the two intact in plates of 2 * SEGMENT characters or
+# more, so only those buckets are compared with edit distance. follow()
+# applies the stop_changes feed, so writes by any process reach it.
+SEGMENT = 4
+# New plates go into a small sorted list that is merged into the main one
+# once it holds this many.
+MERGE_AT = 2048
+
+LOAD_SQL = """SELECT vehicle_number, COUNT(*) AS stops,
+    COALESCE(SUM(is_arrested), 0) AS arrests,
+    COALESCE(SUM(drugs_related_stop), 0) AS drug_stops
+    FROM police_stops
+    WHERE vehicle_number IS NOT NULL
+    GROUP BY vehicle_number"""
+HISTORY_SQL = """SELECT * FROM police_stops
+    WHERE vehicle_number = %s
+    ORDER BY stop_date DESC, stop_time DESC"""
+
+
+def edit_distance(a, b, limit):
+    # Levenshtein distance, or limit + 1 as soon as it must exceed limit.
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        current = [i]
+        for j, other in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _one_edit(a, b):
+    # edit_distance(a, b, 1) without the table: 0, 1, or 2 for more.
+    if a == b:
+        return 0
+    i = len(os.path.commonprefix((a, b)))
+    if len(a) == len(b):
+        return 1 if a[i + 1:] == b[i + 1:] else 2
+    if len(a) + 1 == len(b):
+        return 1 if a[i:] == b[i + 1:] else 2
+    if len(a) == len(b) + 1:
+        return 1 if a[i + 1:] == b[i:] else 2
+    return 2
+
+
+class PlateIndex:
+    def __init__(self):
+        # plate -> [stops, arrests, drug-related stops]
+        self._counts = {}
+        self._sorted = []
+        self._recent = []
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # Where follow() reads the change feed from; None without one.
+        self._changes = None
+        self._follow_lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        index = cls()
+        index._reload()
+        return index
+
+    def _reload(self):
+        if changes.ENABLED:
+            groups, seq = changes.fetch_at_seq(LOAD_SQL)
+        else:
+            groups, seq = database.fetch_data(LOAD_SQL), None
+        with self._lock:
+            self._counts, self._recent, self._buckets = {}, [], {}
+            for plate, stops, arrests, drug_stops in groups.itertuples(index=False):
+                self._add(ledger.normalize_plate(plate), int(stops), int(arrests), int(drug_stops))
+            self._sorted = sorted(self._counts)
+        self._changes = changes.ChangeCursor(seq) if seq is not None else None
+
+    def follow(self):
+        # Applies the stops inserted and deleted since the last call, or
+        # reloads after a bulk load or a pruned gap. One caller at a time,
+        # so no change is counted twice.
+        with self._follow_lock:
+            if self._changes is None:
+                return
+            polled = self._changes.poll()
+            if polled is None:
+                self._reload()
+                return
+            for rows, apply in zip(polled, (self.observe, self.forget)):
+                if not rows.empty:
+                    apply(rows.astype(object).where(rows.notna(), None).to_dict("records"))
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _keys(self, plate):
+        return ("<" + plate[:SEGMENT], ">" + plate[-SEGMENT:])
+
+    def _add(self, plate, stops, arrests, drug_stops):
+        counts = self._counts.get(plate)
+        if counts is None:
+            self._counts[plate] = [stops, arrests, drug_stops]
+            for key in self._keys(plate):
+                self._buckets.setdefault(key, set()).add(plate)
+            return True
+        counts[0] += stops
+        counts[1] += arrests
+        counts[2] += drug_stops
+        return False
+
+    def observe(self, stops):
+        # Inserted stops, as dicts.
+        with self._lock:
+            for stop in stops:
+                if stop.get("vehicle_number") is None:
+                    continue
+                plate = ledger.normalize_plate(stop["vehicle_number"])
+                if self._add(plate, 1, int(stop.get("is_arrested") or 0), int(stop.get("drugs_related_stop") or 0)):
+                    bisect.insort(self._recent, plate)
+            if len(self._recent) >= MERGE_AT:
+                self._merge()
+
+    def forget(self, stops):
+        # Deleted stops, as dicts. Plates left without stops stay in the
+        # sorted lists until the next merge; searches skip them.
+        with self._lock:
+            for stop in stops:
+                if stop.get("vehicle_number") is None:
+                    continue
+                plate = ledger.normalize_plate(stop["vehicle_number"])
+                counts = self._counts.get(plate)
+                if counts is None:
+                    continue
+                counts[0] -= 1
+                counts[1] -= int(stop.get("is_arrested") or 0)
+                counts[2] -= int(stop.get("drugs_related_stop") or 0)
+                if counts[0] <= 0:
+                    del self._counts[plate]
+                    for key in self._keys(plate):
+                        self._buckets.get(key, set()).discard(plate)
+
+    def _merge(self):
+        merged = []
+        for plate in heapq.merge(self._sorted, self._recent):
+            if plate in self._counts and (not merged or merged[-1] != plate):
+                merged.append(plate)
+        self._sorted = merged
+        self._recent = []
+
+    def _result(self, plate, distance=None):
+        stops, arrests, drug_stops = self._counts[plate]
+        return {"vehicle_number": plate, "stops": stops, "arrests": arrests,
+                "drug_stops": drug_stops, "distance": distance}
+
+    def prefix(self, text, limit=20):
+        # Plates starting with text, in order, with no distance.
+        text = ledger.normalize_plate(text)
+        matches = []
+        with self._lock:
+            for plates in (self._sorted, self._recent):
+                start = bisect.bisect_left(plates, text)
+                for plate in itertools.islice(plates, start, None):
+                    if not plate.startswith(text) or len(matches) >= limit:
+                        break
+                    if plate in self._counts:
+                        matches.append(plate)
+            return [self._result(plate) for plate in sorted(set(matches))[:limit]]
+
+    def fuzzy(self, text, max_distance=1, limit=20):
+        # Plates within max_distance edits of text, closest first. Only one
+        # edit is guaranteed to be found; more are found when the first or
+        # last SEGMENT characters still match.
+        text = ledger.normalize_plate(text)
+        with self._lock:
+            candidates = set()
+            for key in self._keys(text):
+                candidates |= self._buckets.get(key, set())
+            matches = []
+            for plate in candidates:
+                if max_distance == 1:
+                    distance = _one_edit(text, plate)
+                else:
+                    distance = edit_distance(text, plate, max_distance)
+                if distance <= max_distance:
+                    matches.append(self._result(plate, distance))
+        matches.sort(key=lambda match: (match["distance"], -match["stops"], match["vehicle_number"]))
+        return matches[:limit]
+
+    def search(self, text, max_distance=1, limit=20):
+        # Exact and typo matches first, then any other prefix matches.
+        found = {match["vehicle_number"]: match for match in self.fuzzy(text, max_distance, limit)}
+        for match in self.prefix(text, limit):
+            found.setdefault(match["vehicle_number"], match)
+        return list(found.values())[:limit]
+
+
+def history(plate, fetch=database.fetch_data):
+    # Every stop of one plate, newest first, through uq_vehicle_stop.
+    return fetch(HISTORY_SQL, (ledger.normalize_plate(plate),))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search vehicle numbers by prefix or with one typo.")
+    parser.add_argument("plate", help="full or partial vehicle number")
+    parser.add_argument("--distance", type=int, default=1, help="typos allowed (default 1)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = PlateIndex.load()
+    print(f"✅ Indexed {len(index)} plates in {time.perf_counter() - started:.2f}s")
+    started = time.perf_counter()
+    matches = index.search(args.plate, args.distance)
+    print(f"🔎 {len(matches)} matches in {(time.perf_counter() - started) * 1000:.3f} ms")
+    for match in matches:
+        print(f"  {match['vehicle_number']}: {match['stops']} stops, {match['arrests']} arrests, "
+              f"{match['drug_stops']} drug-related" + (f" ({match['distance']} typos)" if match["distance"] else ""))
+
+
+if __name__ == "__main__":
+    main()
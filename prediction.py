@@ -0,0 +1,232 @@
+import argparse
+import datetime
+import os
+import threading
+from collections import Counter
+
+import changes
+import database
+
+# Feature sets from most to least specific. A prediction uses the first
+# level whose matching group has at least MIN_SUPPORT past stops.
+LEVELS = (
+    ("violation", "drugs_related_stop", "country", "age_bucket", "search_conducted", "time_of_day"),
+    ("violation", "drugs_related_stop", "country", "search_conducted"),
+    ("violation", "drugs_related_stop", "country"),
+    ("violation", "drugs_related_stop"),
+    ("violation",),
+    (),
+)
+FEATURES = LEVELS[0]
+MIN_SUPPORT = int(os.environ.get("SECURECHECK_PREDICTION_MIN_SUPPORT", "20"))
+DEFAULT_OUTCOME = "Warning"
+
+# Must bucket exactly like age_bucket() and time_of_day() below.
+AGE_BUCKET_SQL = """CASE
+    WHEN driver_age BETWEEN 18 AND 25 THEN '18-25'
+    WHEN driver_age BETWEEN 26 AND 35 THEN '26-35'
+    WHEN driver_age BETWEEN 36 AND 45 THEN '36-45'
+    WHEN driver_age BETWEEN 46 AND 60 THEN '46-60'
+    ELSE '60+'
+END"""
+TIME_OF_DAY_SQL = """CASE
+    WHEN HOUR(stop_time) >= 20 OR HOUR(stop_time) < 6 THEN 'Night'
+    WHEN HOUR(stop_time) < 12 THEN 'Morning'
+    WHEN HOUR(stop_time) < 17 THEN 'Afternoon'
+    ELSE 'Evening'
+END"""
+
+
+def grouped_sql(holdout=None):
+    # Every holdout-th id is flagged so evaluate() can split train and
+    # test sets inside the same grouped scan.
+    held_out = f", id % {holdout} = 0 AS held_out" if holdout else ""
+    group_by = "1, 2, 3, 4, 5, 6, 7" + (", 9" if holdout else "")
+    return f"""SELECT violation, drugs_related_stop, country,
+        {AGE_BUCKET_SQL} AS age_bucket,
+        search_conducted,
+        {TIME_OF_DAY_SQL} AS time_of_day,
+        stop_outcome, COUNT(*) AS stops{held_out}
+        FROM police_stops
+        GROUP BY {group_by}"""
+
+
+def age_bucket(age):
+    if age is None:
+        return "60+"
+    age = int(age)
+    if 18 <= age <= 25:
+        return "18-25"
+    if 26 <= age <= 35:
+        return "26-35"
+    if 36 <= age <= 45:
+        return "36-45"
+    if 46 <= age <= 60:
+        return "46-60"
+    return "60+"
+
+
+def stop_hour(value):
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds() // 3600) % 24
+    if isinstance(value, (datetime.time, datetime.datetime)):
+        return value.hour
+    return int(str(value).split(":")[0])
+
+
+def time_of_day(stop_time):
+    if stop_time is None:
+        return "Evening"
+    hour = stop_hour(stop_time)
+    if hour >= 20 or hour < 6:
+        return "Night"
+    if hour < 12:
+        return "Morning"
+    if hour < 17:
+        return "Afternoon"
+    return "Evening"
+
+
+def _flag(value):
+    return int(value) if value is not None else 0
+
+
+def features(stop):
+    return {
+        "violation": stop.get("violation"),
+        "drugs_related_stop": _flag(stop.get("drugs_related_stop")),
+        "country": stop.get("country"),
+        "age_bucket": age_bucket(stop.get("driver_age")),
+        "search_conducted": _flag(stop.get("search_conducted")),
+        "time_of_day": time_of_day(stop.get("stop_time")),
+    }
+
+
+def _group_features(group):
+    feature_values = {name: getattr(group, name) for name in FEATURES}
+    feature_values["drugs_related_stop"] = _flag(feature_values["drugs_related_stop"])
+    feature_values["search_conducted"] = _flag(feature_values["search_conducted"])
+    return feature_values
+
+
+class OutcomeModel:
+    def __init__(self, min_support=MIN_SUPPORT, levels=LEVELS):
+        self.min_support = min_support
+        self.levels = levels
+        self._counts = [{} for _ in levels]
+        self._lock = threading.Lock()
+        # Where follow() reads the change feed from; None without one.
+        self._changes = None
+        self._follow_lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        model = cls()
+        model._reload()
+        return model
+
+    def _reload(self):
+        if changes.ENABLED:
+            groups, seq = changes.fetch_at_seq(grouped_sql())
+        else:
+            groups, seq = database.fetch_data(grouped_sql()), None
+        fresh = OutcomeModel(self.min_support, self.levels)
+        fresh.add_groups(groups)
+        with self._lock:
+            self._counts = fresh._counts
+        self._changes = changes.ChangeCursor(seq) if seq is not None else None
+
+    def follow(self):
+        # Counts the stops inserted and deleted by any process since the
+        # last call, or reloads after a bulk load or a pruned gap. One
+        # caller at a time, so no change is counted twice.
+        with self._follow_lock:
+            if self._changes is None:
+                return
+            polled = self._changes.poll()
+            if polled is None:
+                self._reload()
+                return
+            for rows, apply in zip(polled, (self.observe, self.forget)):
+                if not rows.empty:
+                    apply(rows.astype(object).where(rows.notna(), None).to_dict("records"))
+
+    def add_groups(self, groups):
+        with self._lock:
+            for group in groups.itertuples(index=False):
+                self._add(_group_features(group), group.stop_outcome, int(group.stops))
+
+    def observe(self, stops):
+        with self._lock:
+            for stop in stops:
+                self._add(features(stop), stop["stop_outcome"], 1)
+
+    def forget(self, stops):
+        with self._lock:
+            for stop in stops:
+                self._add(features(stop), stop["stop_outcome"], -1)
+
+    def _add(self, feature_values, outcome, count):
+        for level, counts in zip(self.levels, self._counts):
+            key = tuple(feature_values[name] for name in level)
+            outcomes = counts.setdefault(key, Counter())
+            outcomes[outcome] += count
+            if outcomes[outcome] <= 0:
+                del outcomes[outcome]
+                if not outcomes:
+                    del counts[key]
+
+    def predict(self, stop):
+        return self.predict_features(features(stop))
+
+    def predict_many(self, stops):
+        # One outcome per stop, with identical feature sets looked up once.
+        keys = [tuple(features(stop).items()) for stop in stops]
+        outcomes = {key: self.predict_features(dict(key)) for key in set(keys)}
+        return [outcomes[key] for key in keys]
+
+    def predict_features(self, feature_values):
+        with self._lock:
+            for level, counts in zip(self.levels, self._counts):
+                outcomes = counts.get(tuple(feature_values[name] for name in level))
+                if outcomes and (sum(outcomes.values()) >= self.min_support or not level):
+                    return outcomes.most_common(1)[0][0]
+        return DEFAULT_OUTCOME
+
+
+def evaluate(holdout=5):
+    groups = database.fetch_data(grouped_sql(holdout))
+    held_out = groups["held_out"].astype(bool)
+    train, test = groups[~held_out], groups[held_out]
+
+    models = {
+        "backoff model": OutcomeModel(),
+        # The violation/drugs_related_stop GROUP BY the form used before.
+        "violation + drugs only": OutcomeModel(min_support=0, levels=(("violation", "drugs_related_stop"), ())),
+    }
+    for model in models.values():
+        model.add_groups(train)
+
+    total = int(test["stops"].sum())
+    print(f"Training groups: {len(train)}, holdout stops: {total}")
+    if not total:
+        return
+    for name, model in models.items():
+        correct = 0
+        for group in test.itertuples(index=False):
+            if model.predict_features(_group_features(group)) == group.stop_outcome:
+                correct += int(group.stops)
+        print(f"{name}: {correct / total:.2%} accuracy")
+    majority = test.groupby("stop_outcome")["stops"].sum().max()
+    print(f"always most common outcome: {majority / total:.2%} accuracy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the SecureCheck outcome prediction model.")
+    parser.add_argument("--holdout", type=int, default=5, help="hold out every Nth stop id for testing (default 5, i.e. 20%%)")
+    args = parser.parse_args()
+    evaluate(args.holdout)
+
+
+if __name__ == "__main__":
+    main()
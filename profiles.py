@@ -0,0 +1,253 @@
+import argparse
+import datetime
+import os
+import sys
+
+from sqlalchemy import inspect
+
+import database
+
+# One row per vehicle in vehicle_profiles: stop, arrest, drug-related and
+# search counts, when it was first and last stopped, and the violations
+# of its last RECENT_VIOLATIONS stops in the order they were recorded.
+# Like the report rollups it is updated in the same transaction as every
+# insert and delete, and rollups.py rebuild/check cover it too.
+ENABLED = os.environ.get("SECURECHECK_ROLLUPS", "1") == "1"
+TABLE = "vehicle_profiles"
+RECENT_VIOLATIONS = 10
+# A vehicle with this many stops is a repeat offender.
+REPEAT_STOPS = 3
+INPUTS = ("vehicle_number", "stop_date", "stop_time", "violation", "is_arrested", "drugs_related_stop", "search_conducted")
+FIELDS = ("vehicle_number", "stops", "arrests", "drug_stops", "searches", "first_seen", "last_seen", "recent_violations")
+# Plates per IN (...) list.
+LOOKUP_BATCH = 500
+
+UPSERT_SQL = f"""INSERT INTO {TABLE} ({", ".join(FIELDS)})
+    VALUES ({", ".join(["%s"] * len(FIELDS))})
+    ON DUPLICATE KEY UPDATE {", ".join(f"{field} = VALUES({field})" for field in FIELDS[1:])}"""
+# An empty profile for a plate about to be counted, so there is a row to
+# lock even for a vehicle stopped for the first time.
+CLAIM_SQL = f"""INSERT INTO {TABLE} (vehicle_number, stops, arrests, drug_stops, searches, recent_violations)
+    VALUES (%s, 0, 0, 0, 0, '')
+    ON DUPLICATE KEY UPDATE vehicle_number = vehicle_number"""
+
+
+def table_statements():
+    # Migration 5. MySQL has no CREATE INDEX IF NOT EXISTS, so a table
+    # already made by rollups.py rebuild is left alone.
+    if inspect(database.get_engine()).has_table(TABLE):
+        return []
+    return [
+        f"""CREATE TABLE {TABLE} (
+            vehicle_number VARCHAR(20) NOT NULL PRIMARY KEY,
+            stops INT NOT NULL,
+            arrests INT NOT NULL,
+            drug_stops INT NOT NULL,
+            searches INT NOT NULL,
+            first_seen DATETIME,
+            last_seen DATETIME,
+            recent_violations VARCHAR(255) NOT NULL
+        )""",
+        # The repeat offenders report reads the top of this index.
+        f"CREATE INDEX idx_profile_stops ON {TABLE} (stops, arrests)",
+    ]
+
+
+def create_table(cursor):
+    for statement in table_statements():
+        cursor.execute(statement)
+
+
+def _when(stop_date, stop_time):
+    if stop_date is None or stop_time is None:
+        return None
+    if isinstance(stop_time, datetime.timedelta):
+        stop_time = (datetime.datetime.min + stop_time).time()
+    elif not isinstance(stop_time, datetime.time):
+        stop_time = datetime.time.fromisoformat(str(stop_time))
+    if not isinstance(stop_date, datetime.date):
+        stop_date = datetime.date.fromisoformat(str(stop_date)[:10])
+    return datetime.datetime.combine(stop_date, stop_time)
+
+
+def _datetime(value):
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def _fold(profile, stop):
+    # profile (a dict of FIELDS, or None) with one more stop counted.
+    if profile is None:
+        profile = {"vehicle_number": stop["vehicle_number"], "stops": 0, "arrests": 0, "drug_stops": 0,
+                   "searches": 0, "first_seen": None, "last_seen": None, "recent_violations": ""}
+    profile["stops"] += 1
+    profile["arrests"] += int(stop["is_arrested"] or 0)
+    profile["drug_stops"] += int(stop["drugs_related_stop"] or 0)
+    profile["searches"] += int(stop["search_conducted"] or 0)
+    when = _when(stop["stop_date"], stop["stop_time"])
+    if when is not None:
+        first, last = _datetime(profile["first_seen"]), _datetime(profile["last_seen"])
+        profile["first_seen"] = when if first is None else min(first, when)
+        profile["last_seen"] = when if last is None else max(last, when)
+    violations = [v for v in profile["recent_violations"].split(",") if v] + [stop["violation"] or "Unknown"]
+    profile["recent_violations"] = ",".join(violations[-RECENT_VIOLATIONS:])
+    return profile
+
+
+def _in_batches(plates):
+    plates = list(plates)
+    for start in range(0, len(plates), LOOKUP_BATCH):
+        yield plates[start:start + LOOKUP_BATCH]
+
+
+def _existing(cursor, plates):
+    # The profiles are read locked until the commit: the upsert writes
+    # whole counts, so two writers counting the same vehicle must take
+    # turns rather than both start from the same row. Plates are claimed
+    # in sorted order so concurrent writers lock them in the same order.
+    # SQLite already holds the database write lock here.
+    lock = " FOR UPDATE" if database.dialect_name() == "mysql" else ""
+    profiles = {}
+    for batch in _in_batches(sorted(plates)):
+        cursor.executemany(CLAIM_SQL, [(plate,) for plate in batch])
+        cursor.execute(f"SELECT {', '.join(FIELDS)} FROM {TABLE} WHERE vehicle_number IN ({', '.join(['%s'] * len(batch))}){lock}", batch)
+        for row in cursor.fetchall():
+            profiles[row[0]] = dict(zip(FIELDS, row))
+    return profiles
+
+
+def _write(cursor, profiles):
+    rows = [[profile[field] for field in FIELDS] for profile in profiles]
+    for start in range(0, len(rows), LOOKUP_BATCH):
+        cursor.executemany(UPSERT_SQL, rows[start:start + LOOKUP_BATCH])
+
+
+def _apply(cursor, stops):
+    stops = [stop for stop in stops if stop["vehicle_number"] is not None]
+    if not stops:
+        return
+    profiles = _existing(cursor, {stop["vehicle_number"] for stop in stops})
+    for stop in stops:
+        profiles[stop["vehicle_number"]] = _fold(profiles.get(stop["vehicle_number"]), stop)
+    _write(cursor, profiles.values())
+
+
+def record_insert(cursor, columns, rows):
+    # rows are in `columns` order, as ledger.insert_stops writes them.
+    if ENABLED and rows:
+        _apply(cursor, [dict(zip(columns, row)) for row in rows])
+
+
+def record_insert_from(cursor, source):
+    # Bulk loads: every row of `source` is about to be appended.
+    if not ENABLED:
+        return
+    cursor.execute(f"SELECT {', '.join(INPUTS)} FROM {source}")
+    _apply(cursor, [dict(zip(INPUTS, row)) for row in cursor.fetchall()])
+
+
+def record_delete(cursor, where, params):
+    # Must run before the DELETE itself, inside the same transaction. The
+    # affected profiles are recounted from the stops that will remain.
+    if not ENABLED:
+        return
+    cursor.execute(f"SELECT DISTINCT vehicle_number FROM police_stops WHERE ({where}) AND vehicle_number IS NOT NULL", params)
+    plates = [row[0] for row in cursor.fetchall()]
+    for batch in _in_batches(plates):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM {TABLE} WHERE vehicle_number IN ({placeholders})", batch)
+        cursor.execute(f"""SELECT {', '.join(INPUTS)} FROM police_stops
+            WHERE vehicle_number IN ({placeholders}) AND ({where}) IS NOT TRUE
+            ORDER BY id""", list(batch) + list(params))
+        profiles = {}
+        for row in cursor.fetchall():
+            stop = dict(zip(INPUTS, row))
+            profiles[stop["vehicle_number"]] = _fold(profiles.get(stop["vehicle_number"]), stop)
+        _write(cursor, profiles.values())
+
+
+def _profiles_from_stops(cursor, chunksize=100000):
+    # Every profile, recomputed from police_stops in recording order.
+    cursor.execute(f"SELECT {', '.join(INPUTS)} FROM police_stops WHERE vehicle_number IS NOT NULL ORDER BY vehicle_number, id")
+    profile = None
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            break
+        for row in rows:
+            stop = dict(zip(INPUTS, row))
+            if profile is not None and profile["vehicle_number"] != stop["vehicle_number"]:
+                yield profile
+                profile = None
+            profile = _fold(profile, stop)
+    if profile is not None:
+        yield profile
+
+
+def rebuild(db):
+    cursor = db.cursor()
+    create_table(cursor)
+    cursor.execute(f"DELETE FROM {TABLE}")
+    profiles = list(_profiles_from_stops(cursor))
+    _write(cursor, profiles)
+    return len(profiles)
+
+
+def check(db):
+    # Problems found comparing the table with a recount of police_stops.
+    cursor = db.cursor()
+    expected = {profile["vehicle_number"]: profile for profile in _profiles_from_stops(cursor)}
+    cursor.execute(f"SELECT {', '.join(FIELDS)} FROM {TABLE}")
+    actual = {row[0]: dict(zip(FIELDS, row)) for row in cursor.fetchall()}
+    problems = []
+    for plate in sorted(set(expected) | set(actual)):
+        want, have = expected.get(plate), actual.get(plate)
+        if want is None or have is None:
+            problems.append(f"{plate}: {'missing from' if want else 'not in police_stops but in'} {TABLE}")
+            continue
+        for field in FIELDS[1:]:
+            left, right = want[field], have[field]
+            if field.endswith("_seen"):
+                left, right = _datetime(left), _datetime(right)
+            if left != right:
+                problems.append(f"{plate}: {field} is {right}, police_stops gives {left}")
+    return problems
+
+
+def lookup(plate, fetch=database.fetch_data):
+    # The plate's profile as a dict, or None for a vehicle never stopped.
+    df = fetch(f"SELECT {', '.join(FIELDS)} FROM {TABLE} WHERE vehicle_number = %s", (plate,))
+    return None if df.empty else df.iloc[0].to_dict()
+
+
+def flags(profile):
+    # Warnings for the New Entry form about a vehicle's earlier stops.
+    if profile is None:
+        return []
+    found = []
+    if profile["stops"] + 1 >= REPEAT_STOPS:
+        found.append(f"🔁 Repeat vehicle: {profile['stops']} earlier stops, last on {profile['last_seen']}")
+    if profile["arrests"]:
+        found.append(f"🚨 High risk: {profile['arrests']} earlier arrests")
+    if profile["drug_stops"]:
+        found.append(f"💊 High risk: {profile['drug_stops']} earlier drug-related stops")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up a vehicle's profile in vehicle_profiles.")
+    parser.add_argument("plate", help="vehicle number")
+    args = parser.parse_args()
+    profile = lookup(args.plate)
+    if profile is None:
+        print(f"❌ {args.plate} has no recorded stops")
+        sys.exit(1)
+    for field in FIELDS:
+        print(f"{field}: {profile[field]}")
+    for flag in flags(profile):
+        print(flag)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import datetime
+
+import numpy as np
+
+# Sort key for the Data Records page. Newest stops first; the surrogate id
+# added by migration 1 breaks ties between stops logged at the same time,
+# and idx_stop_when serves the whole key.
+PAGE_KEY = ("stop_date", "stop_time", "id")
+
+
+def build_filters(start_date, end_date, gender="All", countries=None, drugs="All", arrests_only=False):
+    clauses = ["stop_date BETWEEN %s AND %s"]
+    params = [start_date, end_date]
+
+    if gender != "All":
+        clauses.append("driver_gender = %s")
+        params.append(gender)
+
+    if countries is not None:
+        if countries:
+            clauses.append("country IN (" + ", ".join(["%s"] * len(countries)) + ")")
+            params.extend(countries)
+        else:
+            clauses.append("1 = 0")
+
+    if drugs != "All":
+        clauses.append("drugs_related_stop = %s")
+        params.append(bool(drugs))
+
+    if arrests_only:
+        clauses.append("is_arrested = TRUE")
+
+    return " AND ".join(clauses), params
+
+
+def keyset_clause(after):
+    # (a, b, c) < (x, y, z) written out as nested OR/AND so MySQL can
+    # range-scan an index on the key instead of evaluating a row constructor.
+    clause = f"{PAGE_KEY[-1]} < %s"
+    params = [after[-1]]
+    for column, value in zip(reversed(PAGE_KEY[:-1]), reversed(after[:-1])):
+        clause = f"{column} < %s OR ({column} = %s AND ({clause}))"
+        params = [value, value] + params
+    return f"({clause})", params
+
+
+def page_query(where, params, after=None, page_size=50):
+    params = list(params)
+    if after is not None:
+        clause, key_params = keyset_clause(after)
+        where = f"{where} AND {clause}"
+        params.extend(key_params)
+
+    order = ", ".join(f"{column} DESC" for column in PAGE_KEY)
+    # One extra row tells the caller whether a next page exists.
+    sql = f"SELECT * FROM police_stops WHERE {where} ORDER BY {order} LIMIT %s"
+    params.append(page_size + 1)
+    return sql, params
+
+
+def split_page(df, page_size):
+    has_more = len(df) > page_size
+    df = df.iloc[:page_size]
+    next_key = None
+    if has_more:
+        next_key = [_plain(value) for value in df.iloc[-1][list(PAGE_KEY)]]
+    return df, next_key
+
+
+SUMMARY_METRICS = {
+    "total_stops": "1",
+    "male_drivers": "driver_gender = 'Male'",
+    "female_drivers": "driver_gender = 'Female'",
+    "arrests": "is_arrested",
+    "drug_related_stops": "drugs_related_stop",
+}
+
+
+def previous_period(start_date, end_date):
+    # The window of the same length that ends the day before start_date.
+    length = end_date - start_date + datetime.timedelta(days=1)
+    return start_date - length, start_date - datetime.timedelta(days=1)
+
+
+def summary_query(start_date, end_date, gender="All", countries=None, drugs="All", arrests_only=False):
+    # One scan over both periods with the page's other filters; each metric
+    # comes back twice, as the current value and as previous_<metric>.
+    previous_start, _ = previous_period(start_date, end_date)
+    where, params = build_filters(previous_start, end_date, gender, countries, drugs, arrests_only)
+    columns = []
+    for name, expression in SUMMARY_METRICS.items():
+        columns.append(f"COALESCE(SUM(CASE WHEN stop_date >= %s THEN {expression} END), 0) AS {name}")
+        columns.append(f"COALESCE(SUM(CASE WHEN stop_date < %s THEN {expression} END), 0) AS previous_{name}")
+    sql = f"""SELECT {", ".join(columns)}
+        FROM police_stops
+        WHERE {where}"""
+    return sql, [start_date] * len(columns) + list(params)
+
+
+def export_query(where, params):
+    order = ", ".join(f"{column} DESC" for column in PAGE_KEY)
+    return f"SELECT * FROM police_stops WHERE {where} ORDER BY {order}", list(params)
+
+
+def _plain(value):
+    # mysql.connector cannot bind numpy scalars.
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
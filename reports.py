@@ -0,0 +1,396 @@
+import profiles
+import rollups
+
+# Every report on the "🟡 Medium level" and "🔴 Complex" pages. "sql" reads
+# police_stops directly; "rollup_sql", where present, gives the same answer
+# from the summary tables kept by rollups.py. "chart" holds the px.bar
+# arguments used to plot the result. "live", for results that only count
+# or sum, names their GROUP BY columns so the live mode can add change
+# feed deltas to them instead of running the query again.
+
+MEDIUM_REPORTS = {
+    "🚗 Vehicle-Based": {
+        "🚗 Top 10 vehicles involved in drug-related stops": {
+            "sql": """SELECT vehicle_number, COUNT(*) as stops
+                    FROM police_stops
+                    WHERE drugs_related_stop = TRUE
+                    GROUP BY vehicle_number
+                    ORDER BY stops DESC
+                    LIMIT 10""",
+            "chart": dict(x="stops", y="vehicle_number", orientation="h", title="🚗 Top 10 Vehicles in Drug-Related Stops"),
+        },
+        "🚗 Most frequently searched vehicles": {
+            "sql": """SELECT vehicle_number, COUNT(*) as searches
+                    FROM police_stops
+                    WHERE search_conducted = TRUE
+                    GROUP BY vehicle_number
+                    ORDER BY searches DESC
+                    LIMIT 10""",
+            "chart": dict(x="searches", y="vehicle_number", orientation="h", title="🚗 Most Frequently Searched Vehicles"),
+        },
+        "🔁 Repeat offenders": {
+            "sql": f"""SELECT vehicle_number, COUNT(*) AS stops,
+                    SUM(is_arrested) AS arrests, SUM(drugs_related_stop) AS drug_stops,
+                    SUM(search_conducted) AS searches, MAX(stop_date) AS last_stop_date
+                    FROM police_stops
+                    WHERE vehicle_number IS NOT NULL
+                    GROUP BY vehicle_number
+                    HAVING COUNT(*) >= {profiles.REPEAT_STOPS}
+                    ORDER BY stops DESC, arrests DESC, vehicle_number
+                    LIMIT 20""",
+            "rollup_sql": f"""SELECT vehicle_number, stops, arrests, drug_stops, searches, DATE(last_seen) AS last_stop_date
+                    FROM vehicle_profiles
+                    WHERE stops >= {profiles.REPEAT_STOPS}
+                    ORDER BY stops DESC, arrests DESC, vehicle_number
+                    LIMIT 20""",
+            "chart": dict(x="stops", y="vehicle_number", color="arrests", orientation="h", title="🔁 Repeat Offenders"),
+        },
+    },
+    "🧍 Demographic-Based": {
+        "🧍 Driver age group with highest arrest rate": {
+            "sql": """ SELECT
+                    CASE
+                        WHEN driver_age BETWEEN 18 AND 25 THEN '18-25'
+                        WHEN driver_age BETWEEN 26 AND 35 THEN '26-35'
+                        WHEN driver_age BETWEEN 36 AND 45 THEN '36-45'
+                        WHEN driver_age BETWEEN 46 AND 60 THEN '46-60'
+                        ELSE '60+'
+                    END AS age_group,
+                    AVG(is_arrested)*100 aS arrest_rate
+                    FROM police_stops
+                    GROUP BY age_group
+                    ORDER BY arrest_rate DESC""",
+            "rollup_sql": """SELECT
+                    CASE
+                        WHEN driver_age BETWEEN 18 AND 25 THEN '18-25'
+                        WHEN driver_age BETWEEN 26 AND 35 THEN '26-35'
+                        WHEN driver_age BETWEEN 36 AND 45 THEN '36-45'
+                        WHEN driver_age BETWEEN 46 AND 60 THEN '46-60'
+                        ELSE '60+'
+                    END AS age_group,
+                    100.0 * SUM(arrests) / SUM(stops) AS arrest_rate
+                    FROM rollup_stop_profile
+                    GROUP BY age_group
+                    ORDER BY arrest_rate DESC""",
+            "chart": dict(x="age_group", y="arrest_rate", color="age_group", title="🧍 Arrest Rate by Driver Age (%)"),
+        },
+        "🧍 Gender distribution of drivers stopped in each country": {
+            "sql": """SELECT country, driver_gender, COUNT(*) as total
+                    FROM police_stops
+                    GROUP BY country, driver_gender""",
+            "rollup_sql": """SELECT country, driver_gender, SUM(stops) AS total
+                    FROM rollup_stop_profile
+                    GROUP BY country, driver_gender""",
+            "chart": dict(x="country", y="total", color="driver_gender", barmode="group", title="🧍 Gender Distribution by Country"),
+            "live": ("country", "driver_gender"),
+        },
+        "🧍 Race & gender combination with highest search rate": {
+            "sql": """SELECT driver_race, driver_gender, AVG(search_conducted)*100 as search_rate
+                    FROM police_stops
+                    GROUP BY driver_race, driver_gender
+                    ORDER BY search_rate DESC""",
+            "rollup_sql": """SELECT driver_race, driver_gender, 100.0 * SUM(searches) / SUM(stops) AS search_rate
+                    FROM rollup_stop_profile
+                    GROUP BY driver_race, driver_gender
+                    ORDER BY search_rate DESC""",
+            "chart": dict(x="search_rate", y="driver_race", color="driver_gender", orientation="h", title="🧍 Race & Gender Search Rates (%)"),
+        },
+    },
+    "🕒 Time & Duration Based": {
+        "🕒 Time of day with most traffic stops": {
+            "sql": """SELECT HOUR(stop_time) as hour, COUNT(*) as total
+                    FROM police_stops
+                    GROUP BY hour ORDER BY hour""",
+            "rollup_sql": """SELECT stop_hour AS hour, SUM(stops) AS total
+                    FROM rollup_stop_time
+                    GROUP BY hour ORDER BY hour""",
+            "chart": dict(x="hour", y="total", title="🕒 Stops by Hour of Day"),
+            "live": ("hour",),
+        },
+        "🕒 Average stop duration for different violations": {
+            "sql": """SELECT violation,ROUND(AVG(
+                    CASE stop_duration
+                        WHEN '0-15 Min' THEN 7.5
+                        WHEN '16-30 Min' THEN 23
+                        WHEN '30+ Min' THEN 35
+                        ELSE 0
+                        END
+                    ), 2) AS avg_duration
+                    FROM police_stops
+                    GROUP BY violation
+                    ORDER BY avg_duration DESC;""",
+            "rollup_sql": """SELECT violation, ROUND(1.0 * SUM(
+                    CASE stop_duration
+                        WHEN '0-15 Min' THEN 7.5
+                        WHEN '16-30 Min' THEN 23
+                        WHEN '30+ Min' THEN 35
+                        ELSE 0
+                        END * stops
+                    ) / SUM(stops), 2) AS avg_duration
+                    FROM rollup_stop_profile
+                    GROUP BY violation
+                    ORDER BY avg_duration DESC""",
+            "chart": dict(x="violation", y="avg_duration", title="🕒 Average Stop Duration by Violation (minutes)"),
+        },
+        "🕒 Are night stops more likely to lead to arrests?": {
+            "sql": """SELECT
+                    CASE
+                        WHEN HOUR(stop_time) >= 20 OR HOUR(stop_time) < 6 THEN 'Night'
+                        ELSE 'Day'
+                    END AS time_period,
+                    ROUND(AVG(is_arrested) * 100, 2) AS arrest_rate
+                    FROM police_stops
+                    GROUP BY time_period;""",
+            "rollup_sql": """SELECT
+                    CASE
+                        WHEN stop_hour >= 20 OR stop_hour BETWEEN 0 AND 5 THEN 'Night'
+                        ELSE 'Day'
+                    END AS time_period,
+                    ROUND(100.0 * SUM(arrests) / SUM(stops), 2) AS arrest_rate
+                    FROM rollup_stop_time
+                    GROUP BY time_period""",
+            "chart": dict(x="time_period", y="arrest_rate", title="🕒 Arrest Rate Day vs Night (%)"),
+        },
+    },
+    "⚖️ Violation-Based": {
+        "⚖️ Violations most associated with searches or arrests": {
+            "sql": """SELECT violation,AVG(search_conducted)*100 as search_rate,AVG(is_arrested)*100 as arrest_rate
+                    FROM police_stops
+                    GROUP BY violation
+                    ORDER BY search_rate DESC""",
+            "rollup_sql": """SELECT violation, 100.0 * SUM(searches) / SUM(stops) AS search_rate, 100.0 * SUM(arrests) / SUM(stops) AS arrest_rate
+                    FROM rollup_stop_profile
+                    GROUP BY violation
+                    ORDER BY search_rate DESC""",
+            "chart": dict(x="violation", y="search_rate", title="⚖️ Violations with Highest Search Rate (%)"),
+        },
+        "⚖️ Violations most common among younger drivers (<25)": {
+            "sql": """SELECT violation, COUNT(*) as total
+                    FROM police_stops
+                    WHERE driver_age < 25
+                    GROUP BY violation
+                    ORDER BY total DESC""",
+            "rollup_sql": """SELECT violation, SUM(stops) AS total
+                    FROM rollup_stop_profile
+                    WHERE driver_age BETWEEN 0 AND 24
+                    GROUP BY violation
+                    ORDER BY total DESC""",
+            "chart": dict(x="violation", y="total", title="⚖️ Violations by Drivers Under 25"),
+            "live": ("violation",),
+        },
+        "⚖️ Violations that rarely result in search or arrest": {
+            "sql": """SELECT violation, AVG(search_conducted)*100 as search_rate, AVG(is_arrested)*100 as arrest_rate
+                    FROM police_stops
+                    GROUP BY violation
+                    ORDER BY search_rate ASC, arrest_rate ASC""",
+            "rollup_sql": """SELECT violation, 100.0 * SUM(searches) / SUM(stops) AS search_rate, 100.0 * SUM(arrests) / SUM(stops) AS arrest_rate
+                    FROM rollup_stop_profile
+                    GROUP BY violation
+                    ORDER BY search_rate ASC, arrest_rate ASC""",
+            "chart": dict(x="violation", y=["search_rate", "arrest_rate"], title="⚖️ Violations with Lowest Search/Arrest Rates (%)", barmode="group"),
+        },
+    },
+    "🌍 Location-Based": {
+        "🌍 Countries reporting highest rate of drug-related stops": {
+            "sql": """SELECT country, AVG(drugs_related_stop)*100 as drug_rate
+                    FROM police_stops
+                    GROUP BY country
+                    ORDER BY drug_rate DESC""",
+            "rollup_sql": """SELECT country, 100.0 * SUM(drug_stops) / SUM(stops) AS drug_rate
+                    FROM rollup_stop_profile
+                    GROUP BY country
+                    ORDER BY drug_rate DESC""",
+            "chart": dict(x="country", y="drug_rate", title="🌍 Drug-Related Stop Rate by Country (%)"),
+        },
+        "🌍 Arrest rate by country and violation": {
+            "sql": """SELECT country, violation, AVG(is_arrested)*100 as arrest_rate
+                    FROM police_stops
+                    GROUP BY country, violation
+                    ORDER BY arrest_rate DESC""",
+            "rollup_sql": """SELECT country, violation, 100.0 * SUM(arrests) / SUM(stops) AS arrest_rate
+                    FROM rollup_stop_profile
+                    GROUP BY country, violation
+                    ORDER BY arrest_rate DESC""",
+            "chart": dict(x="arrest_rate", y="violation", color="country", orientation="h", title="🌍 Arrest Rate by Country & Violation (%)"),
+        },
+        "🌍 Which country has the most stops with search conducted": {
+            "sql": """SELECT country, COUNT(*) as searches FROM police_stops WHERE search_conducted = TRUE GROUP BY country
+                    ORDER BY searches DESC""",
+            "rollup_sql": """SELECT country, SUM(searches) AS searches
+                    FROM rollup_stop_profile
+                    GROUP BY country
+                    HAVING SUM(searches) > 0
+                    ORDER BY searches DESC""",
+            "chart": dict(x="country", y="searches", title="🌍 Searches by Country"),
+            "live": ("country",),
+        },
+    },
+}
+
+COMPLEX_REPORTS = {
+    "📅 Yearly breakdown of stops and arrests by country": {
+        "sql": """SELECT country,year,total_stops,total_arrests,
+                    AVG(total_stops) OVER (PARTITION BY country ORDER BY year) AS cumulative_stops,
+                    AVG(total_arrests) OVER (PARTITION BY country ORDER BY year) AS cumulative_arrests
+                    FROM (
+                        SELECT country,YEAR(stop_date) AS year,COUNT(*) AS total_stops,
+                        SUM(is_arrested) AS total_arrests
+                        FROM police_stops
+                        GROUP BY country, YEAR(stop_date)
+                    ) AS year_wise_data
+                    ORDER BY country, year""",
+        "rollup_sql": """SELECT country, year, total_stops, total_arrests,
+                    AVG(total_stops) OVER (PARTITION BY country ORDER BY year) AS cumulative_stops,
+                    AVG(total_arrests) OVER (PARTITION BY country ORDER BY year) AS cumulative_arrests
+                    FROM (
+                        SELECT country, stop_year AS year, SUM(stops) AS total_stops,
+                        SUM(arrests) AS total_arrests
+                        FROM rollup_stop_time
+                        GROUP BY country, stop_year
+                    ) AS year_wise_data
+                    ORDER BY country, year""",
+        "chart": dict(x="year", y="total_arrests", color="country", barmode="group", title="🔴 Yearly Arrests by Country",
+                      labels={"total_arrests": "Total Arrests", "year": "Year"}),
+    },
+    "📊 Driver violation trends by age and race": {
+        "sql": """
+                    SELECT
+                    driver_race,
+                    CASE
+                        WHEN driver_age BETWEEN 18 AND 25 THEN '18-25'
+                        WHEN driver_age BETWEEN 26 AND 40 THEN '26-40'
+                        WHEN driver_age BETWEEN 41 AND 60 THEN '41-60'
+                        ELSE '60+'
+                    END AS age_group,
+                    violation,
+                    COUNT(*) AS violation_count
+                    FROM police_stops
+                    GROUP BY driver_race, age_group, violation
+                    ORDER BY driver_race, age_group""",
+        "rollup_sql": """
+                    SELECT
+                    driver_race,
+                    CASE
+                        WHEN driver_age BETWEEN 18 AND 25 THEN '18-25'
+                        WHEN driver_age BETWEEN 26 AND 40 THEN '26-40'
+                        WHEN driver_age BETWEEN 41 AND 60 THEN '41-60'
+                        ELSE '60+'
+                    END AS age_group,
+                    violation,
+                    SUM(stops) AS violation_count
+                    FROM rollup_stop_profile
+                    GROUP BY driver_race, age_group, violation
+                    ORDER BY driver_race, age_group""",
+        "chart": dict(x="violation", y="violation_count", color="age_group", facet_col="driver_race",
+                      title="📊 Driver Violation Trends by Age Group and Race",
+                      labels={"violation": "Violation", "violation_count": "Count", "age_group": "Age Group"}),
+        "live": ("driver_race", "age_group", "violation"),
+    },
+    "⏱️ Time period analysis of stops (year/month/hour)": {
+        "sql": """
+                    SELECT
+                    YEAR(stop_date) AS year,
+                    MONTH(stop_date) AS month,
+                    HOUR(stop_time) AS hour,
+                    COUNT(*) AS total_stops
+                    FROM police_stops
+                    GROUP BY year, month, hour
+                    ORDER BY year, month, hour""",
+        "rollup_sql": """
+                    SELECT
+                    stop_year AS year,
+                    stop_month AS month,
+                    stop_hour AS hour,
+                    SUM(stops) AS total_stops
+                    FROM rollup_stop_time
+                    GROUP BY year, month, hour
+                    ORDER BY year, month, hour""",
+        "chart": dict(x="hour", y="total_stops", color="month", facet_col="year",
+                      title="⏱️ Time Period Analysis of Stops (Year/Month/Hour)",
+                      labels={"total_stops": "Total Stops", "hour": "Hour of Day"}),
+        "live": ("year", "month", "hour"),
+    },
+    "📈 Violations with high search and arrest rates (ranked)": {
+        "sql": """
+                    SELECT
+                    violation,
+                    COUNT(*) AS total_stops,
+                    ROUND(100.0 * SUM(CASE WHEN search_conducted = TRUE THEN 1 ELSE 0 END) / COUNT(*), 2) AS search_rate_percent,
+                    ROUND(100.0 * SUM(CASE WHEN is_arrested = TRUE THEN 1 ELSE 0 END) / COUNT(*), 2) AS arrest_rate_percent,
+                    RANK() OVER (ORDER BY SUM(CASE WHEN search_conducted = TRUE THEN 1 ELSE 0 END) DESC) AS search_rank,
+                    RANK() OVER (ORDER BY SUM(CASE WHEN is_arrested = TRUE THEN 1 ELSE 0 END) DESC) AS arrest_rank
+                    FROM police_stops
+                    GROUP BY violation
+                    ORDER BY total_stops DESC""",
+        "rollup_sql": """
+                    SELECT
+                    violation,
+                    SUM(stops) AS total_stops,
+                    ROUND(100.0 * SUM(searches) / SUM(stops), 2) AS search_rate_percent,
+                    ROUND(100.0 * SUM(arrests) / SUM(stops), 2) AS arrest_rate_percent,
+                    RANK() OVER (ORDER BY SUM(searches) DESC) AS search_rank,
+                    RANK() OVER (ORDER BY SUM(arrests) DESC) AS arrest_rank
+                    FROM rollup_stop_profile
+                    GROUP BY violation
+                    ORDER BY total_stops DESC""",
+        "chart": dict(x="violation", y=["search_rate_percent", "arrest_rate_percent"],
+                      title="📈 Violations with High Search and Arrest Rates (%)",
+                      labels={"value": "Rate (%)", "variable": "Type"}),
+    },
+    "🌐 Driver demographics by country (age/gender/race)": {
+        "sql": """
+                    SELECT
+                    country,
+                    driver_gender,
+                    driver_race,
+                    ROUND(AVG(driver_age), 1) AS avg_age,
+                    COUNT(*) AS total_stops
+                    FROM police_stops
+                    GROUP BY country, driver_gender, driver_race
+                    ORDER BY country, total_stops DESC""",
+        "rollup_sql": """
+                    SELECT
+                    country,
+                    driver_gender,
+                    driver_race,
+                    ROUND(1.0 * SUM(CASE WHEN driver_age >= 0 THEN driver_age * stops END)
+                        / SUM(CASE WHEN driver_age >= 0 THEN stops END), 1) AS avg_age,
+                    SUM(stops) AS total_stops
+                    FROM rollup_stop_profile
+                    GROUP BY country, driver_gender, driver_race
+                    ORDER BY country, total_stops DESC""",
+        "chart": dict(x="country", y="total_stops", color="driver_gender", facet_col="driver_race", title="🌍 Driver Demographics by Country"),
+    },
+    "🥇 Top 5 violations with highest arrest rates": {
+        "sql": """
+                    SELECT
+                    violation,
+                    AVG(is_arrested) * 100 AS arrest_rate
+                    FROM police_stops
+                    GROUP BY violation
+                    ORDER BY arrest_rate DESC
+                    LIMIT 5""",
+        "rollup_sql": """
+                    SELECT
+                    violation,
+                    100.0 * SUM(arrests) / SUM(stops) AS arrest_rate
+                    FROM rollup_stop_profile
+                    GROUP BY violation
+                    ORDER BY arrest_rate DESC
+                    LIMIT 5""",
+        "chart": dict(x="violation", y="arrest_rate", title="🥇 Top 5 Violations with Highest Arrest Rates (%)",
+                      labels={"arrest_rate": "Arrest Rate (%)"}),
+    },
+}
+
+
+def all_reports():
+    for category in MEDIUM_REPORTS.values():
+        yield from category.items()
+    yield from COMPLEX_REPORTS.items()
+
+
+def report_sql(report):
+    if rollups.ENABLED and report.get("rollup_sql"):
+        return report["rollup_sql"]
+    return report["sql"]
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+MAX_BYTES = int(os.environ.get("SECURECHECK_CACHE_MB", "64")) * 1024 * 1024
+TTL = float(os.environ.get("SECURECHECK_CACHE_TTL", "600"))
+
+# Write counters per table. Every insert or delete bumps the counter, which
+# makes every cached result computed at an older version unreachable.
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def table_version(table="police_stops"):
+    with _versions_lock:
+        return _versions.get(table, 0)
+
+
+def bump_version(table="police_stops"):
+    with _versions_lock:
+        _versions[table] = _versions.get(table, 0) + 1
+        version = _versions[table]
+    results.purge(table, version)
+    return version
+
+
+def normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+def cache_key(sql, params=None):
+    text = normalize_sql(sql) + "\x00" + repr(tuple(params or ()))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_bytes=MAX_BYTES, ttl=TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, table, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_table, entry_version, expires, df, size = entry
+            if entry_table != table or entry_version != version or expires < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def put(self, key, table, version, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (table, version, time.monotonic() + self.ttl, df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def purge(self, table, version):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[0] == table and entry[1] != version]
+            for key in stale:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[4]
+
+
+results = ResultCache()
+
+
+def cached_fetch(fetch, sql, params=None, table="police_stops", version=None):
+    # `version` lets sources with their own change marker (the Parquet
+    # snapshot) stand in for this process's write counter.
+    key = cache_key(sql, params)
+    if version is None:
+        version = table_version(table)
+    df = results.get(key, table, version)
+    if df is None:
+        df = fetch(sql, params)
+        results.put(key, table, version, df)
+    return df
@@ -0,0 +1,250 @@
+import argparse
+import datetime
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+import database
+import dialect
+import exports
+import ledger
+import telemetry
+
+# Keeps police_stops to the last RETAIN_YEARS calendar years. Older stops
+# are written to zstd Parquet files under ARCHIVE_DIR, one Hive-style
+# stop_year=YYYY directory per year, then deleted through the ledger so
+# the rollups and vehicle profiles follow; change feed readers get one
+# reload marker per year rather than a change per stop. On MySQL the table is range
+# partitioned by year on stop_date (migration 2); emptied partitions are
+# dropped and upcoming years are split off the MAXVALUE partition. The
+# archive stays queryable through DuckDB.
+ARCHIVE_DIR = os.environ.get("SECURECHECK_ARCHIVE_DIR", "archive")
+RETAIN_YEARS = int(os.environ.get("SECURECHECK_RETAIN_YEARS", "3"))
+# Yearly partitions kept ready beyond the current year.
+YEARS_AHEAD = 1
+PARTITIONS_SQL = """SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound, TABLE_ROWS AS table_rows
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'police_stops' AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION"""
+
+
+class ArchiveUnavailable(Exception):
+    pass
+
+
+def cutoff(today=None):
+    # Stops dated before this go to the archive.
+    today = today or datetime.date.today()
+    return datetime.date(today.year - RETAIN_YEARS + 1, 1, 1)
+
+
+def _partition(year):
+    return f"PARTITION p{year} VALUES LESS THAN ('{year + 1}-01-01')"
+
+
+def partition_statements(cursor):
+    # Migration 2: one partition per year from the oldest stop to
+    # YEARS_AHEAD after this one. MySQL wants the partitioning column in
+    # every unique key, so the primary key becomes (id, stop_date).
+    cursor.execute("SELECT MIN(stop_date) FROM police_stops")
+    oldest = cursor.fetchone()[0]
+    this_year = datetime.date.today().year
+    first = min(pd.Timestamp(oldest).year, this_year) if oldest is not None else this_year
+    partitions = [_partition(year) for year in range(first, this_year + YEARS_AHEAD + 1)]
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return [
+        "ALTER TABLE police_stops DROP PRIMARY KEY, ADD PRIMARY KEY (id, stop_date)",
+        "ALTER TABLE police_stops PARTITION BY RANGE COLUMNS (stop_date) (\n    " + ",\n    ".join(partitions) + "\n)",
+    ]
+
+
+def check_stop_dates(cursor):
+    cursor.execute("SELECT COUNT(*) FROM police_stops WHERE stop_date IS NULL")
+    missing = cursor.fetchone()[0]
+    return [f"{missing} stops have no stop_date and cannot be placed in a partition"] if missing else []
+
+
+def partitions():
+    # Yearly partitions of police_stops; empty on an unpartitioned table.
+    if database.dialect_name() != "mysql":
+        return pd.DataFrame(columns=["name", "bound", "table_rows"])
+    return database.fetch_data(PARTITIONS_SQL)
+
+
+def _years(names):
+    return sorted(int(name[1:]) for name in names if name[1:].isdigit())
+
+
+def add_partitions(db, today=None):
+    # Splits the coming years off pmax before any stops are dated in them.
+    years = _years(partitions()["name"])
+    if not years:
+        return []
+    wanted = list(range(years[-1] + 1, (today or datetime.date.today()).year + YEARS_AHEAD + 1))
+    if wanted:
+        specs = [_partition(year) for year in wanted] + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"]
+        db.cursor().execute(f"ALTER TABLE police_stops REORGANIZE PARTITION pmax INTO ({', '.join(specs)})")
+    return wanted
+
+
+def drop_partitions(db, before):
+    # Drops the yearly partitions that end on or before `before` and hold
+    # no stops. A partition still holding stops (logged with an old date
+    # after the archive run read its years) is kept for the next run:
+    # DROP PARTITION would delete them unarchived and behind the ledger's
+    # back. Returns (dropped, kept).
+    cursor = db.cursor()
+    dropped, kept = [], []
+    for year in _years(partitions()["name"]):
+        if datetime.date(year + 1, 1, 1) > before:
+            continue
+        cursor.execute(f"SELECT COUNT(*) FROM police_stops PARTITION (p{year})")
+        (dropped if cursor.fetchone()[0] == 0 else kept).append(year)
+    if dropped:
+        cursor.execute(f"ALTER TABLE police_stops DROP PARTITION {', '.join(f'p{year}' for year in dropped)}")
+    return dropped, kept
+
+
+def pending_years(before):
+    df = database.fetch_data("""SELECT YEAR(stop_date) AS year, COUNT(*) AS stops, MAX(id) AS last_id
+        FROM police_stops WHERE stop_date < %s GROUP BY YEAR(stop_date) ORDER BY year""", (before,))
+    return [(int(year), int(stops), int(last_id)) for year, stops, last_id in df.itertuples(index=False)]
+
+
+def archive_year(db, year, last_id, before, directory=ARCHIVE_DIR):
+    # Writes the year's stops dated before `before` up to last_id to a new
+    # file, then deletes exactly those. Stops logged meanwhile with an old
+    # date have a higher id and wait for the next run. Returns (archived,
+    # deleted, path).
+    where = "stop_date >= %s AND stop_date < %s AND id <= %s"
+    params = [datetime.date(year, 1, 1), min(before, datetime.date(year + 1, 1, 1)), last_id]
+    folder = os.path.join(directory, f"stop_year={year}")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"part-{datetime.datetime.now():%Y%m%d%H%M%S}-{last_id}.parquet")
+    with telemetry.span("retention.archive") as fields:
+        chunks = exports.stream_rows(f"SELECT * FROM police_stops WHERE {where} ORDER BY id", params)
+        with open(path + ".tmp", "wb") as handle:
+            archived = exports.write_parquet(chunks, handle)
+        # Only a complete file is renamed into the archive.
+        os.replace(path + ".tmp", path)
+        deleted = ledger.delete_stops(db, where, params, bulk=True)
+        fields["rows"] = archived
+    return archived, deleted, path
+
+
+def run(before=None, directory=ARCHIVE_DIR, dry_run=False):
+    before = before or cutoff()
+    years = pending_years(before)
+    if dry_run:
+        for year, stops, _ in years:
+            print(f"⏳ {year}: {stops} stops would be archived")
+        return True
+    ok = True
+    db = database.connect()
+    try:
+        for year, stops, last_id in years:
+            started = time.perf_counter()
+            archived, deleted, path = archive_year(db, year, last_id, before, directory)
+            if archived != deleted:
+                ok = False
+                print(f"❌ {year}: wrote {archived} stops to {path} but deleted {deleted}")
+            else:
+                print(f"✅ {year}: {archived} stops moved to {path} in {time.perf_counter() - started:.1f}s")
+        if database.dialect_name() == "mysql":
+            if not ok:
+                print("⏳ No partitions dropped while a year is only partly archived")
+            else:
+                dropped, kept = drop_partitions(db, before)
+                if dropped:
+                    print(f"✅ Dropped partitions {', '.join(f'p{year}' for year in dropped)}")
+                if kept:
+                    print(f"⏳ Kept partitions {', '.join(f'p{year}' for year in kept)}: stops arrived after this run started")
+            added = add_partitions(db)
+            if added:
+                print(f"✅ Added partitions {', '.join(f'p{year}' for year in added)}")
+    finally:
+        db.close()
+    return ok
+
+
+def archive_files(directory=ARCHIVE_DIR):
+    return sorted(glob.glob(os.path.join(directory, "stop_year=*", "*.parquet")))
+
+
+def open_archive(directory=ARCHIVE_DIR):
+    # An in-process DuckDB database whose police_stops reads the archive,
+    # with the columns typed as the live table has them.
+    import duckdb
+
+    if not archive_files(directory):
+        raise ArchiveUnavailable(f"No archived stops in {directory!r}")
+    con = duckdb.connect()
+    pattern = os.path.join(directory, "stop_year=*", "*.parquet").replace("'", "''")
+    con.execute(f"""CREATE VIEW police_stops AS
+        SELECT * EXCLUDE (stop_year) REPLACE (CAST(stop_time AS TIME) AS stop_time)
+        FROM read_parquet('{pattern}', hive_partitioning = true)""")
+    return con
+
+
+def fetch_archived(query, params=None, directory=ARCHIVE_DIR):
+    # Runs a dashboard query against the archived stops instead of the
+    # live table.
+    con = open_archive(directory)
+    try:
+        with telemetry.span("retention.query", sql=query):
+            return con.execute(dialect.translate(query, "duckdb"), params or []).df()
+    finally:
+        con.close()
+
+
+def status(directory=ARCHIVE_DIR):
+    print(f"📅 Keeping {RETAIN_YEARS} years; stops before {cutoff()} are archived to {directory!r}")
+    table = partitions()
+    if not table.empty:
+        print("📦 Partitions:")
+        for name, bound, table_rows in table.itertuples(index=False):
+            print(f"   {name} < {bound}: about {table_rows} rows")
+    files = archive_files(directory)
+    if files:
+        years = fetch_archived("""SELECT YEAR(stop_date) AS year, COUNT(*) AS stops
+            FROM police_stops GROUP BY year ORDER BY year""", directory=directory)
+        size = sum(os.path.getsize(path) for path in files) / 1024 / 1024
+        print(f"🗄️ {len(files)} archive files, {size:.1f} MB:")
+        for year, stops in years.itertuples(index=False):
+            print(f"   {year}: {stops} stops")
+    for year, stops, _ in pending_years(cutoff()):
+        print(f"⏳ {year}: {stops} stops due for archiving")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive police_stops older than the retention period and query the archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="move stops older than the retention period to the archive")
+    run_parser.add_argument("--before", type=datetime.date.fromisoformat,
+                            help=f"archive stops dated before this day (default: keep {RETAIN_YEARS} calendar years)")
+    run_parser.add_argument("--dry-run", action="store_true", help="only list what would be archived")
+    commands.add_parser("status", help="list partitions, archived years and stops due for archiving")
+    query = commands.add_parser("query", help="run a SQL query against the archived stops")
+    query.add_argument("sql", help="query on police_stops, e.g. \"SELECT COUNT(*) FROM police_stops\"")
+    for command in (run_parser, query):
+        command.add_argument("--dir", default=ARCHIVE_DIR, help=f"archive directory (default {ARCHIVE_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        sys.exit(0 if run(args.before, args.dir, args.dry_run) else 1)
+    elif args.command == "status":
+        status()
+    else:
+        try:
+            with pd.option_context("display.width", 200, "display.max_rows", 100):
+                print(fetch_archived(args.sql, directory=args.dir).to_string(index=False))
+        except ArchiveUnavailable as err:
+            print(f"❌ {err}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import database
+import profiles
+
+# Reports read these summary tables, and profiles.py's vehicle_profiles,
+# instead of grouping police_stops. Set SECURECHECK_ROLLUPS=0 to fall back
+# to the base-table SQL.
+ENABLED = os.environ.get("SECURECHECK_ROLLUPS", "1") == "1"
+
+# Two grouping sets cover every report that groups by a fixed dimension.
+# Ages are kept exact rather than bucketed because the Medium and Complex
+# pages use different age bands. Key columns cannot be NULL, so missing
+# values are stored as '' or -1.
+ROLLUPS = {
+    "rollup_stop_profile": {
+        "country": ("VARCHAR(50)", "COALESCE(country, '')"),
+        "violation": ("VARCHAR(50)", "COALESCE(violation, '')"),
+        "driver_gender": ("VARCHAR(10)", "COALESCE(driver_gender, '')"),
+        "driver_race": ("VARCHAR(20)", "COALESCE(driver_race, '')"),
+        "driver_age": ("SMALLINT", "COALESCE(driver_age, -1)"),
+        "stop_duration": ("VARCHAR(20)", "COALESCE(stop_duration, '')"),
+    },
+    "rollup_stop_time": {
+        "country": ("VARCHAR(50)", "COALESCE(country, '')"),
+        "stop_year": ("SMALLINT", "COALESCE(YEAR(stop_date), -1)"),
+        "stop_month": ("TINYINT", "COALESCE(MONTH(stop_date), -1)"),
+        "stop_hour": ("TINYINT", "COALESCE(HOUR(stop_time), -1)"),
+    },
+}
+
+MEASURES = {
+    "stops": "COUNT(*)",
+    "arrests": "COALESCE(SUM(is_arrested), 0)",
+    "searches": "COALESCE(SUM(search_conducted), 0)",
+    "drug_stops": "COALESCE(SUM(drugs_related_stop), 0)",
+}
+# Rows per derived table in record_insert(); SQLite allows at most 500
+# terms in one compound SELECT.
+INSERT_BATCH = 400
+
+
+def table_statements():
+    # Migration 5, together with profiles.table_statements.
+    statements = []
+    for table, dims in ROLLUPS.items():
+        columns = [f"{name} {sql_type} NOT NULL" for name, (sql_type, _) in dims.items()]
+        columns += [f"{name} BIGINT NOT NULL DEFAULT 0" for name in MEASURES]
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {table} (
+            {", ".join(columns)},
+            PRIMARY KEY ({", ".join(dims)})
+        )""")
+    return statements
+
+
+def create_tables(cursor):
+    for statement in table_statements():
+        cursor.execute(statement)
+
+
+def _apply(cursor, source, where, params, sign):
+    for table, dims in ROLLUPS.items():
+        prefix = "-" if sign < 0 else ""
+        select = [expr for _, expr in dims.values()]
+        select += [prefix + expr for expr in MEASURES.values()]
+        updates = ", ".join(f"{name} = {name} + VALUES({name})" for name in MEASURES)
+        group_by = ", ".join(str(i + 1) for i in range(len(dims)))
+        cursor.execute(f"""INSERT INTO {table} ({", ".join(dims)}, {", ".join(MEASURES)})
+            SELECT {", ".join(select)}
+            FROM {source}
+            WHERE {where}
+            GROUP BY {group_by}
+            ON DUPLICATE KEY UPDATE {updates}""", params)
+
+
+def record_insert(cursor, columns, rows):
+    # New stops are fed through the same GROUP BY as a rebuild, from a
+    # derived table of literal rows, so both paths bucket identically.
+    if not ENABLED or not rows:
+        return
+    select = "SELECT " + ", ".join(f"%s AS {column}" for column in columns)
+    for start in range(0, len(rows), INSERT_BATCH):
+        batch = rows[start:start + INSERT_BATCH]
+        source = "(" + " UNION ALL ".join([select] * len(batch)) + ") AS new_stops"
+        params = [value for row in batch for value in row]
+        _apply(cursor, source, "1 = 1", params, 1)
+
+
+def record_insert_from(cursor, source):
+    # Bulk loads: every row of `source` is about to be appended.
+    if ENABLED:
+        _apply(cursor, source, "1 = 1", [], 1)
+
+
+def record_delete(cursor, where, params):
+    # Must run before the DELETE itself, inside the same transaction.
+    if not ENABLED:
+        return
+    _apply(cursor, "police_stops", where, params, -1)
+    for table in ROLLUPS:
+        cursor.execute(f"DELETE FROM {table} WHERE stops <= 0")
+
+
+def fill(db):
+    # Recomputes every rollup and vehicle profile on db, uncommitted;
+    # also migration 5's backfill.
+    cursor = db.cursor()
+    create_tables(cursor)
+    for table in ROLLUPS:
+        cursor.execute(f"DELETE FROM {table}")
+    _apply(cursor, "police_stops", "1 = 1", [], 1)
+    profiles.rebuild(db)
+
+
+def rebuild():
+    db = database.connect()
+    try:
+        fill(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _base_groups(table):
+    dims = ROLLUPS[table]
+    select = [f"{expr} AS {name}" for name, (_, expr) in dims.items()]
+    select += [f"{expr} AS {name}" for name, expr in MEASURES.items()]
+    group_by = ", ".join(str(i + 1) for i in range(len(dims)))
+    return f"SELECT {', '.join(select)} FROM police_stops GROUP BY {group_by}"
+
+
+def _comparable(df):
+    df = df.copy()
+    for column in df.columns:
+        try:
+            df[column] = pd.to_numeric(df[column]).astype(float).round(2)
+        except (TypeError, ValueError):
+            df[column] = df[column].astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _same_frames(left, right):
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    return _comparable(left).equals(_comparable(right))
+
+
+def check():
+    import reports
+
+    problems = 0
+    for table, dims in ROLLUPS.items():
+        expected = database.fetch_data(_base_groups(table))
+        actual = database.fetch_data(f"SELECT {', '.join(list(dims) + list(MEASURES))} FROM {table}")
+        if _same_frames(expected, actual):
+            print(f"✅ {table}: {len(actual)} groups match police_stops")
+        else:
+            problems += 1
+            print(f"❌ {table}: {len(actual)} groups, police_stops gives {len(expected)}")
+
+    db = database.connect()
+    try:
+        profile_problems = profiles.check(db)
+    finally:
+        db.close()
+    if profile_problems:
+        problems += 1
+        print(f"❌ {profiles.TABLE}: {len(profile_problems)} differences from police_stops, e.g. {profile_problems[0]}")
+    else:
+        print(f"✅ {profiles.TABLE} matches police_stops")
+
+    for title, report in reports.all_reports():
+        if not report.get("rollup_sql"):
+            continue
+        if _same_frames(database.fetch_data(report["sql"]), database.fetch_data(report["rollup_sql"])):
+            print(f"✅ {title}")
+        else:
+            problems += 1
+            print(f"❌ {title}: rollup result differs from police_stops")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the SecureCheck report rollup tables.")
+    parser.add_argument("command", choices=["rebuild", "check"],
+                        help="rebuild: recompute the rollups from police_stops; check: compare them against it")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rebuild()
+        print("✅ Rollups rebuilt from police_stops")
+    else:
+        sys.exit(1 if check() else 0)
+
+
+if __name__ == "__main__":
+    main()
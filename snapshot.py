@@ -0,0 +1,150 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+import database
+import dialect
+import telemetry
+
+# Columnar copy of police_stops for the analytics pages, partitioned by
+# country and year as Hive-style directories of Parquet files.
+SNAPSHOT_DIR = os.environ.get("SECURECHECK_SNAPSHOT_DIR", "snapshot")
+STATE_FILE = "_state.json"
+FLAG_COLUMNS = ("search_conducted", "is_arrested", "drugs_related_stop")
+
+
+class SnapshotUnavailable(Exception):
+    pass
+
+
+def _state_path(directory):
+    return os.path.join(directory, STATE_FILE)
+
+
+def read_state(directory=SNAPSHOT_DIR):
+    path = _state_path(directory)
+    if not os.path.exists(path):
+        return {"last_id": 0, "rows": 0, "exported_at": None}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _write_state(directory, state):
+    tmp = _state_path(directory) + ".tmp"
+    with open(tmp, "w") as handle:
+        json.dump(state, handle)
+    os.replace(tmp, _state_path(directory))
+
+
+def _to_arrow(df):
+    import pyarrow as pa
+
+    df = df.copy()
+    df["stop_date"] = pd.to_datetime(df["stop_date"]).dt.date
+    # mysql.connector returns TIME columns as timedelta.
+    if pd.api.types.is_timedelta64_dtype(df["stop_time"]):
+        df["stop_time"] = (pd.Timestamp(0) + df["stop_time"]).dt.time
+    else:
+        # SQLite hands back the 'HH:MM:SS' text it stores.
+        df["stop_time"] = pd.to_datetime(df["stop_time"], format="%H:%M:%S").dt.time
+    for column in FLAG_COLUMNS:
+        df[column] = df[column].astype("Int8")
+    df["stop_year"] = pd.to_datetime(df["stop_date"]).dt.year.astype("Int16")
+    df = df.drop(columns=["stop_ts"], errors="ignore")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def export(directory=SNAPSHOT_DIR, full=False, chunksize=100000):
+    # Appends stops with an id above the last exported one. Rows deleted
+    # or changed in MySQL since then are only picked up by --full.
+    import pyarrow.dataset as ds
+
+    if full and os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+    state = read_state(directory)
+    batch = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+
+    exported = 0
+    while True:
+        df = database.fetch_data("SELECT * FROM police_stops WHERE id > %s ORDER BY id LIMIT %s",
+                                 (state["last_id"], chunksize))
+        if df.empty:
+            break
+        ds.write_dataset(
+            _to_arrow(df), directory, format="parquet",
+            partitioning=["country", "stop_year"], partitioning_flavor="hive",
+            basename_template=f"part-{batch}-{state['last_id']}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        state["last_id"] = int(df["id"].max())
+        state["rows"] += len(df)
+        exported += len(df)
+        # Saved after every chunk, so an interrupted export resumes.
+        state["exported_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        _write_state(directory, state)
+    return exported, state
+
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def open_view(directory=SNAPSHOT_DIR):
+    # An in-process DuckDB database whose police_stops reads the snapshot.
+    import duckdb
+
+    con = duckdb.connect()
+    pattern = os.path.join(directory, "**", "*.parquet").replace("'", "''")
+    con.execute(f"""CREATE VIEW police_stops AS
+        SELECT * EXCLUDE (stop_year)
+        FROM read_parquet('{pattern}', hive_partitioning = true)""")
+    return con
+
+
+def _duckdb(directory):
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = open_view(directory)
+    # A cursor is a separate connection to the same in-process database,
+    # which is what DuckDB needs for use from several threads.
+    return _connection.cursor()
+
+
+def fetch_data(query, params=None):
+    if not read_state(SNAPSHOT_DIR)["rows"]:
+        raise SnapshotUnavailable(f"No snapshot in {SNAPSHOT_DIR!r}; run python snapshot.py first")
+    con = _duckdb(SNAPSHOT_DIR)
+    try:
+        with telemetry.span("snapshot.query", sql=query):
+            return con.execute(dialect.translate(query, "duckdb"), params or []).df()
+    finally:
+        con.close()
+
+
+def version():
+    return read_state(SNAPSHOT_DIR)["last_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export police_stops to a partitioned Parquet snapshot.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help=f"snapshot directory (default {SNAPSHOT_DIR})")
+    parser.add_argument("--full", action="store_true", help="discard the snapshot and export every row again")
+    parser.add_argument("--chunksize", type=int, default=100000, help="rows fetched per query (default 100000)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    exported, state = export(args.dir, args.full, args.chunksize)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {exported} new rows exported in {elapsed:.1f}s; snapshot holds {state['rows']} rows up to id {state['last_id']}")
+
+
+if __name__ == "__main__":
+    main()
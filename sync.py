@@ -0,0 +1,411 @@
+import argparse
+import datetime
+import gzip
+import json
+import os
+import socket
+import sys
+import time
+import zlib
+
+import changes
+import database
+import entries
+import exports
+import ledger
+import telemetry
+
+# Offline-first check posts. A post runs the dashboard and entry API on
+# its own embedded ledger (SECURECHECK_DB_URL=sqlite:///post.db), so an
+# entry never waits on the link. `python sync.py push` ships the post's
+# stop_changes feed to the central ledger's /sync endpoint (entry_api.py)
+# in gzip-compressed JSON batches whenever the link is up.
+#
+# Ids are never sent: each ledger numbers its own stops, and a post's
+# stops are known to the central ledger as (post, change seq). The central
+# ledger keeps the last seq it applied for each post in sync_received,
+# updated in the same transaction as the stops, so a batch sent again
+# after a lost reply is skipped. Stops it already holds under the same
+# vehicle, date and time (entered at two posts, or loaded centrally) are
+# dropped as duplicates. Deletes and bulk loads at a post stay local.
+POST_ID = os.environ.get("SECURECHECK_POST_ID") or socket.gethostname()
+CENTRAL_URL = os.environ.get("SECURECHECK_CENTRAL_URL")
+CENTRAL_TOKEN = os.environ.get("SECURECHECK_CENTRAL_TOKEN")
+BATCH_ROWS = int(os.environ.get("SECURECHECK_SYNC_BATCH_ROWS", "2000"))
+INTERVAL = float(os.environ.get("SECURECHECK_SYNC_SECONDS", "30"))
+TIMEOUT = 60
+# Largest batch the central ledger will inflate.
+MAX_BATCH_BYTES = 64 * 1024 * 1024
+PUSHED_TABLE = "sync_pushed"
+RECEIVED_TABLE = "sync_received"
+
+TABLE_STATEMENTS = [
+    # At a post: the last change each central ledger has acknowledged.
+    # changes.prune keeps everything after it.
+    f"""CREATE TABLE {PUSHED_TABLE} (
+        target VARCHAR(255) NOT NULL PRIMARY KEY,
+        seq BIGINT NOT NULL,
+        pushed_at DATETIME
+    )""",
+    # At the central ledger: the last change applied from each post.
+    f"""CREATE TABLE {RECEIVED_TABLE} (
+        post_id VARCHAR(64) NOT NULL PRIMARY KEY,
+        seq BIGINT NOT NULL,
+        stops BIGINT NOT NULL,
+        duplicates BIGINT NOT NULL,
+        received_at DATETIME NOT NULL
+    )""",
+]
+
+
+class Offline(Exception):
+    pass
+
+
+class Rejected(Exception):
+    # The central ledger refused a batch; sending it again will not help.
+    def __init__(self, errors):
+        super().__init__(f"central ledger rejected the batch: {'; '.join(errors[:5])}")
+        self.errors = errors
+
+
+class OutOfOrder(ValueError):
+    # The central ledger has applied this post's changes up to `seq` only.
+    def __init__(self, seq):
+        super().__init__(f"expected changes after {seq}")
+        self.seq = seq
+
+
+# Post side.
+
+def _target(url):
+    return url.rstrip("/")
+
+
+def pushed_seq(target):
+    # Registers the target on first use, from the oldest change still in
+    # the feed, so changes.prune keeps every change it has not
+    # acknowledged yet.
+    db = database.connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute(f"SELECT seq FROM {PUSHED_TABLE} WHERE target = %s", (target,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(f"""SELECT COALESCE((SELECT MIN(seq) - 1 FROM {changes.TABLE}), seq)
+                FROM {changes.SEQ_TABLE} WHERE id = 1""")
+            row = cursor.fetchone()
+            cursor.execute(f"INSERT INTO {PUSHED_TABLE} (target, seq) VALUES (%s, %s)", (target, row[0]))
+            db.commit()
+        return int(row[0])
+    finally:
+        db.close()
+
+
+def _set_pushed(target, seq):
+    db = database.connect()
+    try:
+        db.cursor().execute(f"UPDATE {PUSHED_TABLE} SET seq = %s, pushed_at = %s WHERE target = %s",
+                            (seq, datetime.datetime.now(), target))
+        db.commit()
+    finally:
+        db.close()
+
+
+def read_changes(after, limit=BATCH_ROWS):
+    rows = database.fetch_data(f"""SELECT seq, op, {", ".join(ledger.COLUMNS)} FROM {changes.TABLE}
+        WHERE seq > %s ORDER BY seq LIMIT %s""", (after, limit))
+    if not rows.empty and int(rows["seq"].iloc[0]) != after + 1:
+        raise RuntimeError(f"changes {after + 1}-{int(rows['seq'].iloc[0]) - 1} were pruned before they were pushed")
+    return rows
+
+
+def encode(post, rows, compress=True):
+    # One batch: the inserted stops with their seq, and the seq range they
+    # cover, deletes and reload markers included.
+    stops = exports.normalize(rows[rows["op"] == changes.INSERT][["seq", *ledger.COLUMNS]])
+    stops = stops.astype(object).where(stops.notna(), None)
+    body = json.dumps({
+        "post": post,
+        "first_seq": int(rows["seq"].iloc[0]),
+        "last_seq": int(rows["seq"].iloc[-1]),
+        "columns": list(ledger.COLUMNS),
+        "stops": stops.values.tolist(),
+    }, default=str, separators=(",", ":")).encode("utf-8")
+    return gzip.compress(body, compresslevel=6) if compress else body
+
+
+class Link:
+    # HTTP to the central ledger's /sync. kbps and latency_ms simulate a
+    # slow link: each request first waits as long as sending it would take.
+    def __init__(self, url, token=CENTRAL_TOKEN, kbps=None, latency_ms=0, timeout=TIMEOUT):
+        self.target = _target(url)
+        self.url = self.target + "/sync"
+        self.kbps = kbps
+        self.latency = latency_ms / 1000
+        self.timeout = timeout
+        # Imported here, so the dashboard's sync panel does not load an
+        # HTTP client it never uses.
+        import requests
+
+        self.session = requests.Session()
+        self.dropped = (requests.ConnectionError, requests.Timeout)
+        if token:
+            self.session.headers["Authorization"] = "Bearer " + token
+
+    def send(self, body, compressed=True):
+        # The central ledger's reply, or raises Offline / OutOfOrder.
+        delay = self.latency + (len(body) * 8 / (self.kbps * 1000) if self.kbps else 0)
+        if delay:
+            time.sleep(delay)
+        headers = {"Content-Type": "application/json"}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
+        try:
+            response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+        except self.dropped as err:
+            raise Offline(f"central ledger unreachable: {err}") from None
+        if response.status_code == 409:
+            raise OutOfOrder(response.json()["seq"])
+        if response.status_code == 400:
+            raise Rejected(response.json().get("errors", []))
+        if response.status_code >= 500:
+            raise Offline(f"central ledger answered {response.status_code}: {response.text[:200]}")
+        if response.status_code != 200:
+            raise RuntimeError(f"central ledger rejected the batch ({response.status_code}): {response.text[:200]}")
+        return response.json()
+
+
+def push(link, post=POST_ID, batch_rows=BATCH_ROWS, compress=True):
+    # Sends every change not yet acknowledged, one batch at a time.
+    # Returns counts for the run; raises Offline when the link drops, with
+    # the batches sent so far kept.
+    target = link.target
+    seq = pushed_seq(target)
+    stats = {"batches": 0, "stops": 0, "inserted": 0, "duplicates": 0, "skipped": 0, "bytes": 0, "raw_bytes": 0, "seconds": 0.0}
+    started = time.perf_counter()
+    while True:
+        rows = read_changes(seq, batch_rows)
+        if rows.empty:
+            break
+        body = encode(post, rows, compress)
+        with telemetry.span("sync.batch") as fields:
+            try:
+                reply = link.send(body, compress)
+            except OutOfOrder as err:
+                # The central ledger is behind this post (restored from a
+                # backup, say): resend from where it is.
+                print(f"⏳ Central ledger has changes up to {err.seq}; resending from there")
+                seq = err.seq
+                _set_pushed(target, seq)
+                continue
+            fields["rows"] = len(rows)
+            fields["bytes"] = len(body)
+        seq = int(reply["seq"])
+        _set_pushed(target, seq)
+        stats["batches"] += 1
+        stats["stops"] += int((rows["op"] == changes.INSERT).sum())
+        stats["skipped"] += int((rows["op"] != changes.INSERT).sum())
+        stats["inserted"] += reply["inserted"]
+        stats["duplicates"] += reply["duplicates"]
+        stats["bytes"] += len(body)
+        stats["raw_bytes"] += len(gzip.decompress(body)) if compress else len(body)
+        if (rows["op"] == changes.RELOAD).any():
+            print("⏭️ Bulk loads and archive runs at this post are not pushed; repeat them on the central ledger")
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def waiting(target=CENTRAL_URL):
+    # Stops entered at this post that the central ledger has not got yet.
+    seq = pushed_seq(_target(target))
+    return int(database.fetch_data(f"SELECT COUNT(*) AS stops FROM {changes.TABLE} WHERE seq > %s AND op = %s",
+                                   (seq, changes.INSERT))["stops"].iloc[0])
+
+
+def run(link, every=INTERVAL, post=POST_ID, batch_rows=BATCH_ROWS):
+    # Pushes every `every` seconds; a dropped link just waits for the next
+    # round.
+    while True:
+        try:
+            stats = push(link, post, batch_rows)
+            if stats["batches"]:
+                print(f"✅ {stats['inserted']} stops pushed, {stats['duplicates']} duplicates, "
+                      f"{stats['bytes'] / 1024:.1f} kB in {stats['seconds']:.1f}s")
+        except Offline as err:
+            print(f"⏳ {err}; retrying in {every:g}s")
+        time.sleep(every)
+
+
+# Central side.
+
+def _inflate(body):
+    inflater = zlib.decompressobj(wbits=31)
+    try:
+        data = inflater.decompress(body, MAX_BATCH_BYTES)
+    except zlib.error as err:
+        raise ValueError(f"not gzip data: {err}") from None
+    if inflater.unconsumed_tail:
+        raise ValueError(f"batch is larger than {MAX_BATCH_BYTES} bytes uncompressed")
+    return data
+
+
+def decode(body, compressed):
+    batch = json.loads(_inflate(body) if compressed else body)
+    post = batch.get("post") if isinstance(batch, dict) else None
+    if not isinstance(post, str) or not 0 < len(post) <= 64:
+        raise ValueError("post must be a name of 1 to 64 characters")
+    if batch.get("columns") != list(ledger.COLUMNS):
+        raise ValueError(f"columns must be {list(ledger.COLUMNS)}")
+    if not isinstance(batch.get("first_seq"), int) or not isinstance(batch.get("last_seq"), int):
+        raise ValueError("first_seq and last_seq must be integers")
+    stops = batch.get("stops")
+    if not isinstance(stops, list) or any(not isinstance(stop, list) or len(stop) != len(ledger.COLUMNS) + 1 for stop in stops):
+        raise ValueError("each stop must be [seq, *columns]")
+    return batch
+
+
+def received(post):
+    df = database.fetch_data(f"SELECT seq FROM {RECEIVED_TABLE} WHERE post_id = %s", (post,))
+    return int(df["seq"].iloc[0]) if not df.empty else 0
+
+
+def validated(batch):
+    # (seq, stop) pairs checked as entry_api.py checks /stops, or raises
+    # entries.BatchRejected naming every bad stop. A post's own outcome
+    # is kept; is_arrested follows it, as at entry.
+    stops, errors = [], []
+    for seq, *values in batch["stops"]:
+        try:
+            if not isinstance(seq, int):
+                raise ValueError("seq must be an integer")
+            stop = entries.validate(dict(zip(ledger.COLUMNS, values)))
+        except (TypeError, ValueError) as err:
+            errors.append(f"change {seq}: {err}")
+            continue
+        stop["is_arrested"] = 1 if stop["stop_outcome"] == "Arrest" else 0
+        stops.append((seq, stop))
+    if errors:
+        raise entries.BatchRejected(errors)
+    return stops
+
+
+def receive(db, batch, attempts=3):
+    # Applies one post batch in one transaction. Returns (seq, inserted,
+    # duplicates); raises OutOfOrder if earlier changes are missing, and
+    # entries.BatchRejected before writing anything if a stop is invalid.
+    stops = validated(batch)
+    for attempt in range(1, attempts + 1):
+        try:
+            return _apply(db, batch, stops)
+        except database.DATA_ERRORS as err:
+            # Another post's copy of a stop was committed after the
+            # duplicate check read the ledger; uq_vehicle_stop refused
+            # this one. Read again, and it counts as a duplicate.
+            if not database.duplicate_key(err) or attempt == attempts:
+                raise
+
+
+def _apply(db, batch, stops):
+    cursor = db.cursor()
+    post = batch["post"]
+    # Written first, so concurrent batches from the same post queue up
+    # behind this one's lock.
+    cursor.execute(f"""INSERT INTO {RECEIVED_TABLE} (post_id, seq, stops, duplicates, received_at)
+        VALUES (%s, 0, 0, 0, %s) ON DUPLICATE KEY UPDATE received_at = VALUES(received_at)""",
+                   (post, datetime.datetime.now()))
+    cursor.execute(f"SELECT seq FROM {RECEIVED_TABLE} WHERE post_id = %s", (post,))
+    seen = int(cursor.fetchone()[0])
+    if batch["first_seq"] > seen + 1:
+        db.rollback()
+        raise OutOfOrder(seen)
+    if batch["last_seq"] <= seen:
+        db.rollback()
+        return seen, 0, 0
+
+    stops = [stop for seq, stop in stops if seq > seen]
+    existing = set()
+    vehicles = sorted({stop["vehicle_number"] for stop in stops if stop["vehicle_number"]})
+    for start in range(0, len(vehicles), 500):
+        chunk = vehicles[start:start + 500]
+        cursor.execute(f"""SELECT vehicle_number, stop_date, stop_time FROM police_stops
+            WHERE vehicle_number IN ({", ".join(["%s"] * len(chunk))})""", chunk)
+        existing.update(ledger.natural_key(*row) for row in cursor.fetchall())
+    new = []
+    for stop in stops:
+        key = ledger.natural_key(stop["vehicle_number"], stop["stop_date"], stop["stop_time"])
+        if key not in existing:
+            existing.add(key)
+            new.append(stop)
+    duplicates = len(stops) - len(new)
+    cursor.execute(f"UPDATE {RECEIVED_TABLE} SET seq = %s, stops = stops + %s, duplicates = duplicates + %s WHERE post_id = %s",
+                   (batch["last_seq"], len(new), duplicates, post))
+    with telemetry.span("sync.receive") as fields:
+        fields["rows"] = len(new)
+        if new:
+            # Commits the stops together with the new seq.
+            ledger.insert_stops(db, new)
+        else:
+            db.commit()
+    return batch["last_seq"], len(new), duplicates
+
+
+def posts():
+    return database.fetch_data(f"SELECT post_id, seq, stops, duplicates, received_at FROM {RECEIVED_TABLE} ORDER BY post_id")
+
+
+def targets():
+    return database.fetch_data(f"SELECT target, seq, pushed_at FROM {PUSHED_TABLE} ORDER BY target")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push this check post's new stops to the central ledger.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    push_parser = commands.add_parser("push", help="send every stop the central ledger has not acknowledged")
+    push_parser.add_argument("--every", type=float, nargs="?", const=INTERVAL,
+                             help=f"keep running and push every this many seconds (default {INTERVAL:g})")
+    push_parser.add_argument("--batch", type=int, default=BATCH_ROWS, help=f"changes per request (default {BATCH_ROWS})")
+    push_parser.add_argument("--kbps", type=float, help="simulate a link of this many kilobits per second")
+    push_parser.add_argument("--latency-ms", type=float, default=0, help="simulated round trip added to each request")
+    status_parser = commands.add_parser("status", help="stops waiting at this post, or per-post totals on the central ledger")
+    for command in (push_parser, status_parser):
+        command.add_argument("--to", default=CENTRAL_URL, help="entry API of the central ledger (default $SECURECHECK_CENTRAL_URL)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        if args.to:
+            print(f"⏳ {waiting(args.to)} stops waiting to be pushed to {args.to}")
+        # A target that is no longer used holds back changes.prune.
+        for title, table in (("📡 Pushed to", targets()), ("📥 Received from posts", posts())):
+            if not table.empty:
+                print(title)
+                print(table.to_string(index=False))
+        return
+    if not args.to:
+        parser.error("--to or SECURECHECK_CENTRAL_URL is required")
+    link = Link(args.to, kbps=args.kbps, latency_ms=args.latency_ms)
+    try:
+        if args.every:
+            try:
+                run(link, args.every, batch_rows=args.batch)
+            except KeyboardInterrupt:
+                pass
+            return
+        stats = push(link, batch_rows=args.batch)
+    except Offline as err:
+        print(f"❌ {err}")
+        sys.exit(1)
+    except Rejected as err:
+        # Every later push resends the same changes, so the rejected stops
+        # have to be corrected in this post's stop_changes first.
+        print(f"❌ {err}")
+        print(f"   Correct those changes in {changes.TABLE}, then push again")
+        sys.exit(1)
+    rate = stats["stops"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"✅ {stats['inserted']} stops pushed as {POST_ID!r}, {stats['duplicates']} duplicates, "
+          f"{stats['bytes'] / 1024:.1f} kB ({stats['raw_bytes'] / 1024:.1f} kB uncompressed) "
+          f"in {stats['batches']} batches, {rate:,.0f} stops/s")
+
+
+if __name__ == "__main__":
+    main()
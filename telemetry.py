@@ -0,0 +1,187 @@
+import bisect
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Timing spans around the dashboard's hot path: connecting, running and
+# fetching queries, building DataFrames, and drawing charts. Every span is
+# counted in a Prometheus histogram and kept for an hour so the admin page
+# can list the slowest queries; after start() it is also logged as one
+# JSON line.
+LOG_TARGET = os.environ.get("SECURECHECK_TELEMETRY_LOG", "-")
+METRICS_FILE = os.environ.get("SECURECHECK_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("SECURECHECK_METRICS_PORT", "0"))
+METRICS_FILE_INTERVAL = 5.0
+RECENT_SECONDS = 3600
+RECENT_MAX = 20000
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+log = logging.getLogger("securecheck.telemetry")
+
+_lock = threading.Lock()
+# (span name, sorted label items) -> [bucket counts..., +Inf count, sum]
+_histograms = {}
+_recent = deque(maxlen=RECENT_MAX)
+_file_written = 0.0
+
+
+@contextmanager
+def span(name, sql=None, **labels):
+    # Labels become Prometheus label values, so they must have few distinct
+    # values (a report title, a page). The SQL text and anything the block
+    # adds to the yielded dict only go to the log and the recent list.
+    fields = {}
+    error = None
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as err:
+        error = type(err).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - started, labels, sql, error, fields)
+
+
+def record(name, seconds, labels=None, sql=None, error=None, fields=None):
+    labels = labels or {}
+    entry = {"at": time.time(), "span": name, "seconds": seconds, **labels}
+    if sql is not None:
+        entry["sql"] = " ".join(sql.split())
+    if error is not None:
+        entry["error"] = error
+    entry.update(fields or {})
+
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        counts = _histograms.setdefault(key, [0] * (len(BUCKETS) + 2))
+        counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        counts[-1] += seconds
+        _recent.append(entry)
+
+    if log.isEnabledFor(logging.INFO):
+        line = dict(entry, at=datetime.datetime.fromtimestamp(entry["at"]).isoformat(timespec="milliseconds"),
+                    ms=round(seconds * 1000, 3))
+        del line["seconds"]
+        log.info(json.dumps(line, default=str))
+    if METRICS_FILE:
+        _maybe_write_file()
+
+
+def start(log_target=LOG_TARGET, metrics_port=METRICS_PORT):
+    # Called once by the dashboard. Command-line tools leave span logging
+    # off so their own output stays readable. log_target is "-" for
+    # stderr, a file path, or "off".
+    if log_target != "off" and not log.handlers:
+        handler = logging.StreamHandler(sys.stderr) if log_target == "-" else logging.FileHandler(log_target)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    serve_metrics(metrics_port)
+
+
+def recent(seconds=RECENT_SECONDS):
+    # Spans that finished in the last `seconds`, oldest first.
+    cutoff = time.time() - seconds
+    with _lock:
+        entries = [entry for entry in _recent if entry["at"] >= cutoff]
+    df = pd.DataFrame(entries)
+    if not df.empty:
+        df["at"] = pd.to_datetime(df["at"], unit="s")
+        df["ms"] = df.pop("seconds") * 1000
+    return df
+
+
+def histogram(name):
+    # Non-cumulative bucket counts for one span name, one row per label set
+    # and bucket.
+    rows = []
+    with _lock:
+        items = [(key, list(counts)) for key, counts in _histograms.items() if key[0] == name]
+    for (_, labels), counts in items:
+        bounds = [f"≤{int(bound * 1000)} ms" for bound in BUCKETS] + [f">{int(BUCKETS[-1] * 1000)} ms"]
+        for bound, count in zip(bounds, counts[:-1]):
+            rows.append({**dict(labels), "bucket": bound, "count": count})
+    return pd.DataFrame(rows)
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text():
+    with _lock:
+        items = sorted((key, list(counts)) for key, counts in _histograms.items())
+    lines = [
+        "# HELP securecheck_span_seconds Time spent in instrumented dashboard steps.",
+        "# TYPE securecheck_span_seconds histogram",
+    ]
+    for (name, labels), counts in items:
+        labels = (("span", name),) + labels
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), counts[:-1]):
+            cumulative += count
+            lines.append(f"securecheck_span_seconds_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"securecheck_span_seconds_sum{_label_text(labels)} {counts[-1]:.6f}")
+        lines.append(f"securecheck_span_seconds_count{_label_text(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as handle:
+        handle.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def _maybe_write_file():
+    global _file_written
+    now = time.monotonic()
+    with _lock:
+        if now - _file_written < METRICS_FILE_INTERVAL:
+            return
+        _file_written = now
+    write_metrics(METRICS_FILE)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def serve_metrics(port=METRICS_PORT):
+    # Serves /metrics for Prometheus from a daemon thread; once per process.
+    global _server
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
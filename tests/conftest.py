@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import datagen  # noqa: E402
+import migrate  # noqa: E402
+
+
+@pytest.fixture
+def ledger_db(tmp_path):
+    # A fresh SQLite ledger with every migration applied; yields an open
+    # connection to it.
+    original_url = database.DB_URL
+    database.configure(f"sqlite:///{tmp_path / 'ledger.db'}")
+    assert migrate.migrate()
+    db = database.connect()
+    yield db
+    db.close()
+    database.configure(original_url)
+
+
+def make_stops(rows, seed=0):
+    # Generated stops as dicts, as the entry form would pass them.
+    return [stop for df in datagen.generate(rows, seed) for stop in df.to_dict("records")]
+
+
+def count(db, sql, params=()):
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchone()[0]
@@ -0,0 +1,77 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+import changes
+import database
+import ingest
+import ledger
+import records
+import reports
+from conftest import make_stops
+
+LIVE_REPORTS = [(title, report) for title, report in reports.all_reports() if report.get("live")]
+
+
+def _sorted(df, keys):
+    df = df.sort_values(list(keys)).reset_index(drop=True) if keys else df.reset_index(drop=True)
+    return df.astype(object).where(df.notna(), None)
+
+
+def _same(live, keys):
+    expected = database.fetch_data(live.sql, live.params)
+    pd.testing.assert_frame_equal(_sorted(live.result, keys), _sorted(expected, keys), check_dtype=False)
+
+
+def _change_ledger(db):
+    ledger.insert_stops(db, make_stops(30, seed=1))
+    cursor = db.cursor()
+    cursor.execute("SELECT id FROM police_stops ORDER BY id LIMIT 15")
+    ids = [row[0] for row in cursor.fetchall()]
+    ledger.delete_stops(db, f"id IN ({', '.join(['%s'] * len(ids))})", ids)
+
+
+@pytest.mark.parametrize("title, report", LIVE_REPORTS, ids=[title for title, _ in LIVE_REPORTS])
+def test_report_deltas_match_requery(ledger_db, title, report):
+    ledger.insert_stops(ledger_db, make_stops(200))
+    live = changes.LiveResult(report["sql"], None, report["live"], reports.report_sql(report))
+
+    _change_ledger(ledger_db)
+    assert live.refresh()
+
+    assert live.deltas == 1 and live.full_reads == 1
+    _same(live, report["live"])
+
+
+def test_summary_deltas_match_requery(ledger_db):
+    ledger.insert_stops(ledger_db, make_stops(200))
+    sql, params = records.summary_query(datetime.date(2021, 1, 1), datetime.date(2030, 12, 31), countries=["India", "USA"])
+    live = changes.LiveResult(sql, params, keys=())
+
+    _change_ledger(ledger_db)
+    assert live.refresh()
+    assert not live.refresh()
+
+    assert live.deltas == 1
+    _same(live, ())
+
+
+def test_bulk_load_reloads(ledger_db):
+    ledger.insert_stops(ledger_db, make_stops(50))
+    live = changes.LiveResult("SELECT COUNT(*) AS stops FROM police_stops", keys=())
+
+    ingest.load_chunk(ledger_db, pd.DataFrame(make_stops(20, seed=2), columns=ledger.COLUMNS))
+    assert live.refresh()
+
+    assert live.full_reads == 2 and live.deltas == 0
+    _same(live, ())
+
+
+def test_delete_changes_have_consecutive_seqs(ledger_db):
+    ledger.insert_stops(ledger_db, make_stops(40))
+    _change_ledger(ledger_db)
+
+    seqs = database.fetch_data("SELECT seq FROM stop_changes ORDER BY seq")["seq"].tolist()
+    assert seqs == list(range(1, len(seqs) + 1))
+    assert seqs[-1] == changes.latest_seq()
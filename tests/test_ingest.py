@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+import database
+import ingest
+import ledger
+import rollups
+from conftest import count, make_stops
+
+
+def test_failed_chunk_leaves_rollups_matching(ledger_db):
+    df = pd.DataFrame(make_stops(200), columns=ledger.COLUMNS)
+    bad, good = df.iloc[:100].copy(), df.iloc[100:]
+    bad.iloc[-1, bad.columns.get_loc("country")] = "Atlantis"
+
+    with pytest.raises(database.DATA_ERRORS):
+        ingest.load_chunk_with_retry(ledger_db, bad)
+    assert ingest.load_chunk_with_retry(ledger_db, good) == len(good)
+
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == len(good)
+    assert count(ledger_db, "SELECT SUM(stops) FROM rollup_stop_profile") == len(good)
+    assert rollups.check() == 0
@@ -0,0 +1,41 @@
+import datetime
+
+import database
+import ledger
+import records
+from conftest import make_stops
+
+
+def test_keyset_pages_cover_every_stop_once(ledger_db):
+    stops = make_stops(130)
+    # Ties on date and time leave the order to the id.
+    for number, stop in enumerate(stops[:40]):
+        stop.update(vehicle_number=f"KA01AA{number:04d}", stop_date=datetime.date(2024, 5, 1), stop_time="08:30:00")
+    ledger.insert_stops(ledger_db, stops)
+    where, params = records.build_filters(datetime.date(2020, 1, 1), datetime.date(2030, 12, 31))
+
+    pages, after = [], None
+    while True:
+        page, after = records.split_page(database.fetch_data(*records.page_query(where, params, after, 25)), 25)
+        pages.append(page)
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [25] * 5 + [5]
+    paged = [int(stop_id) for page in pages for stop_id in page["id"]]
+    expected = database.fetch_data(f"SELECT id FROM police_stops WHERE {where} ORDER BY stop_date DESC, stop_time DESC, id DESC",
+                                   params)
+    assert paged == expected["id"].tolist()
+
+
+def test_filters_narrow_the_pages(ledger_db):
+    ledger.insert_stops(ledger_db, make_stops(100))
+    where, params = records.build_filters(datetime.date(2020, 1, 1), datetime.date(2030, 12, 31), gender="Female",
+                                          countries=["India"], arrests_only=True)
+    page, after = records.split_page(database.fetch_data(*records.page_query(where, params, None, 500)), 500)
+
+    assert after is None
+    assert not page.empty
+    assert set(page["driver_gender"]) == {"Female"}
+    assert set(page["country"]) == {"India"}
+    assert set(page["is_arrested"]) == {1}
@@ -0,0 +1,44 @@
+import datetime
+
+import pandas as pd
+
+import changes
+import ledger
+import retention
+import rollups
+from conftest import count, make_stops
+
+
+def test_run_keeps_stops_on_or_after_cutoff(ledger_db, tmp_path):
+    stops = make_stops(60)
+    for i, stop in enumerate(stops):
+        stop["stop_date"] = datetime.date(2021, 1, 1) + datetime.timedelta(days=i * 6)
+    before = datetime.date(2021, 6, 15)
+    stops[0]["stop_date"] = before
+    ledger.insert_stops(ledger_db, stops)
+    older = sum(stop["stop_date"] < before for stop in stops)
+
+    assert retention.run(before, directory=str(tmp_path / "archive"))
+
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops WHERE stop_date < %s", (before,)) == 0
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == len(stops) - older
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops WHERE stop_date = %s", (before,)) == 1
+    archived = retention.fetch_archived("SELECT COUNT(*) AS n, MAX(stop_date) AS last FROM police_stops",
+                                        directory=str(tmp_path / "archive"))
+    assert int(archived["n"].iloc[0]) == older
+    assert archived["last"].iloc[0] < pd.Timestamp(before)
+    assert rollups.check() == 0
+
+
+def test_archive_run_writes_one_reload_change(ledger_db, tmp_path):
+    stops = make_stops(40)
+    for i, stop in enumerate(stops):
+        stop["stop_date"] = datetime.date(2020, 1, 1) + datetime.timedelta(days=i)
+    ledger.insert_stops(ledger_db, stops)
+    seq = changes.latest_seq()
+
+    assert retention.run(datetime.date(2021, 1, 1), directory=str(tmp_path / "archive"))
+
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == 0
+    assert count(ledger_db, "SELECT COUNT(*) FROM stop_changes WHERE seq > %s", (seq,)) == 1
+    assert count(ledger_db, "SELECT op FROM stop_changes WHERE seq > %s", (seq,)) == changes.RELOAD
@@ -0,0 +1,30 @@
+import datagen
+import ingest
+import ledger
+import rollups
+from conftest import count, make_stops
+
+
+def test_rollups_match_after_ingest_and_delete(ledger_db, tmp_path):
+    path = str(tmp_path / "stops.csv")
+    next(datagen.generate(500)).to_csv(path, index=False)
+
+    pending, read, errors = ingest.ingest_paths([path], chunksize=100, manifest_path=str(tmp_path / "manifest.json"))
+    assert (pending, read, errors) == ([path], 500, [])
+    ledger.insert_stops(ledger_db, make_stops(50, seed=1))
+    assert rollups.check() == 0
+
+    ledger.delete_stops(ledger_db, "driver_gender = %s AND violation = %s", ["Female", "Speeding"])
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") < 550
+    assert rollups.check() == 0
+
+
+def test_reloading_a_file_adds_nothing(ledger_db, tmp_path):
+    path = str(tmp_path / "stops.csv")
+    next(datagen.generate(300)).to_csv(path, index=False)
+
+    for manifest in ("first.json", "second.json"):
+        ingest.ingest_paths([path], chunksize=100, manifest_path=str(tmp_path / manifest))
+
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == 300
+    assert rollups.check() == 0
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+import changes
+import database
+import entries
+import ledger
+import migrate
+import rollups
+import sync
+from conftest import count, make_stops
+
+
+def batch(post, stops, first_seq=1):
+    # What sync.push sends for these stops, as the central ledger decodes it.
+    rows = pd.DataFrame(stops, columns=ledger.COLUMNS)
+    rows.insert(0, "op", changes.INSERT)
+    rows.insert(0, "seq", range(first_seq, first_seq + len(stops)))
+    return sync.decode(sync.encode(post, rows), compressed=True)
+
+
+def test_unique_stop_key(ledger_db):
+    stop = make_stops(1)[0]
+    ledger.insert_stops(ledger_db, [stop])
+    with pytest.raises(database.DATA_ERRORS) as raised:
+        ledger.insert_stops(ledger_db, [stop])
+    assert database.duplicate_key(raised.value)
+
+
+def test_stop_committed_during_receive_counts_as_duplicate(ledger_db, monkeypatch):
+    stops = make_stops(10)
+    insert_stops = ledger.insert_stops
+    calls = []
+
+    def racing(db, new):
+        # Another post's copy of the first stop commits between the
+        # duplicate check and this insert. SQLite serializes writers, so
+        # this transaction lets go of its lock first, as a MySQL one
+        # would not need to.
+        if not calls:
+            db.rollback()
+            other = database.connect()
+            try:
+                insert_stops(other, [stops[0]])
+            finally:
+                other.close()
+        calls.append(len(new))
+        return insert_stops(db, new)
+
+    monkeypatch.setattr(ledger, "insert_stops", racing)
+    assert sync.receive(ledger_db, batch("north", stops)) == (10, 9, 1)
+    assert calls == [10, 9]
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == 10
+
+
+def test_round_trip_skips_resent_and_known_stops(ledger_db, tmp_path):
+    # A post's own ledger encodes its changes...
+    ledger.insert_stops(ledger_db, make_stops(20))
+    body = sync.encode("north", sync.read_changes(0, limit=15))
+    rest = sync.encode("north", sync.read_changes(10))
+    # ...and the central ledger, another database, applies them.
+    database.configure(f"sqlite:///{tmp_path / 'central.db'}")
+    assert migrate.migrate()
+    central = database.connect()
+    try:
+        assert sync.receive(central, sync.decode(body, compressed=True)) == (15, 15, 0)
+        # The reply was lost and the post sends the batch again.
+        assert sync.receive(central, sync.decode(body, compressed=True)) == (15, 0, 0)
+        # The next batch overlaps the first.
+        assert sync.receive(central, sync.decode(rest, compressed=True)) == (20, 5, 0)
+        # Another post logged some of the same stops.
+        assert sync.receive(central, batch("south", make_stops(20)[5:12])) == (7, 0, 7)
+
+        assert count(central, "SELECT COUNT(*) FROM police_stops") == 20
+        assert sync.received("north") == 20 and sync.received("south") == 7
+        assert rollups.check() == 0
+    finally:
+        central.close()
+
+
+def test_gap_and_bad_stop_write_nothing(ledger_db):
+    stops = make_stops(10)
+    with pytest.raises(sync.OutOfOrder):
+        sync.receive(ledger_db, batch("north", stops, first_seq=5))
+    stops[3]["country"] = "Atlantis"
+    with pytest.raises(entries.BatchRejected):
+        sync.receive(ledger_db, batch("north", stops))
+
+    assert count(ledger_db, "SELECT COUNT(*) FROM police_stops") == 0
+    assert sync.received("north") == 0
@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+import animations
+import changes
+import database
+import result_cache
+
+# Helpers shared by the dashboard's page modules (page_*.py). dashboard.py
+# imports a page's module the first time that page is opened, so what only
+# one page needs (plotly, streamlit_lottie, the outcome model) is not
+# loaded before a session's first paint.
+
+# Set SECURECHECK_BACKGROUND_URL to "" to drop the background image, e.g.
+# at check posts without internet access.
+BACKGROUND_URL = os.environ.get("SECURECHECK_BACKGROUND_URL", "https://i.ibb.co/k62fBtFf/Lowering-the-opacity.png")
+BACKGROUND = f"""
+    [data-testid="stAppViewContainer"] {{
+        background-image: url("{BACKGROUND_URL}");
+        background-size: cover;
+        background-repeat: no-repeat;
+        background-position: center;
+        background-attachment: fixed;
+    }}
+""" if BACKGROUND_URL else ""
+STYLE = f"""
+    <style>
+        html, body, [class*="st-"], .stApp {{
+            color: darkblue!important;
+        }}
+    {BACKGROUND}
+    </style>
+"""
+
+
+def connect_to_database():
+    try:
+        return database.connect()
+    except database.CONNECTION_ERRORS as err:
+        st.error(f"❌ DB Connection Error: {err}")
+        return None
+
+
+def fetch_data(query, params=None):
+    try:
+        return database.fetch_data(query, params)
+    except database.CONNECTION_ERRORS as err:
+        st.error(f"❌ DB Connection Error: {err}")
+        return pd.DataFrame()
+
+
+def cached_data(query, params=None):
+    # fetch_data through the shared result cache, so a rerun that changes
+    # nothing (paging back, picking an export format) reads no stops.
+    # dashboard.py checks the change feed first on every run, so a write
+    # from any process makes the cached copy stale.
+    try:
+        return result_cache.cached_fetch(database.fetch_data, query, params)
+    except database.CONNECTION_ERRORS as err:
+        st.error(f"❌ DB Connection Error: {err}")
+        return pd.DataFrame()
+
+
+def live_toggle():
+    return st.sidebar.toggle("🔴 Live Updates", help=f"Follow new and deleted stops every {changes.POLL_SECONDS:g} seconds")
+
+
+def live_result(name, sql, params=None, keys=None, fetch_sql=None):
+    # One changes.LiveResult per session and query; later calls apply
+    # whatever the change feed has since.
+    live = st.session_state.get(name)
+    if live is None or live.query != (sql, tuple(params or ()), fetch_sql):
+        live = changes.LiveResult(sql, params, keys, fetch_sql)
+        st.session_state[name] = live
+    else:
+        live.refresh()
+    return live
+
+
+def show_animation(name, **options):
+    # Never waits on the network: without a local copy the sidebar simply
+    # has no animation on this run.
+    animation = animations.load(name)
+    if animation:
+        from streamlit_lottie import st_lottie
+
+        with st.sidebar:
+            st_lottie(animation, key="welcome_anim", **options)
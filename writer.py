@@ -0,0 +1,127 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import database
+import ledger
+import telemetry
+
+# Group commit for the New Entry form. Sessions hand their stops to one
+# background thread and get a Future back straight away; the thread
+# commits whatever has queued up, at most MAX_ROWS stops per transaction,
+# and resolves each Future with its new ids once the transaction is
+# durable. A full queue pushes back on the submitter.
+MAX_ROWS = int(os.environ.get("SECURECHECK_WRITER_MAX_ROWS", "500"))
+# Extra time to hold a transaction open for more stops. Entries that
+# arrive while a commit runs are batched anyway, and on the insert
+# benchmark any wait here only lowered throughput.
+MAX_WAIT_MS = float(os.environ.get("SECURECHECK_WRITER_MAX_WAIT_MS", "0"))
+QUEUE_SIZE = int(os.environ.get("SECURECHECK_WRITER_QUEUE_SIZE", "1000"))
+# How long submit() waits for room in a full queue before giving up.
+SUBMIT_TIMEOUT = float(os.environ.get("SECURECHECK_WRITER_SUBMIT_TIMEOUT", "2"))
+
+_STOP = object()
+
+
+class WriterBusy(RuntimeError):
+    pass
+
+
+class GroupCommitWriter:
+    def __init__(self, max_rows=MAX_ROWS, max_wait_ms=MAX_WAIT_MS, queue_size=QUEUE_SIZE, insert=ledger.insert_stops):
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self._insert = insert
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, stops, timeout=SUBMIT_TIMEOUT):
+        # A Future that resolves to the stops' ids, or raises what the
+        # insert raised. Raises WriterBusy if the queue stays full.
+        future = Future()
+        try:
+            self._queue.put((list(stops), future), timeout=timeout)
+        except queue.Full:
+            raise WriterBusy(f"{self._queue.qsize()} submissions are waiting to be written") from None
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=10):
+        # Writes everything already queued, then stops the thread.
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_rows:
+            # Whatever queued up during the last commit goes in without
+            # waiting; after that, linger until the deadline for more.
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += len(item[0])
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._commit(batch)
+
+    def _write(self, stops):
+        db = database.connect()
+        try:
+            return self._insert(db, stops)
+        finally:
+            db.close()
+
+    def _commit(self, batch):
+        stops = [stop for submitted, _ in batch for stop in submitted]
+        try:
+            with telemetry.span("writer.commit") as fields:
+                fields["rows"] = len(stops)
+                fields["submissions"] = len(batch)
+                ids = self._write(stops)
+        except Exception as err:
+            if len(batch) > 1 and not isinstance(err, database.CONNECTION_ERRORS):
+                # One bad submission must not fail the others queued with it.
+                for item in batch:
+                    self._commit([item])
+                return
+            for _, future in batch:
+                future.set_exception(err)
+            return
+        start = 0
+        for submitted, future in batch:
+            future.set_result(ids[start:start + len(submitted)])
+            start += len(submitted)
+
+
+_writer = None
+_lock = threading.Lock()
+
+
+def shared_writer():
+    # One writer per process, drained at interpreter exit.
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = GroupCommitWriter()
+            atexit.register(_writer.close)
+    return _writer